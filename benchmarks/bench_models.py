@@ -0,0 +1,50 @@
+"""
+Measures Vacancy construction throughput for the validated and the trusted paths.
+
+Run from the project root: ``python benchmarks/bench_models.py [--records N] [--repeat R]``.
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models import Vacancy  # noqa: E402
+
+
+def make_records(count: int) -> list:
+    """Builds stored-shaped vacancy records."""
+    return [{
+        'id': str(idx),
+        'title': f'Python Developer {idx}',
+        'url': f'https://hh.ru/vacancy/{idx}',
+        'salary_from': 100000 + idx % 1000,
+        'salary_to': 150000 + idx % 1000 if idx % 3 else None,
+        'currency': 'RUR',
+        'description': 'Python, Django, PostgreSQL',
+        'salary_from_norm': 100000 + idx % 1000,
+        'salary_to_norm': 150000 + idx % 1000 if idx % 3 else None,
+    } for idx in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    records = make_records(args.records)
+
+    paths = {
+        'Vacancy.from_record': lambda: [Vacancy.from_record(record) for record in records],
+        'Vacancy.from_trusted_row': lambda: [Vacancy.from_trusted_row(record) for record in records],
+        'Vacancy.from_rows': lambda: list(Vacancy.from_rows(records)),
+    }
+    print(f"{'path':<28}{'best, s':>10}{'objects/s':>14}")
+    for name, build in paths.items():
+        best = min(timeit.repeat(build, number=1, repeat=args.repeat))
+        print(f"{name:<28}{best:>10.4f}{args.records / best:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
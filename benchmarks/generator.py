@@ -0,0 +1,67 @@
+"""
+Synthetic generator of HeadHunter-shaped vacancy payloads for benchmarks.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List
+
+TITLES = ['Python Developer', 'Backend Engineer', 'Data Scientist', 'Go Developer', 'DevOps Engineer',
+          'Frontend Developer', 'QA Engineer', 'Team Lead', 'ML Engineer', 'System Analyst']
+SKILLS = ['Python', 'Django', 'FastAPI', 'PostgreSQL', 'Kubernetes', 'Docker', 'Kafka', 'Redis', 'SQL',
+          'Linux', 'Git', 'React', 'TypeScript', 'Go', 'Airflow', 'Spark', 'pandas', 'CI/CD']
+CURRENCIES = ['RUR'] * 8 + ['USD', 'EUR', 'KZT']
+EMPLOYERS = [f'Company {idx}' for idx in range(500)]
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=3)))
+
+
+def generate_items(count: int, seed: int = 0) -> Iterator[Dict]:
+    """
+    Lazily generates vacancy items shaped like the ``items`` of the /vacancies response,
+    so millions of items can be streamed without holding them in memory.
+
+    :param count: The number of items to generate.
+    :param seed: Seed of the random generator; equal seeds give equal payloads.
+    :return: An iterator over the items.
+    """
+    rng = random.Random(seed)
+    for idx in range(count):
+        salary = None
+        if rng.random() < 0.7:
+            low = rng.randrange(30, 400) * 1000
+            salary = {
+                'from': low if rng.random() < 0.85 else None,
+                'to': low + rng.randrange(0, 200) * 1000 if rng.random() < 0.6 else None,
+                'currency': rng.choice(CURRENCIES),
+                'gross': rng.random() < 0.5,
+            }
+        skills = rng.sample(SKILLS, rng.randrange(2, 6))
+        vacancy_id = str(10_000_000 + idx)
+        yield {
+            'id': vacancy_id,
+            'name': f'{rng.choice(TITLES)} {idx}',
+            'alternate_url': f'https://hh.ru/vacancy/{vacancy_id}',
+            'url': f'https://api.hh.ru/vacancies/{vacancy_id}',
+            'salary': salary,
+            'snippet': {
+                'requirement': f"Опыт работы с <highlighttext>{skills[0]}</highlighttext>, " + ', '.join(skills[1:]),
+                'responsibility': 'Разработка и поддержка сервисов.',
+            },
+            'employer': {'id': str(idx % len(EMPLOYERS)), 'name': EMPLOYERS[idx % len(EMPLOYERS)]},
+            'area': {'id': '1', 'name': 'Москва'},
+            'published_at': (_EPOCH + timedelta(minutes=idx)).strftime('%Y-%m-%dT%H:%M:%S%z'),
+        }
+
+
+def generate_pages(count: int, per_page: int = 100, seed: int = 0) -> List[Dict]:
+    """
+    Splits generated items into /vacancies response pages.
+
+    :param count: The total number of items.
+    :param per_page: The number of items per page.
+    :param seed: Seed of the random generator.
+    :return: The response bodies, one per page.
+    """
+    items = list(generate_items(count, seed))
+    pages = max(1, -(-count // per_page))
+    return [{'items': items[page * per_page:(page + 1) * per_page], 'found': count, 'pages': pages,
+             'page': page, 'per_page': per_page} for page in range(pages)]
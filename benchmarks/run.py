@@ -0,0 +1,255 @@
+"""
+Standalone benchmark runner for the fetch, parse, ingest, filter, sort and load paths.
+
+Run from the project root::
+
+    python -m benchmarks.run --records 100000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --records 100000 --baseline benchmarks/baseline.json
+
+Every case reports the best wall time of ``--repeat`` runs, the throughput and the peak
+memory allocated during one extra run traced by ``tracemalloc``. With ``--baseline`` the
+results are compared against a stored run and the process exits with status 1 if any case
+got slower (or allocates more) than the tolerance allows.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, NamedTuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.generator import generate_items, generate_pages
+from main import filter_vacancies, get_vacancies_by_salary, sort_vacancies
+from src.api import HeadHunterAPI
+from src.ingest import IngestPipeline, shard
+from src.models import Vacancy
+from src.ranking import Ranker, VacancyColumns
+from src.snapshot import Snapshot, write_snapshot
+from src.storage import JSONFileStorage, JSONLinesStorage
+from src.utils import parse_salary, parse_vacancy_item
+
+
+class Case(NamedTuple):
+    """A benchmark case: ``prepare()`` builds a fresh zero-argument callable to be timed."""
+    name: str
+    size: int
+    prepare: Callable[[], Callable[[], object]]
+
+
+class PageServer:
+    """Local HTTP server answering /vacancies requests with generated pages."""
+
+    def __init__(self, pages: List[Dict]):
+        bodies = [json.dumps(page).encode('utf-8') for page in pages]
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                page = int(parse_qs(urlparse(self.path).query).get('page', ['0'])[0])
+                body = bodies[page] if page < len(bodies) else b'{"items": []}'
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}/vacancies'
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> 'PageServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def build_cases(records: int, json_records: int, workdir: str, fetch_url: str) -> List[Case]:
+    """
+    Builds the benchmark cases over generated data.
+
+    :param records: The number of vacancies used by the in-memory cases.
+    :param json_records: The number of vacancies used by the JSONFileStorage cases.
+    :param workdir: Directory for the storage files.
+    :param fetch_url: URL of the page server used by the fetch case.
+    :return: The cases in execution order.
+    """
+    items = list(generate_items(records))
+    parsed = [parse_vacancy_item(item) for item in items]
+    salaries = [item['salary'] for item in items]
+    vacancies = [Vacancy.from_record(record) for record in parsed]
+    json_data = parsed[:json_records]
+    pages = [json.dumps({'items': items[idx:idx + 100]}).encode('utf-8') for idx in range(0, len(items), 100)]
+    counter = iter(range(sys.maxsize))
+
+    def fresh(suffix: str) -> str:
+        return os.path.join(workdir, f'{next(counter)}.{suffix}')
+
+    def json_store(data: List[Dict]) -> JSONFileStorage:
+        storage = JSONFileStorage(fresh('json'))
+        if data:
+            storage.write_data(data)
+        return storage
+
+    def jsonl_store() -> JSONLinesStorage:
+        storage = JSONLinesStorage(fresh('jsonl'), auto_compact=False)
+        storage.write_data(parsed)
+        return storage
+
+    def snapshot_file() -> str:
+        filename = fresh('snap')
+        write_snapshot(json_data, filename)
+        return filename
+
+    def prepare_json_delete():
+        storage = json_store(json_data)
+        return lambda: [storage.delete_data(record) for record in json_data[:10]]
+
+    fetch_pages = min(records, HeadHunterAPI.MAX_DEPTH) // HeadHunterAPI.MAX_PER_PAGE
+    return [
+        Case('fetch', fetch_pages * HeadHunterAPI.MAX_PER_PAGE,
+             lambda: lambda: HeadHunterAPI(base_url=fetch_url).get_vacancies('python', max_pages=fetch_pages)),
+        Case('parse_salary', records, lambda: lambda: [parse_salary(salary) for salary in salaries]),
+        Case('parse_vacancy_item', records, lambda: lambda: [parse_vacancy_item(item) for item in items]),
+        Case('vacancy_validated', records, lambda: lambda: [Vacancy.from_record(record) for record in parsed]),
+        Case('vacancy_trusted', records, lambda: lambda: list(Vacancy.from_rows(parsed))),
+        Case('ingest_jsonl', records,
+             lambda: (lambda pipeline: lambda: pipeline.run(items))(
+                 IngestPipeline(JSONLinesStorage(fresh('jsonl'), auto_compact=False)))),
+        Case('ingest_parallel', records,
+             lambda: (lambda pipeline: lambda: pipeline.run_parallel(shard(pages, 10)))(
+                 IngestPipeline(JSONLinesStorage(fresh('jsonl'), auto_compact=False)))),
+        Case('load_jsonl', records, lambda: (lambda storage: lambda: list(storage.iter_vacancies()))(jsonl_store())),
+        Case('json_write', json_records, lambda: (lambda storage: lambda: storage.write_data(json_data))(
+            json_store([]))),
+        Case('json_read', json_records, lambda: json_store(json_data).read_data),
+        Case('json_delete', 10, prepare_json_delete),
+        Case('snapshot_write', json_records, lambda: lambda: write_snapshot(json_data, fresh('snap'))),
+        Case('snapshot_read', json_records, lambda: (lambda filename: lambda: Snapshot(filename).read_all())(
+            snapshot_file())),
+        Case('filter_keywords', records, lambda: lambda: filter_vacancies(vacancies, ['python', 'kafka'])),
+        Case('filter_salary', records, lambda: lambda: get_vacancies_by_salary(vacancies, '100000 - 200000')),
+        Case('sort_vacancies', records, lambda: lambda: sort_vacancies(vacancies)),
+        Case('rank_top_k', records, lambda: (lambda columns, ranker: lambda: ranker.top(columns, ['python', 'kafka']))(
+            VacancyColumns(parsed), Ranker())),
+    ]
+
+
+def measure(case: Case, repeat: int, trace_memory: bool = True) -> Dict:
+    """
+    Times a case and records its memory peak.
+
+    :param case: The case to measure.
+    :param repeat: The number of timed runs; the best one is reported.
+    :param trace_memory: Whether to run the case once more under tracemalloc.
+    :return: The result with seconds, per_second and peak_bytes.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        run = case.prepare()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if trace_memory:
+        run = case.prepare()
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'size': case.size, 'seconds': best, 'per_second': case.size / best if best else None,
+            'peak_bytes': peak}
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, memory_tolerance: float) -> List[str]:
+    """
+    Compares results against a baseline run.
+
+    :param results: The current results document.
+    :param baseline: The baseline results document.
+    :param tolerance: Allowed relative slowdown, e.g. 0.25 for 25%.
+    :param memory_tolerance: Allowed relative growth of the memory peak.
+    :return: One message per regression; empty if there is none.
+    :raises ValueError: If the runs used different data sizes.
+    """
+    if results['meta']['records'] != baseline['meta']['records'] or \
+            results['meta']['json_records'] != baseline['meta']['json_records']:
+        raise ValueError("The baseline was recorded with a different number of records")
+    regressions = []
+    for name, current in results['cases'].items():
+        previous = baseline['cases'].get(name)
+        if previous is None:
+            continue
+        if current['seconds'] > previous['seconds'] * (1 + tolerance):
+            regressions.append(f"{name}: {current['seconds']:.4f}s vs baseline {previous['seconds']:.4f}s "
+                               f"(+{current['seconds'] / previous['seconds'] - 1:.0%})")
+        if current['peak_bytes'] and previous.get('peak_bytes') and \
+                current['peak_bytes'] > previous['peak_bytes'] * (1 + memory_tolerance):
+            regressions.append(f"{name}: peak {current['peak_bytes']:,} B vs baseline {previous['peak_bytes']:,} B "
+                               f"(+{current['peak_bytes'] / previous['peak_bytes'] - 1:.0%})")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Runs the JobSearchManager benchmark suite.")
+    parser.add_argument('--records', type=int, default=20000, help="vacancies used by the in-memory cases")
+    parser.add_argument('--json-records', type=int, default=2000, help="vacancies used by the JSONFileStorage cases")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per case")
+    parser.add_argument('--cases', nargs='+', help="run only these cases")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc run")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--save-baseline', help="store the results as a baseline JSON file")
+    parser.add_argument('--baseline', help="compare the results against this baseline JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument('--memory-tolerance', type=float, default=0.10, help="allowed relative memory growth")
+    args = parser.parse_args(argv)
+
+    json_records = min(args.json_records, args.records)
+    results = {
+        'meta': {'records': args.records, 'json_records': json_records, 'repeat': args.repeat,
+                 'python': platform.python_version(), 'platform': platform.platform()},
+        'cases': {},
+    }
+    with tempfile.TemporaryDirectory() as workdir, \
+            PageServer(generate_pages(min(args.records, HeadHunterAPI.MAX_DEPTH))) as server:
+        cases = build_cases(args.records, json_records, workdir, server.url)
+        print(f"{'case':<20}{'size':>10}{'best, s':>12}{'items/s':>14}{'peak, KiB':>12}")
+        for case in cases:
+            if args.cases and case.name not in args.cases:
+                continue
+            result = measure(case, args.repeat, not args.no_memory)
+            results['cases'][case.name] = result
+            peak = f"{result['peak_bytes'] / 1024:,.0f}" if result['peak_bytes'] is not None else '-'
+            print(f"{case.name:<20}{case.size:>10,}{result['seconds']:>12.4f}"
+                  f"{result['per_second'] or 0:>14,.0f}{peak:>12}")
+
+    for filename in (args.output, args.save_baseline):
+        if filename:
+            with open(filename, 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=4)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.tolerance, args.memory_tolerance)
+        if regressions:
+            print("\nPERFORMANCE REGRESSIONS:", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            return 1
+        print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
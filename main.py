@@ -1,42 +1,76 @@
+import os
+from itertools import islice
+
 from src.api import HeadHunterAPI
+from src.batch import VacancyBatch
+from src.cache import ResponseCache
+from src.currency import CurrencyConverter
+from src.index import KeywordIndex, SalaryIndex, top_n
+from src.ingest import IngestPipeline
+from src.metrics import metrics, profile
 from src.models import Vacancy
-from src.storage import JSONFileStorage
-from src.utils import validate_url, parse_salary
-
+from src.storage import SQLiteStorage, open_storage
+from src.sync import IncrementalSync, SyncState
+from src.utils import salary_bounds, vacancy_key
+
+
+@metrics.timed('filter_seconds', stage='keywords')
+def filter_vacancies(vacancies, keywords, index=None):
+    """Filters vacancies by keywords, using a keyword index when one is given."""
+    if index is not None:
+        matches = index.search(keywords, prefix=True)
+        return [vac for vac in vacancies if vac.key in matches]
+    keywords = [keyword.lower() for keyword in keywords]
+    filtered = []
+    for vac in vacancies:
+        description = vac.description.lower()
+        if any(keyword in description for keyword in keywords):
+            filtered.append(vac)
+    return filtered
+
+
+def parse_salary_range(salary_range):
+    """Parses a salary range such as '100000 - 150000' into a (min, max) tuple."""
+    min_salary, max_salary = map(int, salary_range.split('-'))
+    return min_salary, max_salary
 
-def filter_vacancies(vacancies, keywords):
-    """Filters vacancies by keywords."""
-    return [
-        vac for vac in vacancies
-        if any(keyword.lower() in vac.description.lower() for keyword in keywords)
-    ]
 
+@metrics.timed('filter_seconds', stage='salary')
+def get_vacancies_by_salary(vacancies, salary_range, index=None):
+    """Filters vacancies by salary range, using a salary index when one is given."""
+    min_salary, max_salary = parse_salary_range(salary_range)
+    if index is not None:
+        matches = index.range(min_salary, max_salary)
+        return [vac for vac in vacancies if vac.key in matches]
+    filtered = []
+    for vac in vacancies:
+        salary_from, salary_to = salary_bounds(vac)
+        if salary_from is not None and salary_from >= min_salary and salary_to is not None and salary_to <= max_salary:
+            filtered.append(vac)
+    return filtered
 
-def get_vacancies_by_salary(vacancies, salary_range):
-    """Filters vacancies by salary range."""
-    min_salary, max_salary = map(int, salary_range.split('-'))
-    return [
-        vac for vac in vacancies
-        if
-                (vac.salary_from is not None and vac.salary_from >= min_salary) and
-                (vac.salary_to is not None and vac.salary_to <= max_salary)
 
-    ]
+def salary_sort_key(vac):
+    """Returns the value vacancies are ranked by."""
+    salary_from, salary_to = salary_bounds(vac)
+    return salary_to or salary_from or 0
 
 
+@metrics.timed('filter_seconds', stage='sort')
 def sort_vacancies(vacancies):
     """Sorts vacancies by descending salary."""
-    return sorted(vacancies, key=lambda vac: vac.salary_to or vac.salary_from or 0, reverse=True)
+    return sorted(vacancies, key=salary_sort_key, reverse=True)
 
 
-def get_top_vacancies(vacancies, top_n):
-    """Gets the top N vacancies."""
-    return vacancies[:top_n]
+@metrics.timed('filter_seconds', stage='top')
+def get_top_vacancies(vacancies, top_count):
+    """Gets the top N vacancies by salary without sorting the whole list."""
+    return top_n(vacancies, top_count, key=salary_sort_key)
 
 
-def print_vacancies(vacancies):
+def print_vacancies(vacancies, start=1):
     """Prints vacancies to the screen."""
-    for idx, vac in enumerate(vacancies, start=1):
+    for idx, vac in enumerate(vacancies, start=start):
         print(f"\nVacancy {idx}:")
         print(f"Title: {vac.title}")
         print(f"URL: {vac.url}")
@@ -53,116 +87,152 @@ def print_vacancies(vacancies):
         print("-" * 40)
 
 
-def search_and_add_vacancies(hh_api, storage):
+def search_and_add_vacancies(hh_api, storage, converter):
     """Searches and adds new vacancies from HeadHunter."""
     search_query = input("Enter search query: ")
-    hh_vacancies = hh_api.get_vacancies(search_query)
-    vacancies_list = []
-
-    for vac in hh_vacancies:
-        try:
-            validated_url = validate_url(vac['alternate_url'])
-            salary_from, salary_to, currency = parse_salary(vac['salary'])
-            print(f"Parsed salary: from {salary_from} to {salary_to} {currency}")  # Отладка зарплаты
-            vacancy = Vacancy(
-                title=vac['name'],
-                url=validated_url,
-                salary_from=salary_from,
-                salary_to=salary_to,
-                currency=currency,
-                description=vac['snippet']['requirement'] or "No description available"
-            )
-            vacancies_list.append(vacancy)
-        except ValueError as e:
-            print(f"Invalid URL for vacancy '{vac['name']}': {e}")
-            continue
-
-    # Save vacancies
-    for vacancy in vacancies_list:
-        storage.write_data([{
-            'title': vacancy.title,
-            'url': vacancy.url,
-            'salary_from': vacancy.salary_from,
-            'salary_to': vacancy.salary_to,
-            'currency': vacancy.currency,
-            'description': vacancy.description
-        }])
-
-    # Debugging: Check if vacancies_list is populated
-    if not vacancies_list:
+    hh_vacancies = hh_api.iter_vacancies(search_query)
+
+    def report_error(item, error):
+        print(f"Invalid vacancy '{item.get('name') or item.get('title')}': {error}")
+
+    pipeline = IngestPipeline(storage, converter=converter, on_error=report_error)
+    # the accepted records are kept as columns; Vacancy objects are only built for the displayed rows
+    batch = VacancyBatch.from_records(record for record, _ in pipeline.process_records(hh_vacancies))
+    stats = pipeline.stats
+    metrics.inc('records_processed_total', stats.parse.count, stage='parse')
+    metrics.inc('records_processed_total', stats.commit.count, stage='commit')
+    print(f"Ingested {stats.commit.count} vacancies in {stats.batches} batch(es).")
+
+    # Debugging: Check if the batch is populated
+    if not len(batch):
         print("No vacancies found or saved.")
         return
 
     # Top N vacancies by salary
-    top_n = int(input("Enter the number of top vacancies to display: "))
+    top_count = int(input("Enter the number of top vacancies to display: "))
 
     # Filter by keywords
     filter_words = input("Enter keywords for filtering vacancies: ").split()
 
     # Filter by salary range
-    salary_range = input("Enter salary range (e.g., 100000 - 150000): ")
+    salary_range = input("Enter salary range in RUR (e.g., 100000 - 150000): ")
 
     # Debugging: Check if filtering works
-    filtered_vacancies = filter_vacancies(vacancies_list, filter_words)
-    if not filtered_vacancies:
+    filtered_rows = batch.filter_keywords(filter_words)
+    if not filtered_rows:
         print("No vacancies matched the filter keywords.")
         return
 
     print("Vacancies after keyword filtering:")
-    for vac in filtered_vacancies:
-        print(f"Title: {vac.title}, Salary: from {vac.salary_from} to {vac.salary_to} ")
+    for row in filtered_rows:
+        print(f"Title: {batch.title(row)}, Salary: from {batch.salary_from(row)} to {batch.salary_to(row)} ")
 
-    ranged_vacancies = get_vacancies_by_salary(filtered_vacancies, salary_range)
-    if not ranged_vacancies:
+    ranged_rows = set(batch.filter_salary(*parse_salary_range(salary_range)))
+    ranged_rows = [row for row in filtered_rows if row in ranged_rows]
+    if not ranged_rows:
         print("No vacancies matched the salary range.")
         return
 
-    sorted_vacancies = sort_vacancies(ranged_vacancies)
-    top_vacancies = get_top_vacancies(sorted_vacancies, top_n)
+    top_vacancies = list(batch.vacancies(batch.top(top_count, ranged_rows)))
 
     # Print vacancies to the screen
     print_vacancies(top_vacancies)
 
 
-def view_saved_vacancies(storage):
-    """Views saved vacancies from JSON storage."""
-    vacancies_data = storage.read_data()
-    vacancies = [
-        Vacancy(
-            title=vac['title'],
-            url=validate_url(vac['url']),
-            salary_from=vac.get('salary_from'),
-            salary_to=vac.get('salary_to'),
-            currency=vac.get('currency', '-'),
-            description=vac['description']
-        )
-        for vac in vacancies_data
-    ]
+def view_saved_vacancies(storage, page_size=20):
+    """Views saved vacancies page by page while they are being read from the storage."""
+    vacancies = storage.iter_vacancies()
+    shown = 0
+    while True:
+        page = list(islice(vacancies, page_size))
+        if not page:
+            break
+        print_vacancies(page, start=shown + 1)
+        shown += len(page)
+        if len(page) < page_size or input("Press Enter to show more or 'q' to stop: ").strip().lower() == 'q':
+            break
 
-    if not vacancies:
+    if not shown:
         print("No vacancies saved yet.")
+
+
+def search_saved_vacancies(storage, keyword_index=None, salary_index=None):
+    """Searches saved vacancies by keywords and salary range through the indexes, or in the storage itself."""
+    filter_words = input("Enter keywords for filtering vacancies (empty for all): ").split()
+    mode = 'all' if input("Require all keywords? (y/N): ").strip().lower() == 'y' else 'any'
+    salary_range = input("Enter salary range in RUR (e.g., 100000 - 150000, empty for any): ").strip()
+    top_count = int(input("Enter the number of top vacancies to display: "))
+
+    if keyword_index is None or salary_index is None:
+        records = storage.query(filter_words, mode=mode, top_n=top_count,
+                                salary_range=parse_salary_range(salary_range) if salary_range else None)
+        vacancies = list(Vacancy.from_rows(records))
+    else:
+        matches = keyword_index.search(filter_words, mode=mode, prefix=True) if filter_words else None
+        if salary_range:
+            in_range = salary_index.range(*parse_salary_range(salary_range))
+            matches = in_range if matches is None else matches & in_range
+        keys = salary_index.top(top_count, matches)
+        records = {vacancy_key(vac): vac for vac in storage.read_many(keys)}
+        # keys deleted since the index was read are skipped
+        vacancies = [Vacancy.from_trusted_row(record) for record in map(records.get, keys) if record is not None]
+
+    if not vacancies:
+        print("No saved vacancies matched the filter keywords.")
     else:
         print_vacancies(vacancies)
 
 
+def sync_vacancies(sync):
+    """Fetches only the vacancies published since the previous sync of a query."""
+    search_query = input("Enter search query to sync: ")
+    result = sync.sync(search_query)
+    print(f"Fetched {result.fetched} vacancies, {result.changed} new or updated.")
+    if result.malformed:
+        print(f"Skipped {result.malformed} malformed vacancies.")
+    if result.invalid:
+        print(f"Skipped {result.invalid} vacancies that failed validation.")
+    if result.invalid_time:
+        print(f"Skipped {result.invalid_time} vacancies with an invalid publication time.")
+    if result.truncated:
+        print("More vacancies matched than the API returns; narrow the query to sync the rest.")
+    if result.high_water_mark:
+        print(f"Synced up to {result.high_water_mark}.")
+
+
 def user_interaction():
     """Main interaction loop for the user."""
-    storage = JSONFileStorage('data/vacancies.json')
-    hh_api = HeadHunterAPI()
+    storage = open_storage()
+    converter = CurrencyConverter()
+    if isinstance(storage, SQLiteStorage):
+        keyword_index = salary_index = None
+    else:
+        keyword_index = KeywordIndex().attach(storage)
+        salary_index = SalaryIndex().attach(storage)
+    hh_api = HeadHunterAPI(cache=ResponseCache())
+    sync = IncrementalSync(hh_api, storage, SyncState(), converter)
 
     while True:
         print("\n1. Search and add new vacancies from HH.ru")
         print("2. View saved vacancies")
-        print("3. Exit")
+        print("3. Search saved vacancies")
+        print("4. Sync new vacancies for a query")
+        print("5. Exit")
         choice = input("Choose an option: ")
 
         if choice == '1':
-            search_and_add_vacancies(hh_api, storage)
+            search_and_add_vacancies(hh_api, storage, converter)
 
         elif choice == '2':
             view_saved_vacancies(storage)
 
         elif choice == '3':
+            search_saved_vacancies(storage, keyword_index, salary_index)
+
+        elif choice == '4':
+            sync_vacancies(sync)
+
+        elif choice == '5':
             print("Goodbye!")
             break
 
@@ -170,5 +240,26 @@ def user_interaction():
             print("Invalid option. Please try again.")
 
 
+def main():
+    """
+    Runs the application. Setting JOBSEARCH_METRICS to a file name records metrics and exports
+    them there on exit ('.prom' for Prometheus text, JSON otherwise); setting JOBSEARCH_PROFILE
+    profiles the run with cProfile and dumps the statistics to that file ('-' prints them).
+    """
+    metrics_file = os.environ.get('JOBSEARCH_METRICS')
+    profile_file = os.environ.get('JOBSEARCH_PROFILE')
+    if metrics_file:
+        metrics.enable()
+    try:
+        if profile_file:
+            with profile(None if profile_file == '-' else profile_file):
+                user_interaction()
+        else:
+            user_interaction()
+    finally:
+        if metrics_file:
+            metrics.export(metrics_file)
+
+
 if __name__ == "__main__":
-    user_interaction()
+    main()
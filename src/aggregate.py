@@ -0,0 +1,313 @@
+import bisect
+import itertools
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.storage import FileStorage, StorageListener
+from src.utils import salary_bounds, tokenize, vacancy_key
+
+# a facet maps a record to the groups it belongs to
+Facet = Callable[[Dict], Iterable[str]]
+
+
+def record_salary(record: Dict) -> Optional[float]:
+    """
+    Returns the salary a record contributes to the statistics: the midpoint of its
+    bounds, or the single bound it has, in the base currency when it was converted.
+
+    :param record: The vacancy record.
+    :return: The salary, or None if the vacancy does not state one.
+    """
+    salary_from, salary_to = salary_bounds(record)
+    if salary_from is not None and salary_to is not None:
+        return (salary_from + salary_to) / 2
+    if salary_from is not None:
+        return salary_from
+    return salary_to
+
+
+def by_currency(record: Dict) -> Tuple[str, ...]:
+    """Groups a record by its salary currency."""
+    currency = record.get('currency')
+    return (currency,) if currency else ()
+
+
+def by_employer(record: Dict) -> Tuple[str, ...]:
+    """Groups a record by its employer name."""
+    employer = record.get('employer')
+    return (employer,) if employer else ()
+
+
+def by_keywords(keywords: Iterable[str]) -> Facet:
+    """
+    Builds a facet grouping records by the keywords found in their title or description.
+    A record matching several keywords belongs to each of their groups.
+
+    :param keywords: The keywords; matching is case-insensitive on whole tokens.
+    :return: The facet function.
+    """
+    keywords = list(dict.fromkeys(keyword.lower() for keyword in keywords))
+
+    def facet(record: Dict) -> List[str]:
+        tokens = set(tokenize(f"{record.get('title') or ''} {record.get('description') or ''}"))
+        return [keyword for keyword in keywords if keyword in tokens]
+
+    return facet
+
+
+class SalarySummary:
+    """
+    Statistics of one group: the number of vacancies and the distribution of their salaries.
+
+    Salaries are kept in a sorted ``array('d')``. Added salaries are buffered and removed
+    ones are counted, and both are merged into the sorted column before the next query
+    that needs the order, so adding and removing records are O(1) and min/max,
+    percentiles and histogram buckets are index lookups or bisections on the column.
+    """
+
+    __slots__ = ['count', 'salaried', '_values', '_sum', '_added', '_removed']
+
+    def __init__(self):
+        """
+        Initializes an empty summary.
+        """
+        self.count = 0
+        self.salaried = 0
+        self._values = array('d')
+        self._sum = 0.0
+        self._added: List[float] = []
+        self._removed: Dict[float, int] = {}
+
+    def add(self, salary: Optional[float]) -> None:
+        """
+        Counts a vacancy.
+        :param salary: Its salary, or None if it does not state one.
+        """
+        self.count += 1
+        if salary is not None:
+            self._added.append(salary)
+            self._sum += salary
+            self.salaried += 1
+
+    def remove(self, salary: Optional[float]) -> None:
+        """
+        Uncounts a vacancy added before.
+        :param salary: The salary it was added with.
+        """
+        self.count -= 1
+        if salary is not None:
+            self._removed[salary] = self._removed.get(salary, 0) + 1
+            self._sum -= salary
+            self.salaried -= 1
+
+    def _ordered(self) -> array:
+        """Returns the sorted salaries, merging the pending additions and removals."""
+        if self._added or self._removed:
+            # timsort merges the sorted column and the sorted additions in linear time
+            self._added.sort()
+            values = sorted(itertools.chain(self._values, self._added))
+            for salary, count in self._removed.items():
+                idx = bisect.bisect_left(values, salary)
+                end = bisect.bisect_right(values, salary, idx, idx + count)
+                del values[idx:end]
+            self._values = array('d', values)
+            self._added = []
+            self._removed = {}
+        return self._values
+
+    @property
+    def min(self) -> Optional[float]:
+        """Returns the lowest salary, or None without salaries."""
+        values = self._ordered()
+        return values[0] if values else None
+
+    @property
+    def max(self) -> Optional[float]:
+        """Returns the highest salary, or None without salaries."""
+        values = self._ordered()
+        return values[-1] if values else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Returns the mean salary, or None without salaries."""
+        return self._sum / self.salaried if self.salaried else None
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Returns a salary percentile, interpolating linearly between the closest ranks.
+        :param percent: The percentile, from 0 to 100; 50 is the median.
+        :return: The percentile, or None without salaries.
+        :raises ValueError: If the percentile is out of range.
+        """
+        if not 0 <= percent <= 100:
+            raise ValueError("The percentile must be between 0 and 100")
+        values = self._ordered()
+        if not values:
+            return None
+        rank = percent / 100 * (len(values) - 1)
+        lower = int(rank)
+        if lower + 1 == len(values):
+            return values[lower]
+        return values[lower] + (values[lower + 1] - values[lower]) * (rank - lower)
+
+    def histogram(self, bounds: Sequence[float]) -> List[int]:
+        """
+        Counts the salaries per bucket.
+        :param bounds: Sorted bucket boundaries; bucket i holds salaries in [bounds[i - 1], bounds[i]).
+        :return: ``len(bounds) + 1`` counts, the first below ``bounds[0]``, the last from ``bounds[-1]`` up.
+        """
+        values = self._ordered()
+        positions = [0] + [bisect.bisect_left(values, bound) for bound in bounds] + [len(values)]
+        return [end - start for start, end in zip(positions, positions[1:])]
+
+    def as_dict(self, percentiles: Sequence[float] = (50, 90), bounds: Optional[Sequence[float]] = None) -> Dict:
+        """
+        Returns the statistics as a JSON-serializable dictionary.
+        :param percentiles: The percentiles included as 'p<percent>'.
+        :param bounds: Histogram bucket boundaries; no histogram if omitted.
+        """
+        result = {'count': self.count, 'salaried': self.salaried, 'min': self.min, 'max': self.max,
+                  'mean': self.mean}
+        for percent in percentiles:
+            result[f'p{percent:g}'] = self.percentile(percent)
+        if bounds is not None:
+            result['histogram'] = self.histogram(bounds)
+        return result
+
+
+class FacetedAggregator(StorageListener):
+    """
+    Salary statistics of stored vacancies grouped by facets (currency, employer,
+    keywords, ...), plus the statistics of all vacancies.
+
+    ``add_records`` folds records in a single streaming pass. Attached to a storage, the
+    aggregator also follows added, replaced and deleted records, so its summaries stay
+    current without rescanning the store.
+    """
+
+    def __init__(self, facets: Optional[Dict[str, Facet]] = None, keywords: Optional[Iterable[str]] = None,
+                 salary: Callable[[Dict], Optional[float]] = record_salary):
+        """
+        Initializes an empty aggregator.
+
+        :param facets: Facet functions by name; 'currency' and 'employer' if omitted.
+        :param keywords: If given, adds a 'keyword' facet over these keywords.
+        :param salary: Function returning the salary a record contributes.
+        """
+        self._facets = dict(facets) if facets is not None else {'currency': by_currency, 'employer': by_employer}
+        if keywords is not None:
+            self._facets['keyword'] = by_keywords(keywords)
+        self._salary = salary
+        self.total = SalarySummary()
+        self._groups: Dict[str, Dict[str, SalarySummary]] = {name: {} for name in self._facets}
+        # contributions of every record by key; only kept while attached to a storage
+        self._contributions: Optional[Dict[str, Tuple[Optional[float], List[Tuple[str, str]]]]] = None
+
+    def add(self, record: Dict) -> None:
+        """
+        Counts a record; when attached, a record with a known key replaces the old version.
+        :param record: The vacancy record.
+        """
+        salary = self._salary(record)
+        groups = [(name, group) for name, facet in self._facets.items() for group in facet(record)]
+        if self._contributions is not None:
+            key = vacancy_key(record)
+            self._remove(key)
+            self._contributions[key] = (salary, groups)
+        self.total.add(salary)
+        for name, group in groups:
+            summary = self._groups[name].get(group)
+            if summary is None:
+                summary = self._groups[name][group] = SalarySummary()
+            summary.add(salary)
+
+    def _remove(self, key: str) -> None:
+        """Uncounts a tracked record."""
+        contribution = self._contributions.pop(key, None)
+        if contribution is None:
+            return
+        salary, groups = contribution
+        self.total.remove(salary)
+        for name, group in groups:
+            summary = self._groups[name][group]
+            summary.remove(salary)
+            if not summary.count:
+                del self._groups[name][group]
+
+    def add_records(self, records: Iterable[Dict]) -> 'FacetedAggregator':
+        """
+        Counts records.
+        :param records: The records.
+        :return: The aggregator itself.
+        """
+        for record in records:
+            self.add(record)
+        return self
+
+    def on_records_added(self, records: List[Dict]) -> None:
+        """Counts records added to the attached storage."""
+        self.add_records(records)
+
+    def on_records_deleted(self, keys: List[str]) -> None:
+        """Uncounts records deleted from the attached storage."""
+        for key in keys:
+            self._remove(key)
+
+    def attach(self, storage: FileStorage) -> 'FacetedAggregator':
+        """
+        Counts the current contents of a storage and follows its changes.
+        :param storage: The storage to follow.
+        :return: The aggregator itself.
+        """
+        if self._contributions is None:
+            self._contributions = {}
+        self.add_records(storage.iter_data())
+        storage.add_listener(self)
+        return self
+
+    def groups(self, facet: str, order_by: str = 'count', limit: Optional[int] = None
+               ) -> List[Tuple[str, SalarySummary]]:
+        """
+        Returns the groups of a facet, largest first.
+
+        :param facet: The facet name.
+        :param order_by: 'count', or a summary attribute such as 'mean' or 'max'; groups without
+            a value come last.
+        :param limit: Maximum number of groups returned.
+        :return: (group, summary) pairs.
+        :raises KeyError: If the facet is unknown.
+        """
+        def sort_key(pair: Tuple[str, SalarySummary]) -> Tuple:
+            value = getattr(pair[1], order_by)
+            return (value is None, -(value or 0), pair[0])
+
+        ordered = sorted(self._groups[facet].items(), key=sort_key)
+        return ordered[:limit] if limit is not None else ordered
+
+    def to_dict(self, percentiles: Sequence[float] = (50, 90), bounds: Optional[Sequence[float]] = None,
+                limit: Optional[int] = None) -> Dict:
+        """
+        Returns all statistics as a JSON-serializable dictionary.
+        :param percentiles: The percentiles of every summary.
+        :param bounds: Histogram bucket boundaries; no histograms if omitted.
+        :param limit: Maximum number of groups per facet, largest first.
+        :return: A dictionary with the 'total' summary and the group summaries of every facet.
+        """
+        return {
+            'total': self.total.as_dict(percentiles, bounds),
+            'facets': {name: {group: summary.as_dict(percentiles, bounds)
+                              for group, summary in self.groups(name, limit=limit)}
+                       for name in self._facets},
+        }
+
+
+def aggregate(records: Iterable[Dict], keywords: Optional[Iterable[str]] = None,
+              facets: Optional[Dict[str, Facet]] = None) -> FacetedAggregator:
+    """
+    Computes the faceted statistics of records in a single streaming pass.
+    :param records: The records, e.g. ``storage.iter_data()``.
+    :param keywords: If given, records are also grouped by these keywords.
+    :param facets: Facet functions by name; 'currency' and 'employer' if omitted.
+    :return: The aggregator holding the statistics.
+    """
+    return FacetedAggregator(facets, keywords).add_records(records)
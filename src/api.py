@@ -1,6 +1,29 @@
+import asyncio
+import itertools
+import json
+import queue
+import threading
+import time
 import requests
-from typing import List, Dict
+from collections import deque
+from concurrent.futures import Future, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from typing import Callable, List, Dict, Iterator, Optional, AsyncIterator, Iterable, Tuple
 from abc import ABC, abstractmethod
+from urllib.parse import urlparse
+
+from src.cache import ResponseCache
+from src.metrics import metrics
+from src.ratelimit import AdaptiveTokenBucket, CircuitBreaker, CircuitOpenError, ExponentialBackoff
+
+# request priorities: lower values are sent first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# statuses worth retrying: throttling and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
 
 
 class JobAPI(ABC):
@@ -8,15 +31,22 @@ class JobAPI(ABC):
     Abstract base class for job API interfaces.
     """
     @abstractmethod
-    def _connect_to_api(self) -> None:
+    def get_vacancies(self, search_query: str) -> List[Dict]:
         """
-        Establishes a connection to the job API.
-        This method should be implemented in subclasses to handle the specific API connection logic.
+        Retrieves a list of vacancies based on the search query.
+
+        :param search_query: The search query string used to find relevant job vacancies.
+        :return: A list of dictionaries containing vacancy details.
         """
         pass
 
+
+class AsyncJobAPI(ABC):
+    """
+    Abstract base class for asynchronous job API interfaces.
+    """
     @abstractmethod
-    def get_vacancies(self, search_query: str) -> List[Dict]:
+    async def get_vacancies(self, search_query: str) -> List[Dict]:
         """
         Retrieves a list of vacancies based on the search query.
 
@@ -25,51 +55,552 @@ class JobAPI(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_vacancies_many(self, search_queries: Iterable[str]) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Runs many search queries concurrently.
+
+        :param search_queries: The search query strings.
+        :return: An async iterator of (query, vacancy) pairs in arrival order.
+        """
+        pass
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """
+    Reads the Retry-After header of a response.
+    :param response: The response.
+    :return: The number of seconds to wait, or None if the header is missing or invalid.
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _then(source: Future, transform: Callable) -> Future:
+    """
+    Chains a transformation to a future.
+
+    :param source: The future.
+    :param transform: Function applied to the result of the source, on the thread completing it.
+    :return: A future resolving to the transformed result, or failing with the error of the
+        source or of the transformation. Cancelling it cancels the source.
+    """
+    result = Future()
+
+    def forward(_: Future) -> None:
+        if source.cancelled():
+            result.cancel()
+            return
+        if not result.set_running_or_notify_cancel():
+            return
+        try:
+            result.set_result(transform(source.result()))
+        except BaseException as error:
+            result.set_exception(error)
+
+    result.add_done_callback(lambda _: result.cancelled() and source.cancel())
+    source.add_done_callback(forward)
+    return result
+
+
+class RequestScheduler:
+    """
+    Sends HTTP requests on a pool of worker threads, highest priority first.
+
+    Every attempt takes a token from an adaptive rate limiter that slows down on 429
+    responses and honours ``Retry-After``. Throttled requests, transient 5xx responses
+    and network errors are retried with jittered exponential backoff, and a circuit
+    breaker rejects requests outright while the upstream keeps failing. Interactive
+    requests waiting in the queue are sent before background ones.
+    """
+
+    # initial requests per second of the default rate limiter
+    DEFAULT_RATE = 50.0
+
+    def __init__(self, max_workers: int = 8, rate_limiter: Optional[AdaptiveTokenBucket] = None,
+                 backoff: Optional[ExponentialBackoff] = None, breaker: Optional[CircuitBreaker] = None,
+                 sleep: Callable[[float], None] = time.sleep, idle_timeout: float = 1.0):
+        """
+        Initializes the scheduler; worker threads are started on demand and exit when idle.
+
+        :param max_workers: Maximum number of requests in flight.
+        :param rate_limiter: The rate limiter; ``DEFAULT_RATE`` requests per second if omitted.
+        :param backoff: The retry policy; ``ExponentialBackoff()`` if omitted.
+        :param breaker: The circuit breaker; ``CircuitBreaker()`` if omitted.
+        :param sleep: Function used to wait between retries.
+        :param idle_timeout: Seconds an idle worker thread waits for work before exiting.
+        """
+        self.rate_limiter = rate_limiter or AdaptiveTokenBucket(self.DEFAULT_RATE)
+        self.backoff = backoff or ExponentialBackoff()
+        self.breaker = breaker or CircuitBreaker()
+        self._max_workers = max_workers
+        self._sleep = sleep
+        self._idle_timeout = idle_timeout
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._workers = 0
+        self._lock = threading.Lock()
+
+    def submit(self, send: Callable[[], requests.Response], priority: int = PRIORITY_INTERACTIVE) -> Future:
+        """
+        Queues a request.
+
+        :param send: Function sending the request once and returning the response.
+        :param priority: The request priority; lower values are sent first, equal ones in submission order.
+        :return: A future resolving to the final response. A response with an error status is
+            returned once the retries are exhausted; it fails with ConnectionError on a network
+            error and with CircuitOpenError if the circuit breaker is open.
+        """
+        future = Future()
+        with self._lock:
+            self._queue.put((priority, next(self._sequence), send, future))
+            if self._workers < self._max_workers:
+                self._workers += 1
+                threading.Thread(target=self._run, daemon=True).start()
+        return future
+
+    def call(self, send: Callable[[], requests.Response], priority: int = PRIORITY_INTERACTIVE) -> requests.Response:
+        """
+        Sends a request through the queue and waits for its final response; see ``submit``.
+        """
+        return self.submit(send, priority).result()
+
+    def _run(self) -> None:
+        """Worker loop: sends queued requests until the queue stays empty for ``idle_timeout``."""
+        while True:
+            try:
+                _, _, send, future = self._queue.get(timeout=self._idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._workers -= 1
+                        return
+                continue
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._send(send))
+            except BaseException as error:
+                future.set_exception(error)
+
+    def _send(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Sends a request, retrying throttled and failed attempts.
+        :param send: Function sending the request once.
+        :return: The final response.
+        :raises CircuitOpenError: If the circuit breaker rejects the request.
+        :raises ConnectionError: If the last attempt fails with a network error.
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                metrics.inc('api_requests_rejected_total')
+                raise CircuitOpenError("Circuit breaker is open: the API keeps failing")
+            self.rate_limiter.acquire()
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout) as error:
+                self.breaker.record_failure()
+                if attempt >= self.backoff.max_retries:
+                    raise ConnectionError(f"Failed to retrieve vacancies: {error}") from error
+                reason = 'network'
+            else:
+                if response.status_code == 429:
+                    # throttling means the upstream is healthy, only overloaded
+                    self.breaker.record_success()
+                    self.rate_limiter.on_throttle(_retry_after(response))
+                elif response.status_code in RETRY_STATUSES:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                    self.rate_limiter.on_success()
+                    return response
+                if attempt >= self.backoff.max_retries:
+                    return response
+                reason = str(response.status_code)
+            metrics.inc('api_retries_total', reason=reason)
+            self._sleep(self.backoff.delay(attempt))
+            attempt += 1
+
+
+_default_scheduler: Optional[RequestScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def default_scheduler() -> RequestScheduler:
+    """
+    Returns the scheduler shared by every API client of the process that was not given
+    its own, so they are rate-limited together and their priorities apply across clients.
+    It is created on first use.
+    """
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
+
 
 class HeadHunterAPI(JobAPI):
     """
     A concrete implementation of the JobAPI interface for interacting with the HeadHunter API.
     """
-    def __init__(self):
+    # hh.ru serves at most 100 items per page and at most 2000 items per query
+    MAX_PER_PAGE = 100
+    MAX_DEPTH = 2000
+
+    def __init__(self, per_page: int = MAX_PER_PAGE, max_workers: int = 8,
+                 session: Optional[requests.Session] = None, base_url: str = 'https://api.hh.ru/vacancies',
+                 cache: Optional[ResponseCache] = None, scheduler: Optional[RequestScheduler] = None,
+                 prefetch_pages: int = 2):
         """
-        Initializes the HeadHunterAPI with the base URL for API requests.
+        Initializes the HeadHunterAPI with the base URL for API requests and a pooled HTTP session.
+
+        :param per_page: Number of vacancies requested per page (at most 100).
+        :param max_workers: Maximum number of pages of one query in flight at once.
+        :param session: An existing session to reuse; a pooled session is created if omitted.
+        :param base_url: The vacancies search endpoint.
+        :param cache: Response cache consulted before every page request; no caching if omitted.
+        :param scheduler: Scheduler sending the page requests; the process-wide ``default_scheduler()``
+            if omitted.
+        :param prefetch_pages: Number of pages requested together with page 0, before the page
+            count is known; 1 disables the prefetch.
+        :raises ValueError: If the number of vacancies per page is not positive.
         """
-        self._base_url = 'https://api.hh.ru/vacancies'
+        if per_page < 1:
+            raise ValueError("The number of vacancies per page must be positive")
+        self._prefetch_pages = max(1, min(prefetch_pages, max_workers))
+        self._base_url = base_url
+        self._per_page = min(per_page, self.MAX_PER_PAGE)
+        self._max_workers = max_workers
+        self._session = session or self._create_session(max_workers)
+        self._cache = cache
+        self._scheduler = scheduler or default_scheduler()
 
-    def _connect_to_api(self) -> None:
+    @property
+    def max_results(self) -> int:
+        """Returns the number of vacancies a single query can return at most."""
+        return self.MAX_DEPTH // self._per_page * self._per_page
+
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
         """
-        Checks the availability of the HeadHunter API by making a request to the base URL.
-        :raises ConnectionError: If the API is not accessible.
+        Creates a session whose connection pool can serve every concurrent page request.
+
+        :param pool_size: Maximum number of connections kept open per host.
+        :return: The configured session.
         """
-        # checking API availability
-        response = requests.get(self._base_url)
-        if response.status_code != 200:
-            raise ConnectionError(f"Failed to connect to HH API. Status code: {response.status_code}")
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
 
-    def get_vacancies(self, search_query: str) -> List[Dict]:
+    def _get_page(self, search_query: str, page: int, date_from: Optional[str] = None,
+                  priority: int = PRIORITY_INTERACTIVE, date_to: Optional[str] = None) -> Dict:
         """
-        Retrieves a list of vacancies from the HeadHunter API based on the provided search query.
+        Retrieves a single page of search results; see ``_submit_page``.
 
-        :param search_query: The search query string used to find relevant job vacancies.
-        :return: A list of dictionaries containing vacancy details.
+        :return: The decoded response body with 'items' and pagination fields.
         :raises ConnectionError: If the API request fails.
         """
-        # Connect to API (internal method)
-        self._connect_to_api()
+        return self._submit_page(search_query, page, date_from, priority, date_to).result()
+
+    def _submit_page(self, search_query: str, page: int, date_from: Optional[str] = None,
+                     priority: int = PRIORITY_INTERACTIVE, date_to: Optional[str] = None) -> Future:
+        """
+        Queues the request of a single page of search results on the scheduler.
 
-        # Request parameters
+        :param search_query: The search query string used to find relevant job vacancies.
+        :param page: The zero-based page number.
+        :param date_from: If given, only vacancies published at or after this ISO 8601 time are returned.
+        :param priority: The scheduling priority of the request.
+        :param date_to: If given, only vacancies published at or before this ISO 8601 time are returned.
+        :return: A future resolving to the decoded response body with 'items' and pagination
+            fields; it fails with ConnectionError if the API request fails. Cancelling it
+            cancels the request if it has not been sent yet.
+        """
         params = {
             'text': search_query,
-            'per_page': 20  # Retrieve 20 vacancies per page
+            'per_page': self._per_page,
+            'page': page
         }
+        if date_from is not None:
+            params['date_from'] = date_from
+        if date_to is not None:
+            params['date_to'] = date_to
+        if date_from is not None or date_to is not None:
+            params['order_by'] = 'publication_time'
+        if self._cache is None:
+            return _then(self._scheduler.submit(lambda: self._send(params, None), priority), self._read_page)
+        return self._submit_cached(params, priority)
 
-        # API request
-        response = requests.get(self._base_url, params=params)
-
-        # Check the response
+    @classmethod
+    def _read_page(cls, response: requests.Response) -> Dict:
+        """
+        Decodes a page response.
+        :raises ConnectionError: If the response has an error status.
+        """
         if response.status_code != 200:
             raise ConnectionError(f"Failed to retrieve vacancies. Status code: {response.status_code}")
+        return cls._decode(response.content)
+
+    def _send(self, params: Dict, headers: Optional[Dict]) -> requests.Response:
+        """
+        Sends a single search request and records its latency and size.
+
+        :param params: The query parameters of the request.
+        :param headers: Additional request headers.
+        :return: The response.
+        """
+        with metrics.timer('api_request_seconds'):
+            response = self._session.get(self._base_url, params=params, headers=headers)
+        metrics.inc('api_requests_total', status=str(response.status_code))
+        metrics.inc('api_bytes_read_total', len(response.content))
+        return response
+
+    @staticmethod
+    def _decode(body: bytes) -> Dict:
+        """Decodes a JSON response body and records the decoding time."""
+        with metrics.timer('json_decode_seconds'):
+            return json.loads(body)
+
+    def _submit_cached(self, params: Dict, priority: int = PRIORITY_INTERACTIVE) -> Future:
+        """
+        Serves a request from the response cache, revalidating stale entries with the
+        server and storing new responses.
+
+        :param params: The query parameters of the request.
+        :param priority: The scheduling priority of the request.
+        :return: A future resolving to the decoded response body; it fails with ConnectionError
+            if the API request fails.
+        """
+        started = time.perf_counter()
+        key = self._cache.make_key(self._base_url, params)
+        entry = self._cache.get(key)
+        if entry is not None and self._cache.is_fresh(entry):
+            self._cache.record(True, time.perf_counter() - started)
+            metrics.inc('http_cache_requests_total', result='hit')
+            future = Future()
+            future.set_result(self._decode(entry.body))
+            return future
+
+        def store(response: requests.Response) -> Dict:
+            if response.status_code == 304 and entry is not None:
+                self._cache.refresh(key)
+                body = entry.body
+                metrics.inc('http_cache_requests_total', result='revalidated')
+            elif response.status_code == 200:
+                body = response.content
+                self._cache.put(key, body, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                metrics.inc('http_cache_requests_total', result='miss')
+            else:
+                raise ConnectionError(f"Failed to retrieve vacancies. Status code: {response.status_code}")
+            self._cache.record(False, time.perf_counter() - started)
+            return self._decode(body)
+
+        headers = self._cache.conditional_headers(entry)
+        return _then(self._scheduler.submit(lambda: self._send(params, headers), priority), store)
 
-        # Process the data
-        data = response.json()
-        return data['items']  # Return the list of vacancies
+    def iter_vacancies(self, search_query: str, max_pages: Optional[int] = None,
+                       date_from: Optional[str] = None, priority: int = PRIORITY_INTERACTIVE,
+                       date_to: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Streams every vacancy matching the search query.
+
+        The first ``prefetch_pages`` pages are requested at once, so the page count reported
+        by page 0 does not cost an extra round trip; pages beyond the count are discarded. The
+        remaining pages are queued on the scheduler, at most ``max_workers`` at a time, and
+        their items are yielded in page order as soon as they arrive.
+
+        :param search_query: The search query string used to find relevant job vacancies.
+        :param max_pages: Upper bound on the number of pages to fetch (all pages if omitted).
+        :param date_from: If given, only vacancies published at or after this ISO 8601 time are returned.
+        :param priority: The scheduling priority of the page requests, e.g. ``PRIORITY_BACKGROUND``
+            for backfills that should not delay interactive searches.
+        :param date_to: If given, only vacancies published at or before this ISO 8601 time are returned.
+        :return: An iterator over dictionaries containing vacancy details.
+        :raises ConnectionError: If any page request fails.
+        """
+        limit = self.MAX_DEPTH // self._per_page
+        if max_pages is not None:
+            limit = min(limit, max_pages)
+        if limit < 1:
+            return
+
+        fetch = lambda page: self._submit_page(search_query, page, date_from, priority, date_to)
+        # the first pages are requested together with page 0, before the page count is known
+        futures = deque(fetch(page) for page in range(min(self._prefetch_pages, limit)))
+        surplus = []
+        try:
+            first_page = futures.popleft().result()
+            pages = min(first_page.get('pages', 1), limit)
+            while len(futures) >= pages:
+                surplus.append(futures.pop())
+                surplus[-1].cancel()
+            next_page = len(futures) + 1
+            yield from first_page['items']
+            while futures or next_page < pages:
+                # at most max_workers pages of the query are queued or in flight
+                while next_page < pages and len(futures) < self._max_workers:
+                    futures.append(fetch(next_page))
+                    next_page += 1
+                yield from futures.popleft().result()['items']
+        finally:
+            for future in futures:
+                future.cancel()
+            # requests already sent are finished, so none outlives the iteration
+            wait([*futures, *surplus])
+
+    def get_vacancies(self, search_query: str, max_pages: Optional[int] = None) -> List[Dict]:
+        """
+        Retrieves a list of vacancies from the HeadHunter API based on the provided search query.
+
+        :param search_query: The search query string used to find relevant job vacancies.
+        :param max_pages: Upper bound on the number of pages to fetch (all pages if omitted).
+        :return: A list of dictionaries containing vacancy details.
+        :raises ConnectionError: If the API request fails.
+        """
+        return list(self.iter_vacancies(search_query, max_pages=max_pages))
+
+
+class AsyncHeadHunterAPI(AsyncJobAPI):
+    """
+    An asyncio implementation of the AsyncJobAPI interface for the HeadHunter API.
+
+    All queries share one event loop, one pooled HTTP session, a global adaptive
+    token-bucket rate limiter and a per-host concurrency cap. Page requests are queued
+    directly on the request scheduler, which sends, rate-limits and retries them on its
+    worker threads; the event loop only awaits their futures.
+    """
+
+    def __init__(self, per_page: int = HeadHunterAPI.MAX_PER_PAGE, max_per_host: int = 8,
+                 requests_per_second: float = 20.0, session: Optional[requests.Session] = None,
+                 base_url: str = 'https://api.hh.ru/vacancies', cache: Optional[ResponseCache] = None,
+                 scheduler: Optional[RequestScheduler] = None):
+        """
+        Initializes the AsyncHeadHunterAPI.
+
+        :param per_page: Number of vacancies requested per page (at most 100).
+        :param max_per_host: Maximum number of requests in flight to the same host.
+        :param requests_per_second: Global request rate shared by all queries; ignored when a
+            scheduler is given.
+        :param session: An existing session to reuse; a pooled session is created if omitted.
+        :param base_url: The vacancies search endpoint.
+        :param cache: Response cache consulted before every page request; no caching if omitted.
+        :param scheduler: Scheduler sending the page requests, e.g. ``default_scheduler()`` to share
+            it with synchronous clients; one with ``max_per_host`` workers is created if omitted.
+        """
+        if scheduler is None:
+            scheduler = RequestScheduler(max_per_host, rate_limiter=AdaptiveTokenBucket(requests_per_second))
+        self._api = HeadHunterAPI(per_page=per_page, max_workers=max_per_host, session=session,
+                                  base_url=base_url, cache=cache, scheduler=scheduler)
+        self._max_per_host = max_per_host
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def close(self) -> None:
+        """Releases the pooled connections."""
+        self._api._session.close()
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """
+        Returns the semaphore that caps concurrent requests to the host of the URL.
+        :param url: The request URL.
+        """
+        host = urlparse(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self._max_per_host)
+        return self._host_semaphores[host]
+
+    async def _get_page(self, search_query: str, page: int) -> Dict:
+        """
+        Retrieves a single page of search results without blocking the event loop.
+
+        :param search_query: The search query string.
+        :param page: The zero-based page number.
+        :return: The decoded response body.
+        :raises ConnectionError: If the API request fails.
+        """
+        async with self._host_semaphore(self._api._base_url):
+            return await asyncio.wrap_future(self._api._submit_page(search_query, page))
+
+    async def _fetch_query(self, search_query: str, queue: asyncio.Queue,
+                           max_pages: Optional[int]) -> None:
+        """
+        Fetches every page of a query and puts (query, vacancy) pairs on the queue.
+
+        :param search_query: The search query string.
+        :param queue: The queue shared by all queries of a fan-out.
+        :param max_pages: Upper bound on the number of pages to fetch (all pages if omitted).
+        """
+        first_page = await self._get_page(search_query, 0)
+        for item in first_page['items']:
+            queue.put_nowait((search_query, item))
+
+        pages = min(first_page.get('pages', 1), HeadHunterAPI.MAX_DEPTH // self._api._per_page)
+        if max_pages is not None:
+            pages = min(pages, max_pages)
+
+        async def fetch(page: int) -> None:
+            data = await self._get_page(search_query, page)
+            for vacancy in data['items']:
+                queue.put_nowait((search_query, vacancy))
+
+        await asyncio.gather(*(fetch(page) for page in range(1, pages)))
+
+    async def get_vacancies(self, search_query: str, max_pages: Optional[int] = None) -> List[Dict]:
+        """
+        Retrieves every vacancy matching the search query.
+
+        :param search_query: The search query string used to find relevant job vacancies.
+        :param max_pages: Upper bound on the number of pages to fetch (all pages if omitted).
+        :return: A list of dictionaries containing vacancy details.
+        :raises ConnectionError: If the API request fails.
+        """
+        return [vacancy async for _, vacancy in self.get_vacancies_many([search_query], max_pages)]
+
+    async def get_vacancies_many(self, search_queries: Iterable[str],
+                                 max_pages: Optional[int] = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Runs all search queries concurrently and streams their results.
+
+        :param search_queries: The search query strings.
+        :param max_pages: Upper bound on the number of pages fetched per query.
+        :return: An async iterator of (query, vacancy) pairs in arrival order.
+        :raises ConnectionError: If any request fails; the remaining queries are cancelled.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(self._fetch_query(query, queue, max_pages))
+            for query in dict.fromkeys(search_queries)
+        ]
+        pending = set(tasks)
+        try:
+            while pending or not queue.empty():
+                while not queue.empty():
+                    yield queue.get_nowait()
+                if not pending:
+                    break
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(pending | {getter}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield getter.result()
+                else:
+                    getter.cancel()
+                for task in done - {getter}:
+                    pending.discard(task)
+                    task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,271 @@
+import bisect
+import heapq
+import operator
+from array import array
+from itertools import compress, repeat
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from src.models import Vacancy
+from src.utils import salary_bounds, salary_value
+
+
+class StringPool:
+    """
+    Stores strings back to back in a single UTF-8 buffer addressed by an offset array.
+    """
+
+    __slots__ = ['_data', '_offsets']
+
+    def __init__(self):
+        """
+        Initializes an empty pool.
+        """
+        self._data = bytearray()
+        self._offsets = array('q', [0])
+
+    def __len__(self) -> int:
+        """Returns the number of strings in the pool."""
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        """Decodes the string stored at the given position."""
+        return self._data[self._offsets[index]:self._offsets[index + 1]].decode('utf-8')
+
+    def append(self, value: str) -> None:
+        """
+        Appends a string to the pool.
+        :param value: The string to append.
+        """
+        self._data += value.encode('utf-8')
+        self._offsets.append(len(self._data))
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the number of bytes used by the buffer and the offsets."""
+        return len(self._data) + self._offsets.itemsize * len(self._offsets)
+
+
+class VacancyBatch:
+    """
+    Columnar container for many vacancies.
+
+    Salaries are stored in ``array('q')`` columns with a null mask, next to the bounds
+    used for comparisons (converted to the base currency when available), currencies are
+    dictionary-encoded as ``array('H')`` codes, and titles, URLs and descriptions live in
+    contiguous string pools. Filters and sorting work on the columns with C-level
+    iterators and return row numbers; ``Vacancy`` objects are only built for the rows
+    that are actually requested.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty batch.
+        """
+        self._salary_from = array('q')
+        self._salary_to = array('q')
+        self._has_from = bytearray()
+        self._has_to = bytearray()
+        self._bound_from = array('q')
+        self._bound_to = array('q')
+        self._has_bound_from = bytearray()
+        self._has_bound_to = bytearray()
+        self._normalized = bytearray()
+        self._salary_value = array('q')
+        self._currency_codes = array('H')
+        self._currencies: List[str] = []
+        self._currency_ids: Dict[str, int] = {}
+        self._titles = StringPool()
+        self._urls = StringPool()
+        self._descriptions = StringPool()
+        self._ids: List[Optional[str]] = []
+        self._search_text: Optional[str] = None
+        self._search_offsets: List[int] = []
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> 'VacancyBatch':
+        """
+        Builds a batch from stored vacancy records.
+
+        :param records: The records to load.
+        :return: The populated batch.
+        """
+        batch = cls()
+        for record in records:
+            batch.append(record)
+        return batch
+
+    def __len__(self) -> int:
+        """Returns the number of rows in the batch."""
+        return len(self._salary_value)
+
+    def append(self, record: Dict) -> None:
+        """
+        Appends a vacancy record as a new row.
+        :param record: The vacancy record.
+        """
+        salary_from = record.get('salary_from')
+        salary_to = record.get('salary_to')
+        self._salary_from.append(salary_from or 0)
+        self._salary_to.append(salary_to or 0)
+        self._has_from.append(salary_from is not None)
+        self._has_to.append(salary_to is not None)
+        bound_from, bound_to = salary_bounds(record)
+        self._bound_from.append(bound_from or 0)
+        self._bound_to.append(bound_to or 0)
+        self._has_bound_from.append(bound_from is not None)
+        self._has_bound_to.append(bound_to is not None)
+        self._normalized.append('salary_from_norm' in record or 'salary_to_norm' in record)
+        self._salary_value.append(salary_value(record))
+
+        currency = record.get('currency') or '-'
+        code = self._currency_ids.get(currency)
+        if code is None:
+            code = self._currency_ids[currency] = len(self._currencies)
+            self._currencies.append(currency)
+        self._currency_codes.append(code)
+
+        self._titles.append(record['title'])
+        self._urls.append(record['url'])
+        self._descriptions.append(record.get('description') or '')
+        self._ids.append(record.get('id'))
+        self._search_text = None
+
+    def salary_from(self, row: int) -> Optional[int]:
+        """Returns the minimum salary of a row, or None if not specified."""
+        return self._salary_from[row] if self._has_from[row] else None
+
+    def salary_to(self, row: int) -> Optional[int]:
+        """Returns the maximum salary of a row, or None if not specified."""
+        return self._salary_to[row] if self._has_to[row] else None
+
+    def title(self, row: int) -> str:
+        """Returns the title of a row."""
+        return self._titles[row]
+
+    def currency(self, row: int) -> str:
+        """Returns the currency of a row."""
+        return self._currencies[self._currency_codes[row]]
+
+    def record(self, row: int) -> Dict:
+        """
+        Rebuilds the record of a row.
+        :param row: The row number.
+        :return: The vacancy record.
+        """
+        record = {
+            'title': self._titles[row],
+            'url': self._urls[row],
+            'salary_from': self.salary_from(row),
+            'salary_to': self.salary_to(row),
+            'currency': self.currency(row),
+            'description': self._descriptions[row]
+        }
+        if self._ids[row] is not None:
+            record['id'] = self._ids[row]
+        if self._normalized[row]:
+            record['salary_from_norm'] = self._bound_from[row] if self._has_bound_from[row] else None
+            record['salary_to_norm'] = self._bound_to[row] if self._has_bound_to[row] else None
+        return record
+
+    def vacancy(self, row: int) -> Vacancy:
+        """
+        Materializes the Vacancy of a row without re-validating it; the batch only holds
+        records that were validated when they were ingested or stored.
+
+        :param row: The row number.
+        :return: The Vacancy object.
+        """
+        return Vacancy.from_trusted_row(self.record(row))
+
+    def vacancies(self, rows: Optional[Iterable[int]] = None) -> Iterator[Vacancy]:
+        """
+        Lazily materializes Vacancy objects.
+        :param rows: The row numbers to materialize; all rows if omitted.
+        :return: An iterator over Vacancy objects.
+        """
+        for row in range(len(self)) if rows is None else rows:
+            yield self.vacancy(row)
+
+    def filter_salary(self, min_salary: int, max_salary: int) -> List[int]:
+        """
+        Selects rows whose minimum salary is >= min_salary and maximum salary is <= max_salary,
+        comparing salaries converted to the base currency where available.
+
+        :param min_salary: The lower bound for the minimum salary.
+        :param max_salary: The upper bound for the maximum salary.
+        :return: The matching row numbers in ascending order.
+        """
+        from_ok = map(operator.and_, self._has_bound_from, map(operator.ge, self._bound_from, repeat(min_salary)))
+        to_ok = map(operator.and_, self._has_bound_to, map(operator.le, self._bound_to, repeat(max_salary)))
+        return list(compress(range(len(self)), map(operator.and_, from_ok, to_ok)))
+
+    def filter_currency(self, currency: str) -> List[int]:
+        """
+        Selects rows with the given currency.
+        :param currency: The currency code, e.g. 'RUR'.
+        :return: The matching row numbers in ascending order.
+        """
+        code = self._currency_ids.get(currency)
+        if code is None:
+            return []
+        return list(compress(range(len(self)), map(operator.eq, self._currency_codes, repeat(code))))
+
+    def _build_search_text(self) -> None:
+        """Joins the lowercased descriptions into one string used for substring search."""
+        parts = []
+        offsets = []
+        position = 0
+        for row in range(len(self)):
+            text = self._descriptions[row].lower()
+            offsets.append(position)
+            parts.append(text)
+            position += len(text) + 1
+        self._search_text = '\0'.join(parts)
+        self._search_offsets = offsets
+
+    def filter_keywords(self, keywords: Iterable[str]) -> List[int]:
+        """
+        Selects rows whose description contains any of the keywords (case-insensitive).
+
+        The descriptions are scanned as one joined string with ``str.find``, and hit
+        positions are mapped back to rows with binary search.
+
+        :param keywords: The keywords to look for.
+        :return: The matching row numbers in ascending order.
+        """
+        if self._search_text is None:
+            self._build_search_text()
+        text, offsets = self._search_text, self._search_offsets
+        rows = set()
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if not keyword:
+                continue
+            position = text.find(keyword)
+            while position != -1:
+                row = bisect.bisect_right(offsets, position) - 1
+                rows.add(row)
+                next_start = offsets[row + 1] if row + 1 < len(offsets) else len(text)
+                position = text.find(keyword, next_start)
+        return sorted(rows)
+
+    def argsort_salary(self, rows: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Orders rows by descending ranking value (maximum salary, else minimum, else 0).
+
+        :param rows: The rows to order; all rows if omitted.
+        :return: The row numbers, best-paid first.
+        """
+        rows = range(len(self)) if rows is None else rows
+        return sorted(rows, key=self._salary_value.__getitem__, reverse=True)
+
+    def top(self, n: int, rows: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Selects the n best-paid rows with a bounded heap.
+
+        :param n: The number of rows to return.
+        :param rows: The rows to select from; all rows if omitted.
+        :return: The row numbers, best-paid first.
+        """
+        rows = range(len(self)) if rows is None else rows
+        return heapq.nlargest(n, rows, key=self._salary_value.__getitem__)
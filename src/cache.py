@@ -0,0 +1,197 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Dict, NamedTuple, Optional
+from urllib.parse import urlencode
+
+
+class CacheEntry(NamedTuple):
+    """
+    A cached HTTP response body with the validators needed to revalidate it.
+    """
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+
+class ResponseCache:
+    """
+    On-disk cache of HTTP response bodies keyed by normalized request parameters.
+
+    Entries are kept zlib-compressed in a single SQLite file, so the cache survives
+    restarts. Entries older than ``ttl`` are stale and must be revalidated with
+    ``If-None-Match``/``If-Modified-Since``; when the total size exceeds ``max_bytes``
+    the least recently used entries are evicted. Hit rate and latency are tracked
+    in memory and reported by ``stats``.
+    """
+
+    def __init__(self, filename: str = 'data/http_cache.sqlite3', ttl: float = 300.0,
+                 max_bytes: int = 64 * 1024 * 1024, clock: Callable[[], float] = time.time):
+        """
+        Opens (or creates) the cache file.
+
+        :param filename: The SQLite file holding the entries (':memory:' for a transient cache).
+        :param ttl: Number of seconds an entry is served without revalidation.
+        :param max_bytes: Maximum total size of the compressed bodies.
+        :param clock: Wall clock used for freshness and recency.
+        """
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._ttl = ttl
+        self._max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(filename, check_same_thread=False, isolation_level=None)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT,"
+            " stored_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'evictions': 0}
+        self._latency = {'hit': [0, 0.0], 'miss': [0, 0.0]}
+
+    @staticmethod
+    def make_key(url: str, params: Dict) -> str:
+        """
+        Builds the cache key of a request; parameter order, the case of the search text
+        and redundant whitespace do not affect the key.
+
+        :param url: The request URL without query string.
+        :param params: The query parameters.
+        :return: The cache key.
+        """
+        normalized = {}
+        for name, value in params.items():
+            if name == 'text':
+                value = ' '.join(str(value).lower().split())
+            normalized[name] = str(value)
+        query = urlencode(sorted(normalized.items()))
+        return hashlib.sha1(f"{url}?{query}".encode('utf-8')).hexdigest()
+
+    def __len__(self) -> int:
+        """Returns the number of cached entries."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Looks up an entry and marks it as recently used.
+
+        :param key: The cache key.
+        :return: The entry, fresh or stale, or None if it is not cached.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, etag, last_modified, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (self._clock(), key))
+        body, etag, last_modified, stored_at = row
+        return CacheEntry(zlib.decompress(body), etag, last_modified, stored_at)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """
+        Checks whether an entry can be served without revalidation.
+        :param entry: The cache entry.
+        """
+        return self._clock() - entry.stored_at < self._ttl
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """
+        Builds the revalidation headers for a stale entry.
+        :param entry: The cache entry, if any.
+        :return: The If-None-Match/If-Modified-Since headers the entry allows.
+        """
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def put(self, key: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """
+        Stores a response body, then evicts least recently used entries over the size limit.
+
+        :param key: The cache key.
+        :param body: The raw response body.
+        :param etag: The ETag response header, if any.
+        :param last_modified: The Last-Modified response header, if any.
+        """
+        compressed = zlib.compress(body)
+        now = self._clock()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, compressed, etag, last_modified, now, now, len(compressed))
+            )
+            self._evict()
+
+    def refresh(self, key: str) -> None:
+        """
+        Marks an entry as fresh again after a successful revalidation (304 Not Modified).
+        :param key: The cache key.
+        """
+        now = self._clock()
+        with self._lock:
+            self._connection.execute("UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                                     (now, now, key))
+            self._stats['revalidated'] += 1
+
+    def _evict(self) -> None:
+        """Deletes least recently used entries until the total size fits the limit."""
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self._max_bytes:
+            return
+        rows = self._connection.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self._max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        self._stats['evictions'] += len(evicted)
+
+    def record(self, hit: bool, seconds: float) -> None:
+        """
+        Records the outcome and latency of a cached request.
+        :param hit: Whether the request was served from the cache without a network round trip.
+        :param seconds: The time the request took.
+        """
+        with self._lock:
+            self._stats['hits' if hit else 'misses'] += 1
+            latency = self._latency['hit' if hit else 'miss']
+            latency[0] += 1
+            latency[1] += seconds
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the hit/miss counters, the hit rate and the mean latency per outcome.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            requests_total = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / requests_total if requests_total else 0.0
+            for outcome, (count, seconds) in self._latency.items():
+                stats[f'{outcome}_latency_avg'] = seconds / count if count else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        with self._lock:
+            self._connection.execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        """Closes the cache file."""
+        with self._lock:
+            self._connection.close()
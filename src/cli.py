@@ -0,0 +1,396 @@
+"""
+Non-interactive command line interface.
+
+    jobsearch fetch --query python --query golang --pages all --workers 8
+    jobsearch query --keywords python django --salary 100000-150000 --top 20 --format jsonl
+    jobsearch dedup --mode flag
+    jobsearch ingest dumps/*.jsonl --workers 8 --shard-size 200
+    jobsearch snapshot data/vacancies.json data/vacancies.snap
+    jobsearch stats --by currency keyword --keywords python golang --histogram 100000 200000 300000
+    jobsearch rank --keywords python kafka --weights salary=0.6 relevance=0.4 --top 20
+
+Results are streamed to stdout as they become available. Modules that are slow to import
+(``requests`` and the HTTP client, the ingest pipeline) are only imported by the
+subcommands that need them.
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+FORMATS = ('jsonl', 'text')
+
+
+def _pages(value: str) -> Optional[int]:
+    """Parses the --pages option: a positive number of pages or 'all'."""
+    if value == 'all':
+        return None
+    pages = int(value)
+    if pages < 1:
+        raise argparse.ArgumentTypeError("The number of pages must be positive")
+    return pages
+
+
+def _weight(value: str) -> Tuple[str, float]:
+    """Parses a --weights item, e.g. 'salary=0.5'."""
+    name, _, weight = value.partition('=')
+    try:
+        return name, float(weight)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid weight: {value}")
+
+
+def _salary_range(value: str) -> Tuple[int, int]:
+    """Parses the --salary option, e.g. '100000-150000'."""
+    try:
+        min_salary, max_salary = (int(part) for part in value.split('-'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid salary range: {value}")
+    return min_salary, max_salary
+
+
+def write_record(record: Dict, output_format: str, stream: TextIO) -> None:
+    """
+    Writes a record to the output stream and flushes it, so consumers see it immediately.
+
+    :param record: The vacancy record.
+    :param output_format: 'jsonl' for one JSON object per line, 'text' for a readable line.
+    :param stream: The output stream.
+    """
+    if output_format == 'jsonl':
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+    else:
+        salary_from, salary_to = record.get('salary_from'), record.get('salary_to')
+        if salary_from or salary_to:
+            salary = f"{salary_from or ''}-{salary_to or ''} {record.get('currency') or ''}".strip()
+        else:
+            salary = '-'
+        stream.write(f"{record['title']}\t{salary}\t{record['url']}\n")
+    stream.flush()
+
+
+def fetch_many(api, queries: List[str], max_pages: Optional[int], parallel: int) -> Iterator[Dict]:
+    """
+    Runs several search queries concurrently and yields their items in arrival order.
+
+    :param api: The HeadHunterAPI instance shared by the queries.
+    :param queries: The search queries.
+    :param max_pages: Maximum number of pages per query; all pages if None.
+    :param parallel: Maximum number of queries running at the same time.
+    :return: An iterator over the vacancy items of all queries.
+    :raises ConnectionError: If a query fails.
+    """
+    items: queue.Queue = queue.Queue(maxsize=1000)
+    pending = queue.Queue()
+    for search_query in queries:
+        pending.put(search_query)
+    done = object()
+    stop = threading.Event()
+
+    def worker() -> None:
+        try:
+            while not stop.is_set():
+                try:
+                    search_query = pending.get_nowait()
+                except queue.Empty:
+                    break
+                for item in api.iter_vacancies(search_query, max_pages=max_pages):
+                    if stop.is_set():
+                        break
+                    items.put(item)
+        except BaseException as error:
+            items.put(error)
+        finally:
+            items.put(done)
+
+    workers = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(parallel, len(queries))))]
+    for thread in workers:
+        thread.start()
+    running = len(workers)
+    try:
+        while running:
+            item = items.get()
+            if item is done:
+                running -= 1
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+        # unblock workers waiting on a full queue
+        while any(thread.is_alive() for thread in workers):
+            try:
+                items.get(timeout=0.05)
+            except queue.Empty:
+                pass
+
+
+def command_fetch(args: argparse.Namespace, stream: TextIO) -> int:
+    """Fetches vacancies for the queries, stores them and streams the accepted records."""
+    from src.api import HeadHunterAPI
+    from src.utils import parse_vacancy_item
+
+    cache = None
+    if not args.no_cache:
+        from src.cache import ResponseCache
+        cache = ResponseCache(args.cache)
+    api = HeadHunterAPI(max_workers=args.workers, base_url=args.base_url, cache=cache)
+    items = fetch_many(api, args.query, args.pages, args.parallel)
+    if args.no_save:
+        for item in items:
+            try:
+                record = parse_vacancy_item(item)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+            write_record(record, args.format, stream)
+        return 0
+
+    from src.currency import CurrencyConverter
+    from src.ingest import IngestPipeline
+    from src.storage import open_storage
+
+    storage = open_storage(args.store, legacy_filename=None)
+    converter = None if args.no_convert else CurrencyConverter()
+    detector = None
+    if args.dedup != 'off':
+        from src.dedup import NearDuplicateDetector
+        detector = NearDuplicateDetector(args.threshold).attach(storage)
+    pipeline = IngestPipeline(storage, batch_size=args.batch_size, converter=converter, upsert=args.upsert,
+                              on_error=lambda item, error: print(f"Skipped vacancy: {error}", file=sys.stderr),
+                              dedup=detector, dedup_mode='flag' if args.dedup == 'flag' else 'collapse')
+    for record, _ in pipeline.process_records(items):
+        write_record(record, args.format, stream)
+    stats = pipeline.stats
+    print(f"Fetched {stats.parse.count} vacancies, committed {stats.commit.count} in {stats.batches} batch(es), "
+          f"{stats.duplicates} near-duplicate(s).", file=sys.stderr)
+    return 0
+
+
+def read_dump_lines(filenames: List[str]) -> Iterator[bytes]:
+    """
+    Yields the non-blank lines of API dump files (JSON Lines of vacancy items or search pages)
+    as raw bytes, leaving the decoding to the ingest workers.
+    :param filenames: The dump files.
+    """
+    for filename in filenames:
+        with open(filename, 'rb') as file:
+            for line in file:
+                if line.strip():
+                    yield line
+
+
+def command_ingest(args: argparse.Namespace, stream: TextIO) -> int:
+    """Parses and validates API dumps in worker processes and stores the accepted records."""
+    from src.currency import CurrencyConverter
+    from src.ingest import IngestPipeline, shard
+    from src.storage import open_storage
+
+    storage = open_storage(args.store, legacy_filename=None)
+    converter = None if args.no_convert else CurrencyConverter()
+    detector = None
+    if args.dedup != 'off':
+        from src.dedup import NearDuplicateDetector
+        detector = NearDuplicateDetector(args.threshold).attach(storage)
+    pipeline = IngestPipeline(storage, batch_size=args.batch_size, converter=converter, upsert=args.upsert,
+                              on_error=lambda item, error: print(f"Skipped vacancy: {error}", file=sys.stderr),
+                              dedup=detector, dedup_mode='flag' if args.dedup == 'flag' else 'collapse')
+    for record in pipeline.process_parallel(shard(read_dump_lines(args.dump), args.shard_size), args.workers):
+        if args.echo:
+            write_record(record, args.format, stream)
+    stats = pipeline.stats
+    print(f"Parsed {stats.parse.count} vacancies, committed {stats.commit.count} in {stats.batches} batch(es), "
+          f"{stats.parse.errors + stats.validate.errors} rejected, {stats.duplicates} near-duplicate(s).",
+          file=sys.stderr)
+    return 0
+
+
+def command_query(args: argparse.Namespace, stream: TextIO) -> int:
+    """Queries the saved vacancies and streams the matching records."""
+    from src.storage import open_storage
+
+    storage = open_storage(args.store, legacy_filename=None)
+    records = storage.query(args.keywords, mode=args.mode, salary_range=args.salary, top_n=args.top)
+    for record in records:
+        write_record(record, args.format, stream)
+    return 0
+
+
+def command_dedup(args: argparse.Namespace, stream: TextIO) -> int:
+    """Collapses or flags near-duplicate vacancies of a store and lists them."""
+    from src.dedup import deduplicate_storage
+    from src.storage import open_storage
+
+    storage = open_storage(args.store, legacy_filename=None)
+    duplicates = deduplicate_storage(storage, args.mode, args.threshold)
+    for key, duplicate_of in duplicates.items():
+        stream.write(f"{key}\t{duplicate_of}\n")
+    stream.flush()
+    print(f"{len(duplicates)} near-duplicate(s) {'deleted' if args.mode == 'collapse' else 'flagged'}.",
+          file=sys.stderr)
+    return 0
+
+
+def command_snapshot(args: argparse.Namespace, stream: TextIO) -> int:
+    """Converts a store to a binary snapshot, or a snapshot back to a JSON store."""
+    from src.snapshot import snapshot_to_json, write_snapshot
+    from src.storage import open_storage
+
+    if args.source.endswith('.snap'):
+        count = snapshot_to_json(args.source, args.target)
+    elif not args.target.endswith('.snap'):
+        raise ValueError("Either the source or the target must be a '.snap' snapshot")
+    else:
+        count = write_snapshot(open_storage(args.source, legacy_filename=None).iter_data(), args.target)
+    print(f"Converted {count} vacancies to {args.target}.", file=sys.stderr)
+    return 0
+
+
+def command_rank(args: argparse.Namespace, stream: TextIO) -> int:
+    """Ranks the saved vacancies by the weighted score and streams the best ones."""
+    from src.ranking import RankingEngine, recency_scorer
+    from src.storage import open_storage
+
+    engine = RankingEngine(open_storage(args.store, legacy_filename=None))
+    engine.ranker.replace('recency', recency_scorer(args.half_life))
+    try:
+        engine.ranker.set_weights(**dict(args.weights))
+    except KeyError as error:
+        raise ValueError(f"Unknown scorer: {error.args[0]}")
+    for score, record in engine.rank(args.keywords, args.top, require_match=args.match):
+        write_record(dict(record, score=round(score, 6)), args.format, stream)
+    return 0
+
+
+def command_stats(args: argparse.Namespace, stream: TextIO) -> int:
+    """Streams the store once and prints salary statistics per facet group."""
+    from src.aggregate import FacetedAggregator, by_currency, by_employer
+    from src.storage import open_storage
+
+    facets = {'currency': by_currency, 'employer': by_employer}
+    if 'keyword' in args.by and not args.keywords:
+        raise ValueError("Grouping by keyword requires --keywords")
+    aggregator = FacetedAggregator({name: facets[name] for name in args.by if name in facets},
+                                   keywords=args.keywords if 'keyword' in args.by else None)
+    aggregator.add_records(open_storage(args.store, legacy_filename=None).iter_data())
+    rows = [('total', None, aggregator.total)]
+    rows += [(name, group, summary) for name in args.by
+             for group, summary in aggregator.groups(name, order_by=args.order_by, limit=args.top)]
+    for facet, group, summary in rows:
+        row = dict({'facet': facet, 'group': group}, **summary.as_dict(args.percentiles, args.histogram))
+        if args.format == 'jsonl':
+            stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+        else:
+            values = '\t'.join(f"{name}={value:.0f}" if isinstance(value, float) else f"{name}={value}"
+                               for name, value in row.items() if name not in ('facet', 'group'))
+            stream.write(f"{facet}\t{group or '-'}\t{values}\n")
+    stream.flush()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser of the command line interface."""
+    parser = argparse.ArgumentParser(prog='jobsearch', description="Search and store HeadHunter vacancies.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fetch = subparsers.add_parser('fetch', help="fetch vacancies from hh.ru and store them")
+    fetch.add_argument('--query', '-q', action='append', required=True, help="search query (repeatable)")
+    fetch.add_argument('--pages', type=_pages, default=None, help="pages per query, a number or 'all' (default)")
+    fetch.add_argument('--workers', type=int, default=8, help="pages fetched concurrently per query")
+    fetch.add_argument('--parallel', type=int, default=4, help="queries run concurrently")
+    fetch.add_argument('--store', default='data/vacancies.jsonl', help="vacancy store file")
+    fetch.add_argument('--batch-size', type=int, default=500, help="records committed per storage write")
+    fetch.add_argument('--upsert', action='store_true', help="replace stored vacancies that changed")
+    fetch.add_argument('--no-save', action='store_true', help="only print the vacancies")
+    fetch.add_argument('--no-convert', action='store_true', help="do not convert salaries to roubles")
+    fetch.add_argument('--no-cache', action='store_true', help="bypass the HTTP response cache")
+    fetch.add_argument('--cache', default='data/http_cache.sqlite3', help="HTTP response cache file")
+    fetch.add_argument('--dedup', choices=('off', 'collapse', 'flag'), default='off',
+                       help="drop or flag near-duplicates of stored vacancies")
+    fetch.add_argument('--threshold', type=float, default=0.8, help="near-duplicate similarity threshold")
+    fetch.add_argument('--base-url', default='https://api.hh.ru/vacancies', help="vacancies search endpoint")
+    fetch.add_argument('--format', choices=FORMATS, default='jsonl', help="output format")
+    fetch.set_defaults(handler=command_fetch)
+
+    ingest = subparsers.add_parser('ingest', help="store vacancies from API dump files using worker processes")
+    ingest.add_argument('dump', nargs='+', help="JSON Lines dump of vacancy items or search result pages")
+    ingest.add_argument('--workers', type=int, default=None, help="parse worker processes (default: CPU count)")
+    ingest.add_argument('--shard-size', type=int, default=100, help="dump lines per worker task")
+    ingest.add_argument('--store', default='data/vacancies.jsonl', help="vacancy store file")
+    ingest.add_argument('--batch-size', type=int, default=500, help="records committed per storage write")
+    ingest.add_argument('--upsert', action='store_true', help="replace stored vacancies that changed")
+    ingest.add_argument('--no-convert', action='store_true', help="do not convert salaries to roubles")
+    ingest.add_argument('--dedup', choices=('off', 'collapse', 'flag'), default='off',
+                        help="drop or flag near-duplicates of stored vacancies")
+    ingest.add_argument('--threshold', type=float, default=0.8, help="near-duplicate similarity threshold")
+    ingest.add_argument('--echo', action='store_true', help="also print the stored records")
+    ingest.add_argument('--format', choices=FORMATS, default='jsonl', help="output format of --echo")
+    ingest.set_defaults(handler=command_ingest)
+
+    query = subparsers.add_parser('query', help="query the saved vacancies")
+    query.add_argument('--keywords', '-k', nargs='*', default=[], help="keywords to match")
+    query.add_argument('--mode', choices=('any', 'all'), default='any', help="match any or all keywords")
+    query.add_argument('--salary', type=_salary_range, default=None, help="salary range in RUR, e.g. 100000-150000")
+    query.add_argument('--top', type=int, default=None, help="only the N best-paid vacancies")
+    query.add_argument('--store', default='data/vacancies.jsonl', help="vacancy store file")
+    query.add_argument('--format', choices=FORMATS, default='jsonl', help="output format")
+    query.set_defaults(handler=command_query)
+
+    dedup = subparsers.add_parser('dedup', help="collapse or flag near-duplicate saved vacancies")
+    dedup.add_argument('--mode', choices=('collapse', 'flag'), default='flag', help="delete or flag duplicates")
+    dedup.add_argument('--threshold', type=float, default=0.8, help="near-duplicate similarity threshold")
+    dedup.add_argument('--store', default='data/vacancies.jsonl', help="vacancy store file")
+    dedup.set_defaults(handler=command_dedup)
+
+    rank = subparsers.add_parser('rank', help="rank the saved vacancies by salary, relevance and recency")
+    rank.add_argument('--keywords', '-k', nargs='*', default=[], help="keywords scored with BM25")
+    rank.add_argument('--weights', type=_weight, nargs='+', default=[],
+                      help="scorer weights, e.g. salary=0.5 relevance=0.3 recency=0.2")
+    rank.add_argument('--half-life', type=float, default=14.0, help="days after which recency halves")
+    rank.add_argument('--match', action='store_true', help="only vacancies containing a keyword")
+    rank.add_argument('--top', type=int, default=20, help="number of vacancies")
+    rank.add_argument('--store', default='data/vacancies.jsonl', help="vacancy store file")
+    rank.add_argument('--format', choices=FORMATS, default='jsonl', help="output format")
+    rank.set_defaults(handler=command_rank)
+
+    stats = subparsers.add_parser('stats', help="salary statistics of the saved vacancies per group")
+    stats.add_argument('--by', nargs='+', choices=('currency', 'employer', 'keyword'), default=['currency'],
+                       help="facets to group by")
+    stats.add_argument('--keywords', '-k', nargs='*', default=[], help="keywords of the keyword facet")
+    stats.add_argument('--percentiles', type=float, nargs='*', default=[50, 90], help="salary percentiles")
+    stats.add_argument('--histogram', type=float, nargs='+', default=None, help="salary histogram bucket bounds")
+    stats.add_argument('--order-by', choices=('count', 'mean', 'max'), default='count', help="group order")
+    stats.add_argument('--top', type=int, default=None, help="only the N first groups per facet")
+    stats.add_argument('--store', default='data/vacancies.jsonl', help="vacancy store file")
+    stats.add_argument('--format', choices=FORMATS, default='jsonl', help="output format")
+    stats.set_defaults(handler=command_stats)
+
+    snapshot = subparsers.add_parser('snapshot', help="convert a store to a binary snapshot or a snapshot to JSON")
+    snapshot.add_argument('source', help="store file, or a '.snap' snapshot to convert back to JSON")
+    snapshot.add_argument('target', help="snapshot file, or the JSON file for a '.snap' source")
+    snapshot.set_defaults(handler=command_snapshot)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, stream: Optional[TextIO] = None) -> int:
+    """
+    Runs the command line interface.
+    :param argv: The arguments; sys.argv is used if omitted.
+    :param stream: The output stream; stdout if omitted.
+    :return: The exit status.
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args, stream or sys.stdout)
+    except BrokenPipeError:
+        # the consumer (e.g. `head`) stopped reading
+        return 0
+    except (ConnectionError, ValueError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
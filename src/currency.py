@@ -0,0 +1,165 @@
+import json
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from src.metrics import metrics
+
+
+class CurrencyConverter:
+    """
+    Converts salaries to a base currency using a cached exchange-rate table.
+
+    Rates use the convention of the hh.ru dictionaries endpoint: the number of units of a
+    currency per one rouble. The table is read from a local file or fetched from
+    hh.ru, written back to the file, and kept in memory for ``ttl`` seconds. After a failed
+    fetch the last known table is served until ``retry_interval`` seconds have passed.
+    """
+
+    DICTIONARIES_URL = 'https://api.hh.ru/dictionaries'
+
+    def __init__(self, base_currency: str = 'RUR', rates_file: Optional[str] = 'data/currency_rates.json',
+                 ttl: float = 24 * 60 * 60, fetch_remote: bool = True,
+                 clock: Callable[[], float] = time.time, retry_interval: float = 5 * 60,
+                 timeout: float = 10.0):
+        """
+        Initializes the converter. Rates are loaded lazily on first use.
+
+        :param base_currency: The currency salaries are converted to.
+        :param rates_file: File the rate table is read from and cached to (None disables it).
+        :param ttl: Number of seconds a loaded rate table stays valid.
+        :param fetch_remote: Whether to fetch rates from hh.ru when the file is missing or stale.
+        :param clock: Wall clock used to check the age of the rate table.
+        :param retry_interval: Number of seconds to wait after a failed fetch before trying again.
+        :param timeout: Timeout of the rate request in seconds.
+        """
+        self._base_currency = base_currency
+        self._rates_file = rates_file
+        self._ttl = ttl
+        self._fetch_remote = fetch_remote
+        self._clock = clock
+        self._rates: Dict[str, float] = {}
+        self._fetched_at: Optional[float] = None
+        self._retry_interval = retry_interval
+        self._timeout = timeout
+        self._failed_at: Optional[float] = None
+
+    @property
+    def base_currency(self) -> str:
+        """Returns the currency salaries are converted to."""
+        return self._base_currency
+
+    def set_rates(self, rates: Dict[str, float], fetched_at: Optional[float] = None) -> None:
+        """
+        Replaces the rate table.
+
+        :param rates: Units of each currency per one rouble.
+        :param fetched_at: Time the rates were obtained; defaults to now.
+        """
+        self._rates = dict(rates)
+        self._fetched_at = self._clock() if fetched_at is None else fetched_at
+
+    def _is_fresh(self, fetched_at: Optional[float]) -> bool:
+        """Checks whether a table obtained at the given time is still within the TTL."""
+        return fetched_at is not None and self._clock() - fetched_at < self._ttl
+
+    def _read_file(self) -> Optional[Tuple[Dict[str, float], float]]:
+        """
+        Reads the cached rate table.
+        :return: The rates and the time they were fetched, or None if the file is missing.
+        """
+        if not self._rates_file or not os.path.exists(self._rates_file):
+            return None
+        with open(self._rates_file, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        return data['rates'], data.get('fetched_at', os.path.getmtime(self._rates_file))
+
+    def _write_file(self) -> None:
+        """Caches the current rate table to the rates file."""
+        if not self._rates_file:
+            return
+        directory = os.path.dirname(self._rates_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self._rates_file, 'w', encoding='utf-8') as file:
+            json.dump({'fetched_at': self._fetched_at, 'rates': self._rates}, file, indent=4)
+
+    def fetch_rates(self) -> Dict[str, float]:
+        """
+        Fetches the current rates from the hh.ru dictionaries endpoint.
+        :return: Units of each currency per one rouble.
+        :raises ConnectionError: If the request fails.
+        """
+        import requests
+
+        response = requests.get(self.DICTIONARIES_URL, timeout=self._timeout)
+        if response.status_code != 200:
+            raise ConnectionError(f"Failed to retrieve currency rates. Status code: {response.status_code}")
+        return {item['code']: item['rate'] for item in response.json()['currency']}
+
+    def rates(self) -> Dict[str, float]:
+        """
+        Returns the rate table, reloading it when it is older than the TTL.
+
+        A stale file is refreshed from hh.ru when remote fetching is enabled; if that
+        fails, the stale table is used rather than no table at all, and no new attempt is
+        made for ``retry_interval`` seconds.
+
+        :return: Units of each currency per one rouble.
+        """
+        if self._is_fresh(self._fetched_at):
+            return self._rates
+        if self._failed_at is not None and self._clock() - self._failed_at < self._retry_interval:
+            return self._rates
+        cached = self._read_file()
+        if cached is not None:
+            self.set_rates(*cached)
+            if self._is_fresh(self._fetched_at):
+                return self._rates
+        if self._fetch_remote:
+            try:
+                self.set_rates(self.fetch_rates())
+                self._failed_at = None
+                self._write_file()
+            except (ConnectionError, OSError, ValueError, KeyError):
+                self._failed_at = self._clock()
+        return self._rates
+
+    def convert(self, amount: Optional[int], currency: str) -> Optional[int]:
+        """
+        Converts an amount to the base currency.
+
+        :param amount: The amount, or None if not specified.
+        :param currency: The currency of the amount.
+        :return: The rounded amount in the base currency, or None if the amount is not
+                 specified or the currency is unknown.
+        """
+        if amount is None:
+            return None
+        if currency == self._base_currency:
+            return amount
+        rates = self.rates()
+        rate = rates.get(currency)
+        base_rate = rates.get(self._base_currency)
+        if not rate or not base_rate:
+            return None
+        return round(amount / rate * base_rate)
+
+    def normalize_record(self, record: Dict) -> Dict:
+        """
+        Adds the salary bounds converted to the base currency to a vacancy record.
+
+        Both are None when the currency has no known rate, so the salary is left out of
+        comparisons instead of being compared in the wrong currency; such records are
+        counted in the 'salary_conversions_failed_total' metric.
+
+        :param record: The vacancy record; it is updated in place.
+        :return: The same record with 'salary_from_norm' and 'salary_to_norm' set.
+        """
+        currency = record.get('currency') or self._base_currency
+        record['salary_from_norm'] = self.convert(record.get('salary_from'), currency)
+        record['salary_to_norm'] = self.convert(record.get('salary_to'), currency)
+        if record['salary_from_norm'] is None and record['salary_to_norm'] is None and \
+                (record.get('salary_from') is not None or record.get('salary_to') is not None):
+            metrics.inc('salary_conversions_failed_total', currency=currency)
+        return record
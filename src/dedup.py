@@ -0,0 +1,303 @@
+import random
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.storage import FileStorage, StorageListener
+from src.utils import tokenize, vacancy_key
+
+# Mersenne prime larger than every 32-bit shingle hash
+_PRIME = (1 << 61) - 1
+
+Signature = Tuple[int, ...]
+
+
+def shingles(text: str, size: int = 2) -> Set[int]:
+    """
+    Returns the hashed word shingles (runs of ``size`` consecutive tokens) of a text.
+    Texts shorter than a shingle yield a single shingle of all their tokens.
+
+    :param text: The text, markup is ignored.
+    :param size: The number of tokens per shingle.
+    :return: The set of 32-bit shingle hashes.
+    """
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return {zlib.crc32(' '.join(tokens).encode('utf-8'))} if tokens else set()
+    return {zlib.crc32(' '.join(tokens[idx:idx + size]).encode('utf-8')) for idx in range(len(tokens) - size + 1)}
+
+
+def similarity(first: Signature, second: Signature) -> float:
+    """
+    Estimates the Jaccard similarity of two documents from their MinHash signatures.
+    :return: The fraction of equal signature components.
+    """
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures with universal hash functions ``(a * x + b) mod p``.
+    The coefficients are derived from a seed, so signatures are comparable across runs
+    and processes.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        """
+        Initializes the hash functions.
+        :param num_perm: The number of hash functions, i.e. the signature length.
+        :param seed: Seed of the coefficients.
+        """
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._coefficients = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, hashes: Iterable[int]) -> Signature:
+        """
+        Computes the signature of a set of shingle hashes.
+        :param hashes: The shingle hashes.
+        :return: The signature; all components are equal to the prime for an empty set.
+        """
+        hashes = list(hashes)
+        if not hashes:
+            return (_PRIME,) * self.num_perm
+        return tuple(min((a * value + b) % _PRIME for value in hashes) for a, b in self._coefficients)
+
+
+class LSHIndex:
+    """
+    Locality-sensitive hashing index over MinHash signatures.
+
+    Signatures are cut into ``bands`` bands of equal width; documents sharing all
+    components of at least one band land in the same bucket and become candidates,
+    so lookups only compare against a small fraction of the indexed documents.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        """
+        Initializes an empty index.
+        :param num_perm: The signature length.
+        :param bands: The number of bands; must divide the signature length.
+        :raises ValueError: If the bands do not divide the signature length.
+        """
+        if num_perm % bands:
+            raise ValueError("The number of bands must divide the signature length")
+        self._rows = num_perm // bands
+        self._buckets: List[Dict[Signature, Set[str]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[str, Signature] = {}
+
+    def __len__(self) -> int:
+        """Returns the number of indexed documents."""
+        return len(self._signatures)
+
+    def __contains__(self, key: str) -> bool:
+        """Checks whether a document is indexed."""
+        return key in self._signatures
+
+    def _bands(self, signature: Signature) -> Iterable[Tuple[int, Signature]]:
+        """Yields (band number, band) pairs of a signature."""
+        rows = self._rows
+        for band in range(len(self._buckets)):
+            yield band, signature[band * rows:(band + 1) * rows]
+
+    def add(self, key: str, signature: Signature) -> None:
+        """
+        Indexes a signature, replacing any previous one with the same key.
+        :param key: The vacancy key.
+        :param signature: The MinHash signature.
+        """
+        if key in self._signatures:
+            self.remove(key)
+        self._signatures[key] = signature
+        for band, values in self._bands(signature):
+            self._buckets[band].setdefault(values, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a document from the index.
+        :param key: The vacancy key.
+        """
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, values in self._bands(signature):
+            bucket = self._buckets[band][values]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[band][values]
+
+    def candidates(self, signature: Signature) -> Set[str]:
+        """
+        Returns the keys sharing at least one band with the signature.
+        :param signature: The MinHash signature.
+        :return: The candidate keys.
+        """
+        result = set()
+        for band, values in self._bands(signature):
+            bucket = self._buckets[band].get(values)
+            if bucket:
+                result.update(bucket)
+        return result
+
+    def query(self, signature: Signature, threshold: float) -> List[Tuple[float, str]]:
+        """
+        Finds indexed documents whose estimated similarity reaches the threshold.
+        :param signature: The MinHash signature.
+        :param threshold: The minimum estimated Jaccard similarity.
+        :return: (similarity, key) pairs, most similar first.
+        """
+        matches = []
+        for key in self.candidates(signature):
+            score = similarity(signature, self._signatures[key])
+            if score >= threshold:
+                matches.append((score, key))
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return matches
+
+
+def _employer(record: Dict) -> str:
+    """Returns the normalized employer name of a record; empty if it is not known."""
+    return ' '.join((record.get('employer') or '').lower().split())
+
+
+class NearDuplicateDetector(StorageListener):
+    """
+    Detects reposted vacancies: records of the same employer whose title and description
+    shingles are nearly identical to an already known record under a different key.
+    Identical texts of different employers (e.g. agency templates) are not duplicates.
+
+    The first record seen of a group stays canonical; later ones are reported as its
+    duplicates. Attached to a storage, the detector follows added and deleted records.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16, shingle_size: int = 2,
+                 seed: int = 1):
+        """
+        Initializes an empty detector.
+
+        :param threshold: Minimum estimated Jaccard similarity of near-duplicates.
+        :param num_perm: The MinHash signature length.
+        :param bands: The number of LSH bands; more bands find less similar candidates.
+        :param shingle_size: The number of tokens per shingle.
+        :param seed: Seed of the MinHash functions.
+        """
+        self.threshold = threshold
+        self._shingle_size = shingle_size
+        self._hasher = MinHasher(num_perm, seed)
+        self._index = LSHIndex(num_perm, bands)
+        self._employers: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        """Returns the number of known records."""
+        return len(self._index)
+
+    def signature(self, record: Dict) -> Signature:
+        """
+        Computes the MinHash signature of a record's title and description.
+        :param record: The vacancy record.
+        :return: The signature.
+        """
+        text = f"{record.get('title') or ''} {record.get('description') or ''}"
+        return self._hasher.signature(shingles(text, self._shingle_size))
+
+    def find(self, record: Dict, signature: Optional[Signature] = None) -> Optional[str]:
+        """
+        Finds the known record a record duplicates.
+        :param record: The vacancy record.
+        :param signature: The record's signature, if already computed.
+        :return: The key of the most similar known record of the same employer with a
+            different key, or None.
+        """
+        key = vacancy_key(record)
+        employer = _employer(record)
+        for _, match in self._index.query(signature or self.signature(record), self.threshold):
+            if match != key and self._employers[match] == employer:
+                return match
+        return None
+
+    def add(self, record: Dict, signature: Optional[Signature] = None) -> None:
+        """
+        Remembers a record.
+        :param record: The vacancy record.
+        :param signature: The record's signature, if already computed.
+        """
+        key = vacancy_key(record)
+        self._index.add(key, signature or self.signature(record))
+        self._employers[key] = _employer(record)
+
+    def check(self, record: Dict) -> Optional[str]:
+        """
+        Finds the record a record duplicates, remembering it if it is not a duplicate.
+        :param record: The vacancy record.
+        :return: The key of the canonical record, or None if the record is new.
+        """
+        signature = self.signature(record)
+        duplicate_of = self.find(record, signature)
+        if duplicate_of is None:
+            self.add(record, signature)
+        return duplicate_of
+
+    def add_records(self, records: Iterable[Dict]) -> None:
+        """
+        Remembers stored records.
+        :param records: The records.
+        """
+        for record in records:
+            self.add(record)
+
+    def on_records_added(self, records: List[Dict]) -> None:
+        """Remembers records added to the attached storage, except flagged duplicates."""
+        self.add_records(record for record in records if not record.get('duplicate_of'))
+
+    def on_records_deleted(self, keys: List[str]) -> None:
+        """Forgets records deleted from the attached storage."""
+        for key in keys:
+            self._index.remove(key)
+            self._employers.pop(key, None)
+
+    def attach(self, storage: FileStorage) -> 'NearDuplicateDetector':
+        """
+        Remembers the current contents of a storage and follows its changes.
+        :param storage: The storage to follow.
+        :return: The detector itself.
+        """
+        self.on_records_added(list(storage.iter_data()))
+        storage.add_listener(self)
+        return self
+
+    def find_duplicates(self, records: Iterable[Dict]) -> Dict[str, str]:
+        """
+        Groups records into near-duplicates in one pass.
+        :param records: The records, in the order of precedence.
+        :return: A mapping of every duplicate's key to its canonical record's key.
+        """
+        duplicates = {}
+        for record in records:
+            duplicate_of = self.check(record)
+            if duplicate_of is not None:
+                duplicates[vacancy_key(record)] = duplicate_of
+        return duplicates
+
+
+def deduplicate_storage(storage: FileStorage, mode: str = 'collapse', threshold: float = 0.8) -> Dict[str, str]:
+    """
+    Finds near-duplicates in a store, in storage order, and collapses or flags them.
+
+    :param storage: The store.
+    :param mode: 'collapse' deletes the duplicates; 'flag' stores the canonical record's key
+        in their 'duplicate_of' field.
+    :param threshold: Minimum estimated Jaccard similarity of near-duplicates.
+    :return: A mapping of every duplicate's key to its canonical record's key.
+    :raises ValueError: If the mode is unknown.
+    """
+    if mode not in ('collapse', 'flag'):
+        raise ValueError(f"Unknown deduplication mode: {mode}")
+    detector = NearDuplicateDetector(threshold)
+    duplicates = detector.find_duplicates(record for record in storage.iter_data()
+                                          if not record.get('duplicate_of'))
+    if duplicates:
+        if mode == 'collapse':
+            storage.delete_many(duplicates)
+        else:
+            storage.upsert_many([dict(record, duplicate_of=duplicates[vacancy_key(record)])
+                                 for record in storage.read_many(duplicates)])
+    return duplicates
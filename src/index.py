@@ -0,0 +1,348 @@
+import bisect
+import heapq
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.storage import FileStorage, StorageListener
+from src.utils import salary_bounds, salary_value, tokenize, vacancy_key
+
+
+class KeywordIndex(StorageListener):
+    """
+    Inverted index over vacancy titles and descriptions.
+
+    Maps every token to the set of vacancy keys containing it and keeps a sorted list of
+    tokens, rebuilt lazily after changes, for prefix lookups. Attached to a storage, it is
+    updated incrementally whenever records are added or deleted.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty index.
+        """
+        self._postings: Dict[str, Set[str]] = {}
+        self._documents: Dict[str, frozenset] = {}
+        self._terms: Optional[List[str]] = []
+
+    def __len__(self) -> int:
+        """Returns the number of indexed records."""
+        return len(self._documents)
+
+    @staticmethod
+    def _record_text(record: Dict) -> str:
+        """Returns the text of a record that is indexed."""
+        return f"{record.get('title') or ''} {record.get('description') or ''}"
+
+    def add(self, key: str, text: str) -> None:
+        """
+        Indexes a document, replacing any previous version with the same key.
+
+        :param key: The vacancy key.
+        :param text: The text to index.
+        """
+        if key in self._documents:
+            self.remove(key)
+        tokens = frozenset(tokenize(text))
+        self._documents[key] = tokens
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                self._terms = None
+            postings.add(key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a document from the index.
+        :param key: The vacancy key.
+        """
+        tokens = self._documents.pop(key, None)
+        if tokens is None:
+            return
+        for token in tokens:
+            postings = self._postings[token]
+            postings.discard(key)
+            if not postings:
+                del self._postings[token]
+                self._terms = None
+
+    def add_records(self, records: Iterable[Dict]) -> None:
+        """
+        Indexes stored vacancy records.
+        :param records: The records to index.
+        """
+        for record in records:
+            self.add(vacancy_key(record), self._record_text(record))
+
+    def on_records_added(self, records: List[Dict]) -> None:
+        """Indexes records added to the attached storage."""
+        self.add_records(records)
+
+    def on_records_deleted(self, keys: List[str]) -> None:
+        """Removes records deleted from the attached storage."""
+        for key in keys:
+            self.remove(key)
+
+    def attach(self, storage: FileStorage) -> 'KeywordIndex':
+        """
+        Indexes the current contents of a storage and keeps the index in sync with it.
+
+        :param storage: The storage to follow.
+        :return: The index itself.
+        """
+        self.add_records(storage.read_data())
+        storage.add_listener(self)
+        return self
+
+    def _match_term(self, term: str, prefix: bool) -> Set[str]:
+        """
+        Returns the keys of documents containing the term (or any term starting with it).
+
+        :param term: A single token.
+        :param prefix: Whether to treat the term as a prefix.
+        """
+        if not prefix:
+            return self._postings.get(term, set())
+        if self._terms is None:
+            self._terms = sorted(self._postings)
+        start = bisect.bisect_left(self._terms, term)
+        end = bisect.bisect_left(self._terms, term + '\uffff', lo=start)
+        if end - start == 1:
+            return self._postings[self._terms[start]]
+        matched: Set[str] = set()
+        for index in range(start, end):
+            matched |= self._postings[self._terms[index]]
+        return matched
+
+    def _match_keyword(self, keyword: str, prefix: bool) -> Set[str]:
+        """
+        Returns the keys of documents containing every token of a keyword.
+
+        :param keyword: A keyword, possibly made of several tokens.
+        :param prefix: Whether the last token of the keyword is a prefix.
+        """
+        tokens = tokenize(keyword)
+        if not tokens:
+            return set()
+        sets = [self._match_term(token, prefix and idx == len(tokens) - 1) for idx, token in enumerate(tokens)]
+        return set.intersection(*sorted(sets, key=len))
+
+    def search(self, keywords: Iterable[str], mode: str = 'any', prefix: bool = False) -> Set[str]:
+        """
+        Finds the records matching the keywords.
+
+        :param keywords: The keywords to look for.
+        :param mode: 'any' to match records containing at least one keyword (OR),
+                     'all' to match records containing every keyword (AND).
+        :param prefix: Whether keywords also match tokens they are a prefix of.
+        :return: The set of matching vacancy keys.
+        :raises ValueError: If the mode is unknown.
+        """
+        if mode not in ('any', 'all'):
+            raise ValueError(f"Unknown search mode: {mode}")
+        sets = [self._match_keyword(keyword, prefix) for keyword in keywords]
+        if not sets:
+            return set()
+        if mode == 'any':
+            return set().union(*sets)
+        return set.intersection(*sorted(sets, key=len))
+
+    def save(self, filename: str) -> None:
+        """
+        Persists the index to a JSON file.
+        :param filename: The name of the file to write.
+        """
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        documents = {key: sorted(tokens) for key, tokens in self._documents.items()}
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(documents, file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, filename: str) -> 'KeywordIndex':
+        """
+        Loads an index previously written by ``save``.
+
+        :param filename: The name of the file to read.
+        :return: The loaded index.
+        """
+        with open(filename, 'r', encoding='utf-8') as file:
+            documents = json.load(file)
+        index = cls()
+        for key, tokens in documents.items():
+            index.add(key, ' '.join(tokens))
+        return index
+
+
+def top_n(items: Iterable[Any], n: int, key: Callable[[Any], Any]) -> List[Any]:
+    """
+    Selects the n largest items with a bounded heap instead of sorting the whole collection.
+
+    Equivalent to ``sorted(items, key=key, reverse=True)[:n]`` but runs in O(len(items) log n)
+    and consumes the items as a stream.
+
+    :param items: The items to select from.
+    :param n: The number of items to return.
+    :param key: The function computing the ranking value of an item.
+    :return: The n largest items in descending order.
+    """
+    return heapq.nlargest(n, items, key=key)
+
+
+class SalaryIndex(StorageListener):
+    """
+    Sorted-array index over salaries of stored vacancies.
+
+    Keeps (value, key) pairs sorted by minimum salary, by maximum salary and by ranking
+    value, in the base currency when the records are normalized (see ``salary_bounds``).
+    Salary range queries are answered with binary searches and the top-N vacancies are
+    read from the end of an array. Attached to a storage, it is updated incrementally
+    whenever records are added or deleted.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty index.
+        """
+        self._salaries: Dict[str, Tuple[Optional[int], Optional[int], int]] = {}
+        self._by_from: List[Tuple[int, str]] = []
+        self._by_to: List[Tuple[int, str]] = []
+        self._by_value: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        """Returns the number of indexed records."""
+        return len(self._salaries)
+
+    def add(self, key: str, salary_from: Optional[int], salary_to: Optional[int]) -> None:
+        """
+        Indexes the salary of a record, replacing any previous version with the same key.
+
+        :param key: The vacancy key.
+        :param salary_from: The minimum salary, if specified.
+        :param salary_to: The maximum salary, if specified.
+        """
+        if key in self._salaries:
+            self.remove(key)
+        value = salary_value({'salary_from': salary_from, 'salary_to': salary_to})
+        self._salaries[key] = (salary_from, salary_to, value)
+        if salary_from is not None:
+            bisect.insort(self._by_from, (salary_from, key))
+        if salary_to is not None:
+            bisect.insort(self._by_to, (salary_to, key))
+        bisect.insort(self._by_value, (value, key))
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a record from the index.
+        :param key: The vacancy key.
+        """
+        salaries = self._salaries.pop(key, None)
+        if salaries is None:
+            return
+        salary_from, salary_to, value = salaries
+        for array, item_value in ((self._by_from, salary_from), (self._by_to, salary_to), (self._by_value, value)):
+            if item_value is not None:
+                del array[bisect.bisect_left(array, (item_value, key))]
+
+    def add_records(self, records: Iterable[Dict]) -> None:
+        """
+        Indexes stored vacancy records, sorting the arrays once for the whole batch.
+        :param records: The records to index.
+        """
+        latest = {vacancy_key(record): record for record in records}
+        if len(latest) < 16:
+            for key, record in latest.items():
+                self.add(key, *salary_bounds(record))
+            return
+        for key in latest:
+            self.remove(key)
+        for key, record in latest.items():
+            salary_from, salary_to = salary_bounds(record)
+            value = salary_value(record)
+            self._salaries[key] = (salary_from, salary_to, value)
+            if salary_from is not None:
+                self._by_from.append((salary_from, key))
+            if salary_to is not None:
+                self._by_to.append((salary_to, key))
+            self._by_value.append((value, key))
+        self._by_from.sort()
+        self._by_to.sort()
+        self._by_value.sort()
+
+    def on_records_added(self, records: List[Dict]) -> None:
+        """Indexes records added to the attached storage."""
+        self.add_records(records)
+
+    def on_records_deleted(self, keys: List[str]) -> None:
+        """Removes records deleted from the attached storage."""
+        for key in keys:
+            self.remove(key)
+
+    def attach(self, storage: FileStorage) -> 'SalaryIndex':
+        """
+        Indexes the current contents of a storage and keeps the index in sync with it.
+
+        :param storage: The storage to follow.
+        :return: The index itself.
+        """
+        self.add_records(storage.read_data())
+        storage.add_listener(self)
+        return self
+
+    def range(self, min_salary: int, max_salary: int) -> Set[str]:
+        """
+        Finds records offering at least min_salary and at most max_salary, i.e. whose
+        minimum salary is >= min_salary and whose maximum salary is <= max_salary.
+
+        Both bounds are located with binary searches; only the smaller of the two
+        candidate slices is checked against the other bound.
+
+        :param min_salary: The lower bound for the minimum salary.
+        :param max_salary: The upper bound for the maximum salary.
+        :return: The set of matching vacancy keys.
+        """
+        from_start = bisect.bisect_left(self._by_from, (min_salary, ''))
+        to_end = bisect.bisect_left(self._by_to, (max_salary + 1, ''))
+        if len(self._by_from) - from_start <= to_end:
+            return {
+                key for _, key in self._by_from[from_start:]
+                if self._salaries[key][1] is not None and self._salaries[key][1] <= max_salary
+            }
+        return {
+            key for _, key in self._by_to[:to_end]
+            if self._salaries[key][0] is not None and self._salaries[key][0] >= min_salary
+        }
+
+    def iter_descending(self, keys: Optional[Set[str]] = None) -> Iterator[str]:
+        """
+        Streams vacancy keys from the highest to the lowest ranking value.
+
+        :param keys: If given, only these keys are yielded.
+        :return: An iterator over vacancy keys.
+        """
+        for _, key in reversed(self._by_value):
+            if keys is None or key in keys:
+                yield key
+
+    def top(self, n: int, keys: Optional[Set[str]] = None) -> List[str]:
+        """
+        Returns the keys of the n best-paid records, optionally restricted to a set of keys.
+
+        When the restriction is much smaller than the index, the candidates are ranked with
+        a bounded heap; otherwise the sorted array is walked from its end.
+
+        :param n: The number of keys to return.
+        :param keys: If given, only these keys are considered.
+        :return: The keys in descending order of ranking value.
+        """
+        if keys is not None and len(keys) * 8 < len(self._salaries):
+            candidates = (key for key in keys if key in self._salaries)
+            return top_n(candidates, n, key=lambda key: (self._salaries[key][2], key))
+        result = []
+        for key in self.iter_descending(keys):
+            if len(result) == n:
+                break
+            result.append(key)
+        return result
@@ -0,0 +1,385 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from src.currency import CurrencyConverter
+from src.dedup import NearDuplicateDetector
+from src.models import Vacancy
+from src.storage import FileStorage
+from src.utils import parse_vacancy_item, validate_url
+
+
+class StageStats:
+    """
+    Throughput counters of one pipeline stage.
+    """
+
+    __slots__ = ['count', 'errors', 'seconds']
+
+    def __init__(self):
+        """
+        Initializes the counters to zero.
+        """
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+    @property
+    def per_second(self) -> float:
+        """Returns the number of records processed per second of stage time."""
+        return self.count / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """Returns the counters as a dictionary."""
+        return {'count': self.count, 'errors': self.errors, 'seconds': self.seconds,
+                'per_second': self.per_second}
+
+
+class IngestStats:
+    """
+    Throughput counters of the parse, validate and commit stages.
+    """
+
+    STAGES = ('parse', 'validate', 'commit')
+
+    def __init__(self):
+        """
+        Initializes the counters of every stage.
+        """
+        self.parse = StageStats()
+        self.validate = StageStats()
+        self.commit = StageStats()
+        self.batches = 0
+        self.duplicates = 0
+
+    def as_dict(self) -> Dict:
+        """Returns the counters of every stage, the number of committed batches and of near-duplicates."""
+        result = {stage: getattr(self, stage).as_dict() for stage in self.STAGES}
+        result['batches'] = self.batches
+        result['duplicates'] = self.duplicates
+        return result
+
+
+class ShardResult(NamedTuple):
+    """
+    Compact result of a worker for one shard: accepted records as rows of ``fields``
+    values in input order, rejected items and the stage counters.
+    """
+    fields: Tuple[str, ...]
+    rows: List[Tuple]
+    errors: List[Tuple[str, Dict, Exception]]
+    parsed: int
+    parse_seconds: float
+    validated: int
+    validate_seconds: float
+
+
+# converter of a worker process, set up once by _init_worker
+_worker_converter: Optional[CurrencyConverter] = None
+
+
+def _init_worker(base_currency: str, rates: Optional[Dict[str, float]]) -> None:
+    """Sets up a worker process with a copy of the writer's currency rates."""
+    global _worker_converter
+    if rates is not None:
+        _worker_converter = CurrencyConverter(base_currency, rates_file=None, fetch_remote=False)
+        _worker_converter.set_rates(rates)
+
+
+def _payload_items(payload: Any) -> List[Dict]:
+    """
+    Returns the vacancy items of a payload. Payloads may be raw JSON (str or bytes) or
+    decoded, and either response pages with 'items', lists of items or single items.
+
+    :raises ValueError: If the payload is not valid JSON.
+    :raises TypeError: If the payload is not a page, a list or an item.
+    """
+    if isinstance(payload, (bytes, str)):
+        payload = json.loads(payload)
+    if isinstance(payload, list):
+        return payload
+    if not isinstance(payload, dict):
+        raise TypeError(f"Unexpected payload of type {type(payload).__name__}")
+    return payload['items'] if 'items' in payload else [payload]
+
+
+def prepare_shard(shard: List[Any]) -> ShardResult:
+    """
+    Decodes, parses and validates the items of a shard in a worker process. Vacancy
+    objects are only built for validation; the records travel back as plain tuples.
+
+    :param shard: The payloads of the shard (see ``_payload_items``).
+    :return: The compact result.
+    """
+    records = []
+    errors = []
+    parse_seconds = validate_seconds = 0.0
+    parsed = 0
+    items = []
+    for payload in shard:
+        try:
+            items.extend(_payload_items(payload))
+        except (ValueError, TypeError) as error:
+            errors.append(('parse', {'payload': payload}, error))
+    for item in items:
+        started = time.perf_counter()
+        try:
+            record = parse_vacancy_item(item)
+            if _worker_converter is not None:
+                _worker_converter.normalize_record(record)
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            parse_seconds += time.perf_counter() - started
+            errors.append(('parse', item, error))
+            continue
+        parsed += 1
+        validated_at = time.perf_counter()
+        parse_seconds += validated_at - started
+        try:
+            validate_url(record['url'])
+            Vacancy.from_record(record)
+        except (ValueError, KeyError) as error:
+            errors.append(('validate', record, error))
+        else:
+            records.append(record)
+        validate_seconds += time.perf_counter() - validated_at
+    fields = tuple(dict.fromkeys(key for record in records for key in record))
+    rows = [tuple(record.get(field) for field in fields) for record in records]
+    return ShardResult(fields, rows, errors, parsed, parse_seconds, len(records), validate_seconds)
+
+
+def shard(payloads: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Groups payloads (raw pages, items or dump lines) into shards for the worker processes.
+    :param payloads: The payloads.
+    :param size: The number of payloads per shard.
+    :return: An iterator over the shards.
+    :raises ValueError: If the shard size is not positive.
+    """
+    if size < 1:
+        raise ValueError("The shard size must be positive")
+    payloads = iter(payloads)
+    while True:
+        chunk = list(islice(payloads, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class IngestPipeline:
+    """
+    Ingest pipeline for raw HeadHunter API items.
+
+    Items are parsed into records, validated through ``validate_url`` and ``Vacancy``, and
+    committed to the storage in batches with one storage write per batch. Items that fail
+    parsing or validation are skipped and reported to ``on_error``. With a near-duplicate
+    detector, reposts of known vacancies are dropped ('collapse') or marked with the key
+    of the original in 'duplicate_of' ('flag').
+    """
+
+    def __init__(self, storage: FileStorage, batch_size: int = 500,
+                 converter: Optional[CurrencyConverter] = None, upsert: bool = False,
+                 on_error: Optional[Callable[[Dict, Exception], None]] = None,
+                 dedup: Optional[NearDuplicateDetector] = None, dedup_mode: str = 'collapse'):
+        """
+        Initializes the pipeline.
+
+        :param storage: The storage the records are committed to.
+        :param batch_size: Number of records committed per storage write.
+        :param converter: Converter adding base-currency salaries to the records, if any.
+        :param upsert: Whether to replace stored records with the same key instead of skipping them.
+        :param on_error: Callback receiving every rejected item and the error it raised.
+        :param dedup: Near-duplicate detector consulted for every valid record, if any.
+        :param dedup_mode: 'collapse' to drop near-duplicates, 'flag' to store them marked.
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be positive")
+        if dedup_mode not in ('collapse', 'flag'):
+            raise ValueError(f"Unknown deduplication mode: {dedup_mode}")
+        self._storage = storage
+        self._batch_size = batch_size
+        self._converter = converter
+        self._upsert = upsert
+        self._on_error = on_error
+        self._dedup = dedup
+        self._dedup_mode = dedup_mode
+        self.stats = IngestStats()
+
+    def _reject(self, stage: StageStats, item: Dict, error: Exception) -> None:
+        """Counts a rejected item and reports it."""
+        stage.errors += 1
+        if self._on_error is not None:
+            self._on_error(item, error)
+
+    def parse(self, items: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Converts raw API items into storage records.
+        :param items: The vacancy items of API responses.
+        :return: An iterator over records.
+        """
+        stage = self.stats.parse
+        for item in items:
+            started = time.perf_counter()
+            try:
+                record = parse_vacancy_item(item)
+                if self._converter is not None:
+                    self._converter.normalize_record(record)
+            except (ValueError, KeyError, TypeError, AttributeError) as error:
+                stage.seconds += time.perf_counter() - started
+                self._reject(stage, item, error)
+                continue
+            stage.seconds += time.perf_counter() - started
+            stage.count += 1
+            yield record
+
+    def validate(self, records: Iterable[Dict]) -> Iterator[Tuple[Dict, Vacancy]]:
+        """
+        Validates records through ``validate_url`` and ``Vacancy``.
+        :param records: The parsed records.
+        :return: An iterator over (record, Vacancy) pairs of the valid records.
+        """
+        stage = self.stats.validate
+        for record in records:
+            started = time.perf_counter()
+            try:
+                validate_url(record['url'])
+                vacancy = Vacancy.from_record(record)
+            except (ValueError, KeyError) as error:
+                stage.seconds += time.perf_counter() - started
+                self._reject(stage, record, error)
+                continue
+            stage.seconds += time.perf_counter() - started
+            stage.count += 1
+            yield record, vacancy
+
+    def commit(self, batch: List[Dict]) -> None:
+        """
+        Writes a batch of validated records to the storage in a single write.
+        :param batch: The records to commit.
+        """
+        if not batch:
+            return
+        started = time.perf_counter()
+        if self._upsert:
+            self._storage.upsert_many(batch)
+        else:
+            self._storage.write_data(batch)
+        self.stats.commit.seconds += time.perf_counter() - started
+        self.stats.commit.count += len(batch)
+        self.stats.batches += 1
+
+    def _keep(self, record: Dict) -> bool:
+        """
+        Checks a record against the near-duplicate detector, flagging it if configured.
+        :param record: The valid record.
+        :return: False if the record is a near-duplicate to be dropped.
+        """
+        duplicate_of = self._dedup.check(record)
+        if duplicate_of is None:
+            return True
+        self.stats.duplicates += 1
+        if self._dedup_mode == 'flag':
+            record['duplicate_of'] = duplicate_of
+            return True
+        return False
+
+    def process_records(self, items: Iterable[Dict]) -> Iterator[Tuple[Dict, Vacancy]]:
+        """
+        Runs items through every stage, committing a batch whenever it is full and the
+        remainder when the input is exhausted (or the caller stops iterating).
+
+        :param items: The vacancy items of API responses.
+        :return: An iterator over (record, Vacancy) pairs of the accepted items.
+        """
+        batch = []
+        try:
+            for record, vacancy in self.validate(self.parse(items)):
+                if self._dedup is not None and not self._keep(record):
+                    continue
+                batch.append(record)
+                yield record, vacancy
+                if len(batch) >= self._batch_size:
+                    self.commit(batch)
+                    batch = []
+        finally:
+            self.commit(batch)
+
+    def process_parallel(self, shards: Iterable[List[Any]], workers: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Parses and validates shards of raw payloads in a process pool while this process
+        remains the single writer. Results are consumed in submission order, so the
+        committed and yielded records are in input order regardless of scheduling; at
+        most two shards per worker are in flight.
+
+        :param shards: Shards of payloads, e.g. from ``shard``; see ``_payload_items`` for the forms.
+        :param workers: The number of worker processes; the number of CPUs if omitted.
+        :return: An iterator over the accepted records.
+        """
+        workers = workers or os.cpu_count() or 1
+        rates = self._converter.rates() if self._converter is not None else None
+        base_currency = self._converter.base_currency if self._converter is not None else None
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(base_currency, rates))
+        pending = deque()
+        batch = []
+        shards = iter(shards)
+        try:
+            while True:
+                for payloads in islice(shards, 2 * workers - len(pending)):
+                    pending.append(executor.submit(prepare_shard, payloads))
+                if not pending:
+                    break
+                result = pending.popleft().result()
+                self.stats.parse.count += result.parsed
+                self.stats.parse.seconds += result.parse_seconds
+                self.stats.validate.count += result.validated
+                self.stats.validate.seconds += result.validate_seconds
+                for stage, item, error in result.errors:
+                    self._reject(getattr(self.stats, stage), item, error)
+                for row in result.rows:
+                    record = dict(zip(result.fields, row))
+                    if self._dedup is not None and not self._keep(record):
+                        continue
+                    batch.append(record)
+                    yield record
+                    if len(batch) >= self._batch_size:
+                        self.commit(batch)
+                        batch = []
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.commit(batch)
+
+    def run_parallel(self, shards: Iterable[List[Any]], workers: Optional[int] = None) -> IngestStats:
+        """
+        Ingests every shard with ``process_parallel``.
+        :param shards: Shards of payloads.
+        :param workers: The number of worker processes; the number of CPUs if omitted.
+        :return: The throughput counters of the pipeline.
+        """
+        for _ in self.process_parallel(shards, workers):
+            pass
+        return self.stats
+
+    def process(self, items: Iterable[Dict]) -> Iterator[Vacancy]:
+        """
+        Runs items through every stage like ``process_records``.
+
+        :param items: The vacancy items of API responses.
+        :return: An iterator over the Vacancy objects of the accepted records.
+        """
+        with closing(self.process_records(items)) as accepted:
+            for _, vacancy in accepted:
+                yield vacancy
+
+    def run(self, items: Iterable[Dict]) -> IngestStats:
+        """
+        Ingests every item.
+        :param items: The vacancy items of API responses.
+        :return: The throughput counters of the pipeline.
+        """
+        for _ in self.process(items):
+            pass
+        return self.stats
@@ -0,0 +1,279 @@
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of observed values, as exported by Prometheus.
+    """
+
+    __slots__ = ['buckets', 'counts', 'count', 'sum']
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initializes an empty histogram.
+        :param buckets: Sorted upper bounds of the buckets; values above the last one only count in +Inf.
+        """
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Adds a value to the histogram."""
+        idx = bisect.bisect_left(self.buckets, value)
+        if idx < len(self.counts):
+            self.counts[idx] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Returns (upper bound, number of values less than or equal to it) for every bucket."""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class _NullTimer:
+    """Shared no-op context manager returned by a disabled registry."""
+
+    __slots__ = []
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """Context manager observing its duration into a histogram."""
+
+    __slots__ = ['_registry', '_name', '_labels', '_started']
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, labels: Dict[str, str]):
+        self._registry = registry
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> bool:
+        self._registry.observe(self._name, time.perf_counter() - self._started, **self._labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Collects counters and latency histograms of the application's hot paths.
+
+    The registry is disabled by default: ``inc``, ``observe`` and ``timer`` then return
+    after a single attribute check, so instrumented code pays almost nothing. Metric
+    names follow Prometheus conventions (``*_total`` for counters, ``*_seconds`` for
+    latencies); keyword arguments become labels.
+    """
+
+    def __init__(self, enabled: bool = False, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initializes the registry.
+        :param enabled: Whether metrics are recorded from the start.
+        :param buckets: Upper bounds of the histogram buckets, in seconds.
+        """
+        self.enabled = enabled
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[_LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[_LabelKey, Histogram]] = {}
+
+    def enable(self) -> None:
+        """Starts recording metrics."""
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stops recording metrics; collected values are kept."""
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Drops all collected values."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """
+        Increases a counter.
+        :param name: The counter name.
+        :param value: The amount to add.
+        :param labels: Label values of the series.
+        """
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Records a value (usually a duration in seconds) in a histogram.
+        :param name: The histogram name.
+        :param value: The observed value.
+        :param labels: Label values of the series.
+        """
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self._buckets)
+            histogram.observe(value)
+
+    def timer(self, name: str, **labels: str):
+        """
+        Returns a context manager recording the duration of its block in a histogram.
+        :param name: The histogram name.
+        :param labels: Label values of the series.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def timed(self, name: str, **labels: str) -> Callable:
+        """
+        Returns a decorator recording the duration of every call in a histogram.
+        :param name: The histogram name.
+        :param labels: Label values of the series.
+        """
+        def decorator(function: Callable) -> Callable:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - started, **labels)
+            return wrapper
+        return decorator
+
+    def counter_value(self, name: str, **labels: str) -> float:
+        """Returns the current value of a counter series (0 if it was never increased)."""
+        return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        """Returns a histogram series, or None if nothing was observed."""
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def to_dict(self) -> Dict:
+        """
+        Returns a JSON-serializable snapshot of all metrics.
+        :return: A dictionary with 'counters' and 'histograms', each a list of series.
+        """
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(key), 'value': value}
+                        for name, series in sorted(self._counters.items())
+                        for key, value in sorted(series.items())]
+            histograms = [{'name': name, 'labels': dict(key), 'count': histogram.count, 'sum': histogram.sum,
+                           'buckets': {str(bound): count for bound, count in histogram.cumulative()}}
+                          for name, series in sorted(self._histograms.items())
+                          for key, histogram in sorted(series.items())]
+        return {'counters': counters, 'histograms': histograms}
+
+    @staticmethod
+    def _format_labels(labels: _LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        """Formats a label set in the Prometheus exposition syntax."""
+        pairs = labels + extra
+        if not pairs:
+            return ''
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+    def to_prometheus(self, prefix: str = 'jobsearch_') -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format.
+        :param prefix: Prefix prepended to every metric name.
+        :return: The exposition text.
+        """
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f'# TYPE {prefix}{name} counter')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{prefix}{name}{self._format_labels(key)} {value}')
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f'# TYPE {prefix}{name} histogram')
+                for key, histogram in sorted(series.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{prefix}{name}_bucket{self._format_labels(key, (("le", str(bound)),))} {count}')
+                    lines.append(f'{prefix}{name}_bucket{self._format_labels(key, (("le", "+Inf"),))} '
+                                 f'{histogram.count}')
+                    lines.append(f'{prefix}{name}_sum{self._format_labels(key)} {histogram.sum}')
+                    lines.append(f'{prefix}{name}_count{self._format_labels(key)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, filename: str) -> None:
+        """
+        Writes all metrics to a file: Prometheus text for '.prom'/'.txt' files, JSON otherwise.
+        :param filename: The output file.
+        """
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, 'w', encoding='utf-8') as file:
+            if filename.endswith(('.prom', '.txt')):
+                file.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), file, indent=4)
+
+
+# process-wide registry used by the instrumented modules
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def profile(filename: Optional[str] = None, sort: str = 'cumulative', limit: int = 30) -> Iterator['cProfile.Profile']:
+    """
+    Profiles the enclosed block with cProfile.
+
+    :param filename: File the raw statistics are dumped to (readable with ``pstats``); if omitted,
+        the top functions are printed to stderr instead.
+    :param sort: The pstats sort key used for printing.
+    :param limit: The number of functions printed.
+    :return: A context manager yielding the profiler.
+    """
+    # imported here so that importing the metrics module stays cheap
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if filename:
+            profiler.dump_stats(filename)
+        else:
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats(sort).print_stats(limit)
@@ -1,11 +1,19 @@
+from typing import Iterable, Iterator
+
+from src.utils import vacancy_key
+
+
 class Vacancy:
     """
     Represents a job vacancy with details such as title, URL, salary range, currency, and description.
     """
 
-    __slots__ = ['_title', '_url', '_salary_from', '_salary_to', '_currency', '_description']
+    __slots__ = ['_title', '_url', '_salary_from', '_salary_to', '_currency', '_description',
+                 '_salary_from_norm', '_salary_to_norm', '_normalized', '_id']
 
-    def __init__(self, title: str, url: str, salary_from: int, salary_to: int, currency: str, description: str):
+    def __init__(self, title: str, url: str, salary_from: int, salary_to: int, currency: str, description: str,
+                 salary_from_norm: int = None, salary_to_norm: int = None, vacancy_id: str = None,
+                 normalized: bool = None):
         """
         Initializes a new instance of the Vacancy class.
 
@@ -15,6 +23,11 @@ class Vacancy:
         :param salary_to: The maximum salary offered for the vacancy.
         :param currency: The currency in which the salary is offered.
         :param description: A brief description of the vacancy.
+        :param salary_from_norm: The minimum salary converted to the base currency, if known.
+        :param salary_to_norm: The maximum salary converted to the base currency, if known.
+        :param vacancy_id: The hh.ru id of the vacancy, if known.
+        :param normalized: Whether the salaries were converted to the base currency, even if the
+            conversion failed; by default, whether a converted salary is given.
         """
         self._title = self._validate_title(title)
         self._url = self._validate_url(url)
@@ -22,6 +35,68 @@ class Vacancy:
         self._salary_to = self._validate_salary(salary_to)
         self._currency = self._validate_currency(currency)
         self._description = self._validate_description(description)
+        self._salary_from_norm = self._validate_salary(salary_from_norm)
+        self._salary_to_norm = self._validate_salary(salary_to_norm)
+        self._id = vacancy_id
+        self._normalized = (salary_from_norm is not None or salary_to_norm is not None) if normalized is None \
+            else normalized
+
+    @classmethod
+    def from_record(cls, record: dict) -> 'Vacancy':
+        """
+        Creates a vacancy from a stored record, validating every field.
+
+        :param record: The stored vacancy record.
+        :return: The new Vacancy instance.
+        :raises ValueError: If any field is invalid.
+        """
+        return cls(
+            title=record['title'],
+            url=record['url'],
+            salary_from=record.get('salary_from'),
+            salary_to=record.get('salary_to'),
+            currency=record.get('currency', '-'),
+            description=record['description'],
+            salary_from_norm=record.get('salary_from_norm'),
+            salary_to_norm=record.get('salary_to_norm'),
+            vacancy_id=record.get('id'),
+            normalized='salary_from_norm' in record or 'salary_to_norm' in record
+        )
+
+    @classmethod
+    def from_trusted_row(cls, record: dict) -> 'Vacancy':
+        """
+        Creates a vacancy from a record read from our own store without re-validating it.
+        Only use it for records that were validated before they were persisted; input from
+        the API must go through the constructor or ``from_record``.
+
+        :param record: The stored vacancy record.
+        :return: The new Vacancy instance.
+        """
+        vacancy = object.__new__(cls)
+        vacancy._title = record['title']
+        vacancy._url = record['url']
+        vacancy._salary_from = record.get('salary_from')
+        vacancy._salary_to = record.get('salary_to')
+        vacancy._currency = record.get('currency', '-')
+        vacancy._description = record['description']
+        vacancy._salary_from_norm = record.get('salary_from_norm')
+        vacancy._salary_to_norm = record.get('salary_to_norm')
+        vacancy._id = record.get('id')
+        vacancy._normalized = 'salary_from_norm' in record or 'salary_to_norm' in record
+        return vacancy
+
+    @classmethod
+    def from_rows(cls, records: Iterable[dict]) -> Iterator['Vacancy']:
+        """
+        Lazily creates vacancies from trusted stored records (see ``from_trusted_row``).
+
+        :param records: The stored vacancy records.
+        :return: An iterator over the new Vacancy instances.
+        """
+        from_trusted_row = cls.from_trusted_row
+        for record in records:
+            yield from_trusted_row(record)
 
     @property
     def title(self) -> str:
@@ -43,6 +118,16 @@ class Vacancy:
         """Returns the maximum salary for the vacancy."""
         return self._salary_to
 
+    @property
+    def salary_from_norm(self) -> int:
+        """Returns the minimum salary converted to the base currency, if known."""
+        return self._salary_from_norm
+
+    @property
+    def salary_to_norm(self) -> int:
+        """Returns the maximum salary converted to the base currency, if known."""
+        return self._salary_to_norm
+
     @property
     def currency(self) -> str:
         """Returns the currency in which the salary is offered."""
@@ -53,6 +138,36 @@ class Vacancy:
         """Returns the description of the vacancy."""
         return self._description
 
+    @property
+    def id(self) -> str:
+        """Returns the hh.ru id of the vacancy, or None if it is not known."""
+        return self._id
+
+    @property
+    def key(self) -> str:
+        """Returns the identity key of the vacancy used by the storage and its indexes."""
+        return vacancy_key({'id': self._id, 'url': self._url})
+
+    def get(self, field: str, default=None):
+        """
+        Returns a field the way a record dictionary does, so record helpers such as
+        ``salary_bounds`` accept vacancies too.
+
+        :param field: The record field name, e.g. 'salary_from_norm'.
+        :param default: The value returned for unknown fields or fields that are not set.
+        """
+        value = getattr(self, field, None)
+        return default if value is None else value
+
+    def __contains__(self, field: str) -> bool:
+        """
+        Checks whether a record field is set, like ``in`` on a record dictionary; the converted
+        salaries are set once the vacancy was normalized, even if the conversion failed.
+        """
+        if field in ('salary_from_norm', 'salary_to_norm'):
+            return self._normalized
+        return self.get(field) is not None
+
     def _validate_title(self, title: str) -> str:
         """
         Validates the title of the vacancy.
@@ -171,8 +286,12 @@ class Vacancy:
         """
         Returns the maximum salary value for comparison.
         If it is not specified, returns the minimum salary value.
+        Salaries converted to the base currency take precedence over the raw values; a
+        normalized vacancy whose currency could not be converted counts as 0.
         """
-        if self._salary_to is not None:
+        if self._normalized:
+            return self._salary_to_norm or self._salary_from_norm or 0
+        elif self._salary_to is not None:
             return self._salary_to
         elif self._salary_from is not None:
             return self._salary_from
@@ -0,0 +1,400 @@
+import math
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.metrics import metrics
+from src.storage import FileStorage, StorageListener
+from src.utils import parse_timestamp, salary_value, tokenize, vacancy_key
+
+# a scorer maps the columns and the query keywords to one score per vacancy, in [0, 1]
+Scorer = Callable[['VacancyColumns', Sequence[str]], np.ndarray]
+
+
+def _timestamp(value: Optional[str]) -> float:
+    """Converts an hh.ru timestamp to seconds since the epoch; NaN if it is missing or malformed."""
+    if not value:
+        return math.nan
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        try:
+            return parse_timestamp(value).timestamp()
+        except ValueError:
+            return math.nan
+
+
+class VacancyColumns(StorageListener):
+    """
+    Column arrays of a set of vacancies for vectorized scoring.
+
+    Salaries (the ranking value of ``salary_value``, NaN when not stated) and publication
+    times are ``float64`` arrays, and an inverted index maps every title and description
+    token to the rows containing it and the term frequencies, both as NumPy arrays.
+    Adding records tokenizes each of them once; scoring only touches the arrays.
+
+    Records are appended as new rows. A replaced or deleted record leaves a dead row that
+    scorers ignore, and the columns are rebuilt from the live rows once the dead ones
+    outnumber them. Attached to a storage, the columns follow added, replaced and
+    deleted records without rescanning the store.
+    """
+
+    # number of dead rows tolerated before the columns are compacted, regardless of the live ones
+    MIN_COMPACT = 1024
+
+    def __init__(self, records: Iterable[Dict] = ()):
+        """
+        Builds the columns.
+        :param records: The records; row i of every column describes the i-th record.
+        """
+        self._reset()
+        self.add_records(records)
+
+    def _reset(self) -> None:
+        """Drops every row."""
+        self.records: List[Optional[Dict]] = []
+        self._rows: Dict[str, int] = {}
+        self._dead = 0
+        self._salary = np.empty(0, dtype=np.float64)
+        self._published = np.empty(0, dtype=np.float64)
+        self._lengths = np.empty(0, dtype=np.float64)
+        self._alive = np.empty(0, dtype=bool)
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        # NumPy copies of the posting lists, dropped when a list grows
+        self._posting_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        """Returns the number of rows, including dead ones."""
+        return len(self.records)
+
+    @property
+    def live(self) -> int:
+        """Returns the number of live rows."""
+        return len(self.records) - self._dead
+
+    @property
+    def salary(self) -> np.ndarray:
+        """Returns the salary of every row; NaN if not stated or dead."""
+        return self._salary[:len(self)]
+
+    @property
+    def published(self) -> np.ndarray:
+        """Returns the publication time of every row in seconds since the epoch; NaN if unknown or dead."""
+        return self._published[:len(self)]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Returns the number of tokens of every row; 0 for dead rows."""
+        return self._lengths[:len(self)]
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Returns a boolean mask of the live rows."""
+        return self._alive[:len(self)]
+
+    def _reserve(self, size: int) -> None:
+        """Grows the column arrays, doubling their capacity, to hold at least ``size`` rows."""
+        capacity = len(self._alive)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 16)
+        for name in ('_salary', '_published', '_lengths', '_alive'):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:len(self)] = column[:len(self)]
+            setattr(self, name, grown)
+
+    def _kill(self, row: int) -> None:
+        """Marks a row dead."""
+        self.records[row] = None
+        self._alive[row] = False
+        self._salary[row] = self._published[row] = math.nan
+        self._lengths[row] = 0
+        self._dead += 1
+
+    def add_records(self, records: Iterable[Dict]) -> None:
+        """
+        Appends records as new rows; a record with a known key replaces the old row.
+        :param records: The records.
+        """
+        records = list(records)
+        self._reserve(len(self) + len(records))
+        for record in records:
+            key = vacancy_key(record)
+            if key in self._rows:
+                self._kill(self._rows[key])
+            row = self._rows[key] = len(self.records)
+            self.records.append(record)
+            self._alive[row] = True
+            self._salary[row] = salary_value(record) or math.nan
+            self._published[row] = _timestamp(record.get('published_at'))
+            tokens = tokenize(f"{record.get('title') or ''} {record.get('description') or ''}")
+            self._lengths[row] = len(tokens)
+            frequencies: Dict[str, int] = {}
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+            for token, frequency in frequencies.items():
+                rows, counts = self._postings.setdefault(token, ([], []))
+                rows.append(row)
+                counts.append(frequency)
+                self._posting_arrays.pop(token, None)
+        self._compact_if_needed()
+
+    def delete(self, keys: Iterable[str]) -> None:
+        """
+        Marks the rows of records dead.
+        :param keys: The vacancy keys; unknown keys are ignored.
+        """
+        for key in keys:
+            row = self._rows.pop(key, None)
+            if row is not None:
+                self._kill(row)
+        self._compact_if_needed()
+
+    def _compact_if_needed(self) -> None:
+        """Rebuilds the columns from the live rows once dead rows outnumber them."""
+        if self._dead > max(self.live, self.MIN_COMPACT):
+            records = [record for record in self.records if record is not None]
+            self._reset()
+            self.add_records(records)
+
+    def on_records_added(self, records: List[Dict]) -> None:
+        """Appends records added to the attached storage."""
+        self.add_records(records)
+
+    def on_records_deleted(self, keys: List[str]) -> None:
+        """Marks records deleted from the attached storage dead."""
+        self.delete(keys)
+
+    def attach(self, storage: FileStorage) -> 'VacancyColumns':
+        """
+        Adds the current contents of a storage and follows its changes.
+        :param storage: The storage to follow.
+        :return: The columns themselves.
+        """
+        self.add_records(storage.iter_data())
+        storage.add_listener(self)
+        return self
+
+    def postings(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the live rows containing a token and the token's frequency in each of them.
+        :param token: A lowercase token.
+        :return: (rows, frequencies); both empty for unknown tokens.
+        """
+        arrays = self._posting_arrays.get(token)
+        if arrays is None:
+            if token not in self._postings:
+                return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+            rows, counts = self._postings[token]
+            arrays = self._posting_arrays[token] = (np.array(rows, dtype=np.int32),
+                                                    np.array(counts, dtype=np.float64))
+        rows, counts = arrays
+        if self._dead:
+            live = self._alive[rows]
+            rows, counts = rows[live], counts[live]
+        return rows, counts
+
+    def matches(self, keywords: Sequence[str]) -> np.ndarray:
+        """
+        Returns a boolean mask of the live rows containing any of the keywords.
+        :param keywords: The query keywords.
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        for token in _query_tokens(keywords):
+            mask[self.postings(token)[0]] = True
+        return mask
+
+
+def _query_tokens(keywords: Sequence[str]) -> List[str]:
+    """Tokenizes the query keywords, without duplicates."""
+    return list(dict.fromkeys(token for keyword in keywords for token in tokenize(keyword)))
+
+
+def salary_scorer() -> Scorer:
+    """
+    Builds a scorer ranking vacancies by salary, scaled linearly between the lowest
+    (0) and the highest (1) stated salary; vacancies without a salary score 0.
+    """
+    def score(columns: VacancyColumns, keywords: Sequence[str]) -> np.ndarray:
+        salary = columns.salary
+        stated = ~np.isnan(salary)
+        result = np.zeros(len(columns))
+        if stated.any():
+            low, high = salary[stated].min(), salary[stated].max()
+            result[stated] = (salary[stated] - low) / (high - low) if high > low else 1.0
+        return result
+
+    return score
+
+
+def bm25_scorer(k1: float = 1.2, b: float = 0.75) -> Scorer:
+    """
+    Builds a scorer ranking vacancies by the Okapi BM25 relevance of their title and
+    description to the keywords, divided by the best score; all scores are 0 without keywords.
+
+    :param k1: Term frequency saturation.
+    :param b: Document length normalization.
+    """
+    def score(columns: VacancyColumns, keywords: Sequence[str]) -> np.ndarray:
+        result = np.zeros(len(columns))
+        if not columns.live:
+            return result
+        # dead rows have no tokens and no postings
+        average_length = columns.lengths.sum() / columns.live or 1.0
+        for token in _query_tokens(keywords):
+            rows, frequencies = columns.postings(token)
+            if not len(rows):
+                continue
+            idf = math.log(1 + (columns.live - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = k1 * (1 - b + b * columns.lengths[rows] / average_length)
+            result[rows] += idf * frequencies * (k1 + 1) / (frequencies + norm)
+        best = result.max()
+        if best > 0:
+            result /= best
+        return result
+
+    return score
+
+
+def recency_scorer(half_life_days: float = 14.0, now: Callable[[], float] = time.time) -> Scorer:
+    """
+    Builds a scorer ranking newer vacancies higher: the score halves every ``half_life_days``
+    after publication; vacancies without a publication time score 0.
+
+    :param half_life_days: Age in days at which the score is 0.5.
+    :param now: Clock returning the current time in seconds since the epoch.
+    """
+    half_life = half_life_days * 86400
+
+    def score(columns: VacancyColumns, keywords: Sequence[str]) -> np.ndarray:
+        age = np.maximum(now() - columns.published, 0)
+        return np.nan_to_num(np.exp2(-age / half_life), nan=0.0)
+
+    return score
+
+
+class Ranker:
+    """
+    Ranks vacancies by a weighted sum of pluggable scorers.
+
+    The default scorers are 'salary', 'relevance' (BM25 over the keywords) and 'recency';
+    ``register`` adds or replaces scorers and ``replace`` swaps one keeping its weight.
+    Top-k selection uses ``np.argpartition``, so only the k best rows are sorted.
+    """
+
+    def __init__(self, scorers: Optional[Dict[str, Tuple[float, Scorer]]] = None):
+        """
+        Initializes the ranker.
+        :param scorers: (weight, scorer) pairs by name; the default scorers with weights
+            0.5, 0.3 and 0.2 if omitted.
+        """
+        if scorers is None:
+            scorers = {'salary': (0.5, salary_scorer()), 'relevance': (0.3, bm25_scorer()),
+                       'recency': (0.2, recency_scorer())}
+        self.scorers = dict(scorers)
+
+    def register(self, name: str, scorer: Scorer, weight: float) -> None:
+        """
+        Adds or replaces a scorer.
+        :param name: The scorer name.
+        :param scorer: The scoring function.
+        :param weight: Its weight in the total score.
+        """
+        self.scorers[name] = (weight, scorer)
+
+    def replace(self, name: str, scorer: Scorer) -> None:
+        """
+        Replaces a registered scorer, keeping its weight.
+        :param name: The scorer name.
+        :param scorer: The new scoring function.
+        :raises KeyError: If the scorer is unknown.
+        """
+        self.scorers[name] = (self.scorers[name][0], scorer)
+
+    def set_weights(self, **weights: float) -> None:
+        """
+        Changes the weights of registered scorers, e.g. ``set_weights(salary=1, recency=0)``.
+        :raises KeyError: If a scorer is unknown.
+        """
+        for name, weight in weights.items():
+            self.scorers[name] = (weight, self.scorers[name][1])
+
+    def score(self, columns: VacancyColumns, keywords: Sequence[str] = ()) -> np.ndarray:
+        """
+        Computes the total score of every row.
+        :param columns: The vacancy columns.
+        :param keywords: The query keywords.
+        :return: The weighted sum of the scorers.
+        """
+        total = np.zeros(len(columns))
+        for weight, scorer in self.scorers.values():
+            if weight:
+                total += weight * scorer(columns, keywords)
+        return total
+
+    @metrics.timed('ranking_seconds')
+    def top(self, columns: VacancyColumns, keywords: Sequence[str] = (), k: int = 20,
+            require_match: bool = False) -> List[Tuple[int, float]]:
+        """
+        Selects the best rows.
+
+        :param columns: The vacancy columns.
+        :param keywords: The query keywords.
+        :param k: The number of rows returned.
+        :param require_match: Whether rows containing none of the keywords are excluded.
+        :return: (row, score) pairs, best first; ties are ordered by row.
+        """
+        scores = self.score(columns, keywords)
+        candidates = np.flatnonzero(columns.alive)
+        if require_match and keywords:
+            candidates = np.flatnonzero(columns.matches(keywords))
+        if k <= 0 or not len(candidates):
+            return []
+        if k < len(candidates):
+            # rows scoring exactly the k-th best score are taken in row order
+            candidate_scores = scores[candidates]
+            threshold = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+            above = candidates[candidate_scores > threshold]
+            tied = candidates[candidate_scores == threshold]
+            candidates = np.concatenate((above, tied[:k - len(above)]))
+        best = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [(int(row), float(scores[row])) for row in best]
+
+
+class RankingEngine:
+    """
+    Ranks the records of a storage. The columns are built on first use and then follow
+    the storage through its listener hooks, so a ranking after a change only pays for
+    the changed records and the vectorized scoring.
+    """
+
+    def __init__(self, storage: FileStorage, ranker: Optional[Ranker] = None):
+        """
+        Initializes the engine.
+        :param storage: The storage to rank.
+        :param ranker: The ranker; ``Ranker()`` with the default scorers if omitted.
+        """
+        self._storage = storage
+        self.ranker = ranker or Ranker()
+        self._columns: Optional[VacancyColumns] = None
+
+    def columns(self) -> VacancyColumns:
+        """Returns the columns of the current storage contents."""
+        if self._columns is None:
+            self._columns = VacancyColumns().attach(self._storage)
+        return self._columns
+
+    def rank(self, keywords: Sequence[str] = (), k: int = 20, require_match: bool = False
+             ) -> List[Tuple[float, Dict]]:
+        """
+        Returns the best stored vacancies.
+        :param keywords: The query keywords.
+        :param k: The number of vacancies returned.
+        :param require_match: Whether vacancies containing none of the keywords are excluded.
+        :return: (score, record) pairs, best first.
+        """
+        columns = self.columns()
+        return [(score, columns.records[row]) for row, score in self.ranker.top(columns, keywords, k, require_match)]
@@ -0,0 +1,218 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter shared by synchronous and asynchronous callers.
+
+    Tokens are refilled continuously at ``rate`` per second up to ``capacity``. Callers
+    reserve a token and wait for the returned delay, so concurrent callers are spaced
+    out fairly instead of all retrying at the same moment.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initializes the bucket full.
+
+        :param rate: Number of tokens added per second.
+        :param capacity: Maximum burst size. Defaults to one second worth of tokens.
+        :param clock: Monotonic clock used to measure refill time.
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self._capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Returns the number of tokens added per second."""
+        return self._rate
+
+    def _refill(self) -> None:
+        """Adds the tokens accumulated since the last update."""
+        now = self._clock()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Takes tokens from the bucket, going into debt if necessary.
+
+        :param tokens: Number of tokens to take.
+        :return: The number of seconds the caller must wait before proceeding.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Blocks the current thread until the tokens are available.
+        :param tokens: Number of tokens to take.
+        """
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: float = 1.0) -> None:
+        """
+        Suspends the current coroutine until the tokens are available.
+        :param tokens: Number of tokens to take.
+        """
+        delay = self.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """
+    Token bucket whose rate follows the upstream's throttling (additive increase,
+    multiplicative decrease): every throttled response cuts the rate and pauses the
+    bucket for the requested ``Retry-After`` time, every successful one raises the rate
+    a little, up to ``max_rate``.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, min_rate: Optional[float] = None,
+                 max_rate: Optional[float] = None, increase: float = 0.5, decrease: float = 0.5,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initializes the bucket full.
+
+        :param rate: The initial number of tokens added per second.
+        :param capacity: Maximum burst size. Defaults to one second worth of tokens at the initial rate.
+        :param min_rate: Lowest rate after throttling; defaults to one token per second or the initial rate.
+        :param max_rate: Highest rate reached by successful requests; defaults to the initial rate.
+        :param increase: Tokens per second added to the rate after every successful request.
+        :param decrease: Factor applied to the rate after every throttled request.
+        :param clock: Monotonic clock used to measure refill time.
+        """
+        super().__init__(rate, capacity, clock)
+        self.min_rate = min_rate if min_rate is not None else min(rate, 1.0)
+        self.max_rate = max_rate if max_rate is not None else rate
+        self._increase = increase
+        self._decrease = decrease
+
+    def on_success(self) -> None:
+        """Raises the rate after a successful request."""
+        with self._lock:
+            self._refill()
+            self._rate = min(self.max_rate, self._rate + self._increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """
+        Lowers the rate after a throttled request and drops the accumulated burst.
+        :param retry_after: Seconds the upstream asked to wait; no token is handed out before they pass.
+        """
+        with self._lock:
+            self._refill()
+            self._rate = max(self.min_rate, self._rate * self._decrease)
+            self._tokens = min(self._tokens, -(retry_after or 0.0) * self._rate)
+
+
+class ExponentialBackoff:
+    """
+    Retry delays growing exponentially with the attempt number, with "full jitter":
+    the delay is drawn uniformly below the exponential bound, so clients throttled at
+    the same moment do not retry in lockstep.
+    """
+
+    def __init__(self, base: float = 0.2, cap: float = 10.0, max_retries: int = 4,
+                 rng: Callable[[], float] = random.random):
+        """
+        Initializes the backoff policy.
+        :param base: Upper bound of the first delay, in seconds.
+        :param cap: Upper bound of every delay, in seconds.
+        :param max_retries: Number of retries after the first attempt.
+        :param rng: Source of uniform numbers in [0, 1).
+        """
+        self.base = base
+        self.cap = cap
+        self.max_retries = max_retries
+        self._rng = rng
+
+    def delay(self, attempt: int) -> float:
+        """
+        Returns the delay before a retry.
+        :param attempt: The zero-based number of the failed attempt.
+        :return: The delay in seconds.
+        """
+        return self._rng() * min(self.cap, self.base * 2 ** attempt)
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised when a request is rejected because the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to an upstream that keeps failing.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and requests are
+    rejected without being sent. Once ``reset_timeout`` has passed, a single trial
+    request is let through (half-open): its success closes the circuit, its failure
+    opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initializes a closed circuit breaker.
+        :param failure_threshold: Consecutive failures that open the circuit.
+        :param reset_timeout: Seconds the circuit stays open before a trial request.
+        :param clock: Monotonic clock.
+        """
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Returns 'closed', 'open' or 'half-open'."""
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        Checks whether a request may be sent; moves an expired open circuit to half-open.
+        :return: True if the request may be sent.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self._reset_timeout:
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Closes the circuit after a successful request."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        """Counts a failed request, opening the circuit at the threshold or after a failed trial."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
@@ -0,0 +1,250 @@
+"""
+Compact binary snapshots of vacancy stores.
+
+A snapshot is a single little-endian file that can be memory-mapped:
+
+    header        magic b'HHSN', format version, record count, offset of the offset table
+                  and the CRC32 of everything after the header
+    fields        length-prefixed JSON array with the keys of the first record
+    records       length-prefixed compact JSON values: an array of values in field order
+                  for records with exactly these keys, the complete object otherwise
+    offset table  one unsigned 64-bit offset per record
+
+Field names are stored once instead of in every record and no whitespace is written,
+so snapshots are several times smaller than pretty-printed JSON stores and decode
+faster. The offset table gives random access by record index without reading the
+other records.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from src.metrics import metrics
+from src.models import Vacancy
+from src.storage import JSONFileStorage, atomic_write
+
+MAGIC = b'HHSN'
+VERSION = 1
+
+# magic, version, flags, record count, offset table position, CRC32 of the body
+_HEADER = struct.Struct('<4sHHQQI4x')
+_LENGTH = struct.Struct('<I')
+_OFFSET = struct.Struct('<Q')
+
+
+class SnapshotError(ValueError):
+    """Raised when a file is not a valid snapshot or its checksum does not match."""
+
+
+def _encode(record: Dict, fields: Tuple[str, ...]) -> bytes:
+    """Encodes a record as compact JSON, as a value array if it has exactly the snapshot fields."""
+    value = list(record.values()) if tuple(record) == fields else record
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_snapshot(records: Iterable[Dict], filename: str) -> int:
+    """
+    Writes records to a snapshot file, replacing it atomically. Records are streamed,
+    only their offsets are kept in memory.
+
+    :param records: The records; the keys of the first one become the snapshot fields.
+    :param filename: The snapshot file.
+    :return: The number of records written.
+    """
+    records = iter(records)
+    first = next(records, None)
+    fields = tuple(first) if first is not None else ()
+    count = 0
+
+    def write(file) -> None:
+        nonlocal count
+        offsets = array('Q')
+        checksum = 0
+        position = _HEADER.size
+
+        def emit(payload: bytes) -> None:
+            nonlocal checksum, position
+            chunk = _LENGTH.pack(len(payload)) + payload
+            file.write(chunk)
+            checksum = zlib.crc32(chunk, checksum)
+            position += len(chunk)
+
+        file.write(bytes(_HEADER.size))
+        emit(json.dumps(fields, ensure_ascii=False).encode('utf-8'))
+        for record in chain([first] if first is not None else [], records):
+            offsets.append(position)
+            emit(_encode(record, fields))
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        table = offsets.tobytes()
+        file.write(table)
+        checksum = zlib.crc32(table, checksum)
+        count = len(offsets)
+        file.seek(0)
+        file.write(_HEADER.pack(MAGIC, VERSION, 0, count, position, checksum))
+
+    with metrics.timer('snapshot_seconds', operation='write'):
+        atomic_write(filename, write, binary=True)
+    return count
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file.
+
+    Opening a snapshot only maps the file and checks its header (and checksum, unless
+    disabled); records are decoded on access, so ``snapshot[idx]`` is independent of the
+    size of the file.
+    """
+
+    # records decoded per json.loads call when iterating
+    batch_size = 4096
+
+    def __init__(self, filename: str, verify: bool = True):
+        """
+        Opens a snapshot.
+        :param filename: The snapshot file.
+        :param verify: Whether the CRC32 of the file is checked; this reads the whole file once.
+        :raises SnapshotError: If the file is not a snapshot, is truncated or fails the checksum.
+        """
+        self._filename = filename
+        with open(filename, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < _HEADER.size:
+                raise SnapshotError(f"{filename} is too short to be a snapshot")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open(size, verify)
+        except BaseException:
+            self._map.close()
+            raise
+
+    def _open(self, size: int, verify: bool) -> None:
+        """Checks the header and reads the fields."""
+        magic, version, _, count, table_offset, checksum = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{self._filename} is not a snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version} in {self._filename}")
+        if table_offset + count * _OFFSET.size != size or table_offset < _HEADER.size + _LENGTH.size:
+            raise SnapshotError(f"{self._filename} is truncated")
+        if verify:
+            with memoryview(self._map) as view:
+                if zlib.crc32(view[_HEADER.size:]) != checksum:
+                    raise SnapshotError(f"Checksum mismatch in {self._filename}")
+        self._count = count
+        self._table_offset = table_offset
+        self.fields = tuple(json.loads(self._payload(_HEADER.size)))
+        metrics.inc('storage_bytes_read_total', size)
+
+    def _payload(self, offset: int) -> bytes:
+        """Returns the length-prefixed payload starting at an offset."""
+        (length,) = _LENGTH.unpack_from(self._map, offset)
+        start = offset + _LENGTH.size
+        if start + length > self._table_offset:
+            raise SnapshotError(f"Record at offset {offset} overruns the data of {self._filename}")
+        return self._map[start:start + length]
+
+    def _decode(self, payload: bytes) -> Dict:
+        """Decodes a record payload."""
+        value = json.loads(payload)
+        return dict(zip(self.fields, value)) if isinstance(value, list) else value
+
+    def __len__(self) -> int:
+        """Returns the number of records."""
+        return self._count
+
+    def __getitem__(self, idx: int) -> Dict:
+        """
+        Decodes the record with the given index.
+        :param idx: The record index; negative indexes count from the end.
+        :return: The record.
+        :raises IndexError: If the index is out of range.
+        """
+        if idx < 0:
+            idx += self._count
+        if not 0 <= idx < self._count:
+            raise IndexError("Snapshot index out of range")
+        (offset,) = _OFFSET.unpack_from(self._map, self._table_offset + idx * _OFFSET.size)
+        return self._decode(self._payload(offset))
+
+    def _offsets(self) -> array:
+        """Returns the offset table."""
+        offsets = array('Q', self._map[self._table_offset:])
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        return offsets
+
+    def __iter__(self) -> Iterator[Dict]:
+        """
+        Decodes the records in order. Records are contiguous, so the length of each one
+        follows from the offset table; batches of payloads are joined into a JSON array
+        and decoded with a single ``json.loads`` call.
+        """
+        offsets = self._offsets()
+        ends = offsets[1:]
+        ends.append(self._table_offset)
+        fields = self.fields
+        data = self._map
+        prefix = _LENGTH.size
+        for start in range(0, len(offsets), self.batch_size):
+            bounds = zip(offsets[start:start + self.batch_size], ends[start:start + self.batch_size])
+            values = json.loads(b'[' + b','.join([data[offset + prefix:end] for offset, end in bounds]) + b']')
+            for value in values:
+                yield dict(zip(fields, value)) if isinstance(value, list) else value
+
+    def read_all(self) -> List[Dict]:
+        """
+        Decodes all records.
+        :return: The list of records.
+        """
+        with metrics.timer('snapshot_seconds', operation='read'):
+            return list(self)
+
+    def iter_vacancies(self) -> Iterator[Vacancy]:
+        """
+        Iterates over the records as Vacancy objects. Snapshots are made from stored,
+        already validated records, so they are not validated again.
+        :return: An iterator over Vacancy objects.
+        """
+        return Vacancy.from_rows(self)
+
+    def close(self) -> None:
+        """Unmaps the file."""
+        self._map.close()
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.close()
+        return False
+
+
+def json_to_snapshot(json_filename: str, snapshot_filename: str) -> int:
+    """
+    Converts a JSON store (as written by JSONFileStorage) to a snapshot, streaming its records.
+    :param json_filename: The JSON store.
+    :param snapshot_filename: The snapshot file to write.
+    :return: The number of records converted.
+    """
+    return write_snapshot(JSONFileStorage(json_filename).iter_data(), snapshot_filename)
+
+
+def snapshot_to_json(snapshot_filename: str, json_filename: str) -> int:
+    """
+    Converts a snapshot back to a JSON store in the format written by JSONFileStorage.
+    :param snapshot_filename: The snapshot file.
+    :param json_filename: The JSON store to write.
+    :return: The number of records converted.
+    """
+    with Snapshot(snapshot_filename) as snapshot:
+        records = snapshot.read_all()
+    atomic_write(json_filename, lambda file: json.dump(records, file, ensure_ascii=False, indent=4))
+    return len(records)
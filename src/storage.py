@@ -1,14 +1,394 @@
+import heapq
 import json
 import os
+import queue
+import re
+import sqlite3
+import tempfile
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import closing, contextmanager
+from datetime import datetime
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - advisory locking is only available on POSIX
+    fcntl = None
+
+from src.metrics import metrics
+from src.models import Vacancy
+from src.utils import parse_timestamp, salary_bounds, salary_value, strip_markup, tokenize, vacancy_key
+
+_SEPARATORS_RE = re.compile(r'[\s,]*')
+
+
+def _matches_keywords(record: Dict, keywords: List[str], mode: str, prefix: bool) -> bool:
+    """
+    Checks a record against keywords with the semantics of ``KeywordIndex.search``.
+
+    :param record: The vacancy record.
+    :param keywords: The keywords; a keyword matches when all of its tokens are present.
+    :param mode: 'any' or 'all'.
+    :param prefix: Whether the last token of each keyword may match as a prefix.
+    """
+    tokens = set(tokenize(f"{record.get('title') or ''} {record.get('description') or ''}"))
+
+    def matches(keyword: str) -> bool:
+        keyword_tokens = tokenize(keyword)
+        if not keyword_tokens:
+            return False
+        *exact, last = keyword_tokens
+        if not all(token in tokens for token in exact):
+            return False
+        if prefix:
+            return any(token.startswith(last) for token in tokens)
+        return last in tokens
+
+    if mode == 'all':
+        return all(matches(keyword) for keyword in keywords)
+    return any(matches(keyword) for keyword in keywords)
+
+
+def _ranking_key(record: Dict) -> Tuple[int, str]:
+    """Returns the key records are ranked by: salary value, then vacancy key."""
+    return salary_value(record), vacancy_key(record)
+
+
+RecordPredicate = Callable[[Dict], bool]
+
+
+def _deletion_target(predicate_or_ids: Union[RecordPredicate, Iterable]
+                     ) -> Tuple[Optional[set], Optional[RecordPredicate]]:
+    """
+    Interprets the argument of ``delete_many``.
+    :param predicate_or_ids: A record predicate, or vacancy keys and/or records.
+    :return: A (keys, None) pair for keys and records, or (None, predicate) for a predicate.
+    """
+    if callable(predicate_or_ids):
+        return None, predicate_or_ids
+    return {item if isinstance(item, str) else vacancy_key(item) for item in predicate_or_ids}, None
+
+
+def _published_before(timestamp: Union[datetime, str]) -> Callable[[Optional[str]], bool]:
+    """
+    Builds a test of hh.ru publication timestamps against a cutoff. Records without
+    (or with a malformed) publication time are never considered older.
+    :param timestamp: The cutoff as a timezone-aware datetime or an hh.ru timestamp string.
+    :return: A function telling whether a 'published_at' value lies before the cutoff.
+    """
+    cutoff = parse_timestamp(timestamp) if isinstance(timestamp, str) else timestamp
+
+    def is_older(published_at: Optional[str]) -> bool:
+        if not published_at:
+            return False
+        try:
+            return parse_timestamp(published_at) < cutoff
+        except ValueError:
+            return False
+    return is_older
+
+
+def _fsync_directory(directory: str) -> None:
+    """Flushes a directory entry change (e.g. a rename) to disk where the platform allows it."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(filename: str, write: Callable, binary: bool = False) -> None:
+    """
+    Replaces a file atomically: the content is written to a temporary file in the same
+    directory, flushed with fsync and renamed over the original, so a crash leaves
+    either the old or the new file but never a truncated one.
+
+    :param filename: The file to replace.
+    :param write: Callback receiving the open temporary file and writing the content.
+    :param binary: Whether the temporary file is opened in binary mode.
+    """
+    directory = os.path.dirname(filename) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_filename = tempfile.mkstemp(dir=directory, prefix=os.path.basename(filename) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w', **({} if binary else {'encoding': 'utf-8'})) as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+            metrics.inc('storage_bytes_written_total', os.fstat(file.fileno()).st_size)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+    _fsync_directory(directory)
+
+
+class FileLock:
+    """
+    Advisory reader/writer lock shared by every process using the same store.
+
+    Uses ``fcntl.flock`` on a sidecar ``.lock`` file: any number of processes may hold
+    the shared lock, the exclusive lock is held by one process at a time. Within a
+    process the lock is re-entrant for the owning thread (a shared lock may be taken
+    while the exclusive one is held) and serializes other threads. On platforms without
+    ``fcntl`` only the in-process serialization applies.
+    """
+
+    def __init__(self, filename: str):
+        """
+        Initializes the lock.
+        :param filename: The name of the lock file.
+        """
+        self._filename = filename
+        self._thread_lock = threading.RLock()
+        self._file = None
+        self._depth = 0
+        self._exclusive = False
+
+    @contextmanager
+    def _hold(self, exclusive: bool) -> Iterator[None]:
+        """
+        Holds the lock in the requested mode for the duration of the context.
+        :param exclusive: Whether the exclusive (writer) lock is required.
+        :raises RuntimeError: If a shared lock held by the same thread would have to be upgraded.
+        """
+        with self._thread_lock:
+            if self._depth == 0:
+                directory = os.path.dirname(self._filename)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self._filename, 'a+b')
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self._exclusive = exclusive
+            elif exclusive and not self._exclusive:
+                raise RuntimeError("Cannot upgrade a shared lock to an exclusive lock")
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    if fcntl is not None:
+                        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                    self._file.close()
+                    self._file = None
+
+    def shared(self):
+        """Returns a context manager holding the shared (reader) lock."""
+        return self._hold(False)
+
+    def exclusive(self):
+        """Returns a context manager holding the exclusive (writer) lock."""
+        return self._hold(True)
+
+
+class GroupCommitWriter:
+    """
+    Funnels writes of many concurrent producers into few storage writes.
+
+    Producers submit batches from any thread; a single writer thread drains everything
+    queued since its previous write and commits it with one ``write_data`` (or
+    ``upsert_many``) call, so N concurrent workers cost far fewer than N storage writes.
+    """
+
+    def __init__(self, storage: 'FileStorage', max_records: int = 10000):
+        """
+        Starts the writer thread.
+
+        :param storage: The storage the records are committed to.
+        :param max_records: Maximum number of records merged into one storage write.
+        """
+        self._storage = storage
+        self._max_records = max_records
+        self._queue: queue.Queue = queue.Queue()
+        # guards the closed check and the enqueueing so no request lands after the sentinel
+        self._lock = threading.Lock()
+        self._closed = False
+        self.commits = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, data: List[Dict], upsert: bool = False) -> Future:
+        """
+        Queues records for the next group commit.
+
+        :param data: The records to write.
+        :param upsert: Whether the records replace stored records with the same key.
+        :return: A future resolved once the records are committed (or failed to be).
+        :raises RuntimeError: If the writer has been closed.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The writer is closed")
+            self._queue.put((list(data), upsert, future))
+        return future
+
+    def write(self, data: List[Dict], upsert: bool = False) -> None:
+        """
+        Writes records through the group commit and waits until they are committed.
+
+        :param data: The records to write.
+        :param upsert: Whether the records replace stored records with the same key.
+        """
+        self.submit(data, upsert).result()
+
+    def _run(self) -> None:
+        """Drains the queue and commits every group until the writer is closed."""
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][0]) if pending[0] is not None else 0
+            while size < self._max_records:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                pending.append(request)
+                if request is not None:
+                    size += len(request[0])
+            requests = [request for request in pending if request is not None]
+            start = 0
+            while start < len(requests):
+                upsert = requests[start][1]
+                end = start
+                while end < len(requests) and requests[end][1] == upsert:
+                    end += 1
+                group = requests[start:end]
+                records = [record for data, _, _ in group for record in data]
+                try:
+                    if upsert:
+                        self._storage.upsert_many(records)
+                    else:
+                        self._storage.write_data(records)
+                    self.commits += 1
+                except BaseException as error:
+                    for _, _, future in group:
+                        future.set_exception(error)
+                else:
+                    for _, _, future in group:
+                        future.set_result(None)
+                start = end
+            if len(requests) != len(pending):
+                return
+
+    def close(self) -> None:
+        """Commits everything already submitted and stops the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+
+class StorageListener:
+    """
+    Base class for objects that keep derived data (e.g. indexes) in sync with a storage.
+    """
+
+    def on_records_added(self, records: List[Dict]) -> None:
+        """
+        Called after new records have been stored.
+        :param records: The records that were added.
+        """
+        pass
+
+    def on_records_deleted(self, keys: List[str]) -> None:
+        """
+        Called after records have been removed from the storage.
+        :param keys: The vacancy keys of the removed records.
+        """
+        pass
 
 
 class FileStorage(ABC):
     """
     Abstract base class for file storage operations.
+
+    Query results and a parsed snapshot of the stored records are cached in memory and
+    keyed by the store ``generation``: an in-process counter bumped on every change plus
+    a cheap version check of the underlying file, so changes made by other processes
+    invalidate the caches too. Repeat queries on a stable store do not touch the disk.
     """
 
+    # number of query results kept in the LRU cache (0 disables the cache)
+    query_cache_size = 128
+    # stores with more records than this are never held in the snapshot cache
+    record_cache_limit = 200000
+
+    def __init__(self):
+        """
+        Initializes the list of listeners notified about changes to the stored data and the caches.
+        """
+        self._listeners: List[StorageListener] = []
+        self._generation = 0
+        self._cache_lock = threading.Lock()
+        self._query_cache: OrderedDict = OrderedDict()
+        self._snapshot: Optional[List[Dict]] = None
+        self._snapshot_generation: Optional[Tuple] = None
+
+    def _external_version(self) -> Optional[Tuple]:
+        """
+        Returns a version of the underlying file that changes whenever another process
+        modifies it: its inode, size and modification time, or None if it does not exist.
+        """
+        try:
+            stat = os.stat(self._filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def generation(self) -> Tuple:
+        """
+        Returns a value that changes whenever the stored data may have changed.
+        :return: The in-process change counter together with the external file version.
+        """
+        return self._generation, self._external_version()
+
+    def _changed(self) -> None:
+        """Advances the generation and drops the cached results after a change of the store."""
+        with self._cache_lock:
+            self._generation += 1
+            self._query_cache.clear()
+            self._snapshot = self._snapshot_generation = None
+
+    def add_listener(self, listener: StorageListener) -> None:
+        """
+        Registers a listener to be notified whenever records are added or deleted.
+        :param listener: The listener to register.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: StorageListener) -> None:
+        """
+        Unregisters a previously added listener.
+        :param listener: The listener to remove.
+        """
+        self._listeners.remove(listener)
+
+    def _notify_added(self, records: List[Dict]) -> None:
+        """Notifies listeners about newly stored records."""
+        if records:
+            self._changed()
+            metrics.inc('storage_records_written_total', len(records))
+            for listener in self._listeners:
+                listener.on_records_added(records)
+
+    def _notify_deleted(self, keys: List[str]) -> None:
+        """Notifies listeners about removed records."""
+        if keys:
+            self._changed()
+            metrics.inc('storage_records_deleted_total', len(keys))
+            for listener in self._listeners:
+                listener.on_records_deleted(keys)
+
     @abstractmethod
     def read_data(self) -> List[Dict]:
         """
@@ -33,10 +413,174 @@ class FileStorage(ABC):
         """
         pass
 
+    def upsert_many(self, data: List[Dict]) -> int:
+        """
+        Inserts new records and replaces stored records that have the same vacancy key.
+        :param data: A list of dictionaries containing the records to upsert.
+        :return: The number of records that were inserted or changed.
+        """
+        changed = 0
+        for item in data:
+            current = self.read_many([vacancy_key(item)])
+            if current and current[0] == item:
+                continue
+            if current:
+                self.delete_data(current[0])
+            self.write_data([item])
+            changed += 1
+        return changed
+
+    def delete_many(self, predicate_or_ids: Union[RecordPredicate, Iterable]) -> int:
+        """
+        Deletes many records in one operation, matched by vacancy key through a hash set
+        or by a predicate. This implementation deletes the matches one by one; the
+        backends override it with a single rewrite or append.
+
+        :param predicate_or_ids: A function receiving a record and returning True for the
+            records to delete, or an iterable of vacancy keys and/or records.
+        :return: The number of deleted records.
+        """
+        keys, predicate = _deletion_target(predicate_or_ids)
+        doomed = [item for item in self.iter_data()
+                  if (vacancy_key(item) in keys if keys is not None else predicate(item))]
+        for item in doomed:
+            self.delete_data(item)
+        return len(doomed)
+
+    def expire_older_than(self, timestamp: Union[datetime, str]) -> int:
+        """
+        Deletes the records published before the given time, e.g. for a nightly cleanup
+        of stale postings. Records without a publication time are kept.
+
+        :param timestamp: The cutoff as a timezone-aware datetime or an hh.ru timestamp string.
+        :return: The number of deleted records.
+        """
+        is_older = _published_before(timestamp)
+        return self.delete_many(lambda item: is_older(item.get('published_at')))
+
+    def query(self, keywords: Optional[List[str]] = None, mode: str = 'any',
+              salary_range: Optional[Tuple[int, int]] = None, top_n: Optional[int] = None,
+              prefix: bool = True) -> List[Dict]:
+        """
+        Selects stored records by keywords and salary range, optionally keeping only the best-paid.
+        Results are served from an LRU cache while the store generation is unchanged; the
+        returned records may be shared with the cache and must not be modified.
+
+        :param keywords: Keywords matched against titles and descriptions (no filtering if empty).
+        :param mode: 'any' to match at least one keyword (OR), 'all' to match every keyword (AND).
+        :param salary_range: A (min, max) tuple: the minimum salary must be >= min and the
+                             maximum salary <= max, in the base currency when available.
+        :param top_n: If given, only the top_n best-paid records are returned, best first.
+        :param prefix: Whether keywords also match words they are a prefix of.
+        :return: The matching records.
+        :raises ValueError: If the mode is unknown.
+        """
+        if mode not in ('any', 'all'):
+            raise ValueError(f"Unknown search mode: {mode}")
+        if not self.query_cache_size:
+            return self._query(keywords, mode, salary_range, top_n, prefix)
+        generation = self.generation()
+        key = (tuple(keywords or ()), mode, tuple(salary_range) if salary_range else None, top_n, prefix)
+        with self._cache_lock:
+            cached = self._query_cache.get(key)
+            if cached is not None and cached[0] == generation:
+                self._query_cache.move_to_end(key)
+                metrics.inc('storage_cache_requests_total', cache='query', result='hit')
+                return list(cached[1])
+        metrics.inc('storage_cache_requests_total', cache='query', result='miss')
+        result = self._query(keywords, mode, salary_range, top_n, prefix)
+        with self._cache_lock:
+            self._query_cache[key] = (generation, tuple(result))
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return result
+
+    def _query(self, keywords: Optional[List[str]], mode: str, salary_range: Optional[Tuple[int, int]],
+               top_n: Optional[int], prefix: bool) -> List[Dict]:
+        """
+        Runs a query (see ``query``) without the result cache.
+
+        This implementation streams the records once and ranks them with a bounded heap;
+        backends with native indexes push the whole query down.
+        """
+        matches = self._iter_snapshot()
+        if keywords:
+            matches = (item for item in matches if _matches_keywords(item, keywords, mode, prefix))
+        if salary_range is not None:
+            min_salary, max_salary = salary_range
+            matches = (
+                item for item in matches
+                for salary_from, salary_to in [salary_bounds(item)]
+                if salary_from is not None and salary_from >= min_salary
+                and salary_to is not None and salary_to <= max_salary
+            )
+        if top_n is None:
+            return list(matches)
+        return heapq.nlargest(top_n, matches, key=_ranking_key)
+
+    def iter_data(self) -> Iterator[Dict]:
+        """
+        Iterates over the stored records. Implementations decode records incrementally
+        so that memory stays bounded regardless of the size of the store.
+        :return: An iterator over the stored records.
+        """
+        yield from self.read_data()
+
+    def _iter_snapshot(self, fill: bool = True) -> Iterator[Dict]:
+        """
+        Iterates over the stored records, from the cached snapshot when the store has not
+        changed since it was taken. Otherwise the records are streamed from ``iter_data``
+        and, with ``fill``, kept as the new snapshot if the iteration completes within
+        ``record_cache_limit``. The records are shared with the cache and must not be modified.
+        :param fill: Whether a streamed iteration may populate the snapshot.
+        :return: An iterator over the stored records.
+        """
+        generation = self.generation()
+        with self._cache_lock:
+            snapshot = self._snapshot if self._snapshot_generation == generation else None
+        if snapshot is not None:
+            metrics.inc('storage_cache_requests_total', cache='records', result='hit')
+            yield from snapshot
+            return
+        metrics.inc('storage_cache_requests_total', cache='records', result='miss')
+        collected = [] if fill and self.record_cache_limit else None
+        for record in self.iter_data():
+            if collected is not None:
+                collected.append(record)
+                if len(collected) > self.record_cache_limit:
+                    collected = None
+            yield record
+        if collected is not None:
+            with self._cache_lock:
+                self._snapshot, self._snapshot_generation = collected, generation
+
+    def iter_vacancies(self) -> Iterator[Vacancy]:
+        """
+        Iterates over the stored records as Vacancy objects, decoding them lazily.
+        Records are validated before they are stored, so they are not validated again.
+        A warm snapshot is reused, but a full listing streams without populating it so
+        that memory stays bounded.
+        :return: An iterator over Vacancy objects.
+        """
+        return Vacancy.from_rows(self._iter_snapshot(fill=False))
+
+    def read_many(self, keys: Iterable[str]) -> List[Dict]:
+        """
+        Reads the records with the given vacancy keys.
+        :param keys: The vacancy keys of the records to read.
+        :return: The matching records in storage order.
+        """
+        wanted = set(keys)
+        return [item for item in self._iter_snapshot() if vacancy_key(item) in wanted]
+
 
 class JSONFileStorage(FileStorage):
     """
     Concrete implementation of the FileStorage class for handling JSON files.
+
+    Every change replaces the file atomically under an exclusive file lock, so a crash
+    never leaves a truncated store and concurrent writer processes do not lose updates.
     """
 
     def __init__(self, filename: str = "data/vacancies.json"):
@@ -44,36 +588,819 @@ class JSONFileStorage(FileStorage):
         Initializes the JSONFileStorage with a specific file name.
         :param filename: The name of the file to be used for storing data. Defaults to 'data/vacancies.json'.
         """
+        super().__init__()
         self._filename = filename
+        self._file_lock = FileLock(filename + '.lock')
 
+    @metrics.timed('storage_operation_seconds', backend='json', operation='read')
     def read_data(self) -> List[Dict]:
         """
         Reads data from a JSON file. If the file does not exist, it returns an empty list.
         :return: A list of dictionaries containing the data from the JSON file.
         """
-        if not os.path.exists(self._filename):
-            return []
-        with open(self._filename, 'r', encoding='utf-8') as file:
-            return json.load(file)
+        with self._file_lock.shared():
+            if not os.path.exists(self._filename):
+                return []
+            with open(self._filename, 'r', encoding='utf-8') as file:
+                metrics.inc('storage_bytes_read_total', os.fstat(file.fileno()).st_size)
+                return json.load(file)
+
+    def _dump(self, data: List[Dict]) -> None:
+        """
+        Atomically replaces the JSON file with the given records.
+        :param data: The complete list of records.
+        """
+        atomic_write(self._filename, lambda file: json.dump(data, file, ensure_ascii=False, indent=4))
 
+    def iter_data(self, chunk_size: int = 65536) -> Iterator[Dict]:
+        """
+        Decodes the records of the JSON array one at a time while reading the file in chunks.
+        :param chunk_size: Number of characters read from the file at once.
+        :return: An iterator over the records of the JSON file.
+        :raises ValueError: If the file is not a JSON array of objects.
+        """
+        with self._file_lock.shared():
+            if not os.path.exists(self._filename):
+                return
+            # files are replaced atomically, so the open file stays consistent without the lock
+            file = open(self._filename, 'r', encoding='utf-8')
+        metrics.inc('storage_bytes_read_total', os.fstat(file.fileno()).st_size)
+        decoder = json.JSONDecoder()
+        with file:
+            buffer = file.read(chunk_size).lstrip()
+            if not buffer:
+                return
+            if buffer[0] != '[':
+                raise ValueError(f"{self._filename} does not contain a JSON array")
+            position = 1
+            eof = False
+            while True:
+                position = _SEPARATORS_RE.match(buffer, position).end()
+                if position < len(buffer) and buffer[position] == ']':
+                    return
+                try:
+                    if position == len(buffer):
+                        raise json.JSONDecodeError("Unexpected end of data", buffer, position)
+                    item, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    chunk = file.read(chunk_size)
+                    eof = not chunk
+                    buffer = buffer[position:] + chunk
+                    position = 0
+                    continue
+                yield item
+                if position >= chunk_size:
+                    buffer = buffer[position:]
+                    position = 0
+
+    @metrics.timed('storage_operation_seconds', backend='json', operation='write')
     def write_data(self, data: List[Dict]) -> None:
         """
         Writes data to a JSON file. If the data already exists, it is not duplicated.
         :param data: A list of dictionaries containing the data to be written to the file.
         """
-        current_data = self.read_data()
-        for item in data:
-            if item not in current_data:
-                current_data.append(item)
-        with open(self._filename, 'w', encoding='utf-8') as file:
-            json.dump(current_data, file, ensure_ascii=False, indent=4)
+        with self._file_lock.exclusive():
+            current_data = self.read_data()
+            added = []
+            for item in data:
+                if item not in current_data:
+                    current_data.append(item)
+                    added.append(item)
+            self._dump(current_data)
+        self._notify_added(added)
 
+    @metrics.timed('storage_operation_seconds', backend='json', operation='upsert')
+    def upsert_many(self, data: List[Dict]) -> int:
+        """
+        Inserts new records and replaces stored records with the same vacancy key,
+        rewriting the JSON file once.
+        :param data: A list of dictionaries containing the records to upsert.
+        :return: The number of records that were inserted or changed.
+        """
+        with self._file_lock.exclusive():
+            current_data = self.read_data()
+            positions = {vacancy_key(item): idx for idx, item in enumerate(current_data)}
+            changed = {}
+            for item in data:
+                key = vacancy_key(item)
+                idx = positions.get(key)
+                if idx is None:
+                    positions[key] = len(current_data)
+                    current_data.append(item)
+                elif current_data[idx] != item:
+                    current_data[idx] = item
+                else:
+                    continue
+                changed[key] = item
+            if changed:
+                self._dump(current_data)
+        self._notify_added(list(changed.values()))
+        return len(changed)
+
+    @metrics.timed('storage_operation_seconds', backend='json', operation='delete')
     def delete_data(self, data: Dict) -> None:
         """
         Deletes specific data from the JSON file.
         :param data: A dictionary containing the data to be deleted.
         """
-        current_data = self.read_data()
-        current_data = [item for item in current_data if item != data]
-        with open(self._filename, 'w', encoding='utf-8') as file:
-            json.dump(current_data, file, ensure_ascii=False, indent=4)
+        with self._file_lock.exclusive():
+            current_data = self.read_data()
+            remaining = [item for item in current_data if item != data]
+            if len(remaining) != len(current_data):
+                self._dump(remaining)
+        if len(remaining) != len(current_data):
+            self._notify_deleted([vacancy_key(data)])
+
+    @metrics.timed('storage_operation_seconds', backend='json', operation='delete_many')
+    def delete_many(self, predicate_or_ids: Union[RecordPredicate, Iterable]) -> int:
+        """
+        Deletes many records with a single rewrite of the file.
+        :param predicate_or_ids: A record predicate, or an iterable of vacancy keys and/or records.
+        :return: The number of deleted records.
+        """
+        keys, predicate = _deletion_target(predicate_or_ids)
+        with self._file_lock.exclusive():
+            remaining = []
+            deleted = []
+            for item in self.read_data():
+                key = vacancy_key(item)
+                if (key in keys) if keys is not None else predicate(item):
+                    deleted.append(key)
+                else:
+                    remaining.append(item)
+            if deleted:
+                self._dump(remaining)
+        self._notify_deleted(deleted)
+        return len(deleted)
+
+
+class JSONLinesStorage(FileStorage):
+    """
+    Append-only implementation of the FileStorage class using the JSON Lines format.
+
+    Writes append one line per new record and deletes append a tombstone line, so the cost
+    of an operation depends on the size of the batch, not on the size of the store.
+    An in-memory index maps every vacancy key (see ``vacancy_key``) to the offset of its
+    live line, which makes deduplication O(1). Lines that are no longer live are dropped
+    by a compaction that runs in a background thread once they outnumber live records.
+
+    Several processes may share one file: writers append under an exclusive file lock and
+    fsync before releasing it, and every operation first catches up with lines appended
+    (or a compaction performed) by other processes since it last looked at the file.
+    """
+
+    def __init__(self, filename: str = "data/vacancies.jsonl", auto_compact: bool = True,
+                 compact_ratio: float = 1.0, compact_min_garbage: int = 1000):
+        """
+        Initializes the JSONLinesStorage and builds the key index from the existing file.
+        :param filename: The name of the file to be used for storing data. Defaults to 'data/vacancies.jsonl'.
+        :param auto_compact: Whether to compact the file in the background when it accumulates dead lines.
+        :param compact_ratio: Dead-to-live line ratio above which a compaction is started.
+        :param compact_min_garbage: Minimum number of dead lines before a compaction is considered.
+        """
+        super().__init__()
+        self._filename = filename
+        self._auto_compact = auto_compact
+        self._compact_ratio = compact_ratio
+        self._compact_min_garbage = compact_min_garbage
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(filename + '.lock')
+        self._index: Dict[str, int] = {}
+        self._garbage = 0
+        self._size = 0
+        self._identity: Optional[Tuple[int, int]] = None
+        self._compactor: Optional[threading.Thread] = None
+        with self._file_lock.exclusive():
+            self._refresh(repair=True)
+
+    def __len__(self) -> int:
+        """Returns the number of live records in the store."""
+        with self._file_lock.shared(), self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def __contains__(self, record: Dict) -> bool:
+        """Checks whether a record with the same vacancy key is stored."""
+        with self._file_lock.shared(), self._lock:
+            self._refresh()
+            return vacancy_key(record) in self._index
+
+    def _refresh(self, repair: bool = False) -> None:
+        """
+        Brings the key index up to date with the file. Lines appended since the last
+        scan are indexed incrementally; if the file was replaced (compacted) or shrank,
+        the index is rebuilt from scratch. Must be called with the file lock held.
+        :param repair: Whether a partially written last line (e.g. after a crash) is
+            truncated; requires the exclusive lock.
+        """
+        with self._lock:
+            try:
+                stat = os.stat(self._filename)
+            except FileNotFoundError:
+                self._index, self._garbage, self._size, self._identity = {}, 0, 0, None
+                return
+            identity = (stat.st_dev, stat.st_ino)
+            if identity != self._identity or stat.st_size < self._size:
+                self._index, self._garbage, self._size = {}, 0, 0
+                self._identity = identity
+            if stat.st_size != self._size:
+                self._scan(repair)
+
+    def _scan(self, repair: bool) -> None:
+        """
+        Indexes the lines that follow the last scanned offset.
+        :param repair: Whether a partially written last line is truncated.
+        """
+        offset = self._size
+        with open(self._filename, 'rb') as file:
+            file.seek(offset)
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                if '_deleted' in record:
+                    if self._index.pop(record['_deleted'], None) is not None:
+                        self._garbage += 1
+                    self._garbage += 1
+                else:
+                    key = vacancy_key(record)
+                    if key in self._index:
+                        self._garbage += 1
+                    self._index[key] = offset
+                offset += len(line)
+        if repair and offset != os.path.getsize(self._filename):
+            with open(self._filename, 'r+b') as file:
+                file.truncate(offset)
+        self._size = offset
+
+    def _append(self, lines: List[bytes]) -> None:
+        """
+        Appends already encoded lines to the end of the file in a single write and
+        flushes them to disk. Must be called with the exclusive file lock held.
+        :param lines: The encoded lines, each terminated by a newline.
+        """
+        directory = os.path.dirname(self._filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        payload = b''.join(lines)
+        with open(self._filename, 'ab') as file:
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+        metrics.inc('storage_bytes_written_total', len(payload))
+        if self._identity is None:
+            stat = os.stat(self._filename)
+            self._identity = (stat.st_dev, stat.st_ino)
+        self._size += len(payload)
+
+    @staticmethod
+    def _encode(record: Dict) -> bytes:
+        """Encodes a record as a single JSON line."""
+        return (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+    @metrics.timed('storage_operation_seconds', backend='jsonl', operation='read')
+    def read_data(self) -> List[Dict]:
+        """
+        Reads the live records from the file, skipping superseded lines and tombstones.
+        :return: A list of dictionaries containing the stored data.
+        """
+        return list(self.iter_data())
+
+    def iter_data(self) -> Iterator[Dict]:
+        """
+        Decodes the live records line by line. The set of live records is captured when
+        iteration starts, so concurrent writes and compactions do not affect the result.
+        :return: An iterator over the stored records.
+        """
+        with self._file_lock.shared(), self._lock:
+            self._refresh()
+            if not self._index:
+                return
+            live = set(self._index.values())
+            file = open(self._filename, 'rb')
+        with file:
+            offset = 0
+            for line in file:
+                if offset in live:
+                    yield json.loads(line)
+                offset += len(line)
+        metrics.inc('storage_bytes_read_total', offset)
+
+    @metrics.timed('storage_operation_seconds', backend='jsonl', operation='read_many')
+    def read_many(self, keys: Iterable[str]) -> List[Dict]:
+        """
+        Reads the records with the given vacancy keys by seeking to their lines.
+        :param keys: The vacancy keys of the records to read.
+        :return: The matching records in storage order.
+        """
+        with self._file_lock.shared(), self._lock:
+            self._refresh()
+            offsets = sorted(self._index[key] for key in set(keys) if key in self._index)
+            if not offsets:
+                return []
+            result = []
+            with open(self._filename, 'rb') as file:
+                for offset in offsets:
+                    file.seek(offset)
+                    line = file.readline()
+                    metrics.inc('storage_bytes_read_total', len(line))
+                    result.append(json.loads(line))
+            return result
+
+    @metrics.timed('storage_operation_seconds', backend='jsonl', operation='write')
+    def write_data(self, data: List[Dict]) -> None:
+        """
+        Appends the records whose vacancy key is not stored yet.
+        :param data: A list of dictionaries containing the data to be written to the file.
+        """
+        with self._file_lock.exclusive(), self._lock:
+            self._refresh(repair=True)
+            lines = []
+            added = []
+            offset = self._size
+            for item in data:
+                key = vacancy_key(item)
+                if key in self._index:
+                    continue
+                line = self._encode(item)
+                self._index[key] = offset
+                offset += len(line)
+                lines.append(line)
+                added.append(item)
+            if lines:
+                self._append(lines)
+        self._notify_added(added)
+
+    @metrics.timed('storage_operation_seconds', backend='jsonl', operation='upsert')
+    def upsert_many(self, data: List[Dict]) -> int:
+        """
+        Appends new records and new versions of changed records; the superseded lines
+        become garbage for the next compaction. Unchanged records are not written.
+        :param data: A list of dictionaries containing the records to upsert.
+        :return: The number of records that were inserted or changed.
+        """
+        with self._file_lock.exclusive(), self._lock:
+            self._refresh(repair=True)
+            lines = []
+            changed = {}
+            offset = self._size
+            reader = open(self._filename, 'rb') if self._index else None
+            try:
+                for item in data:
+                    key = vacancy_key(item)
+                    line = self._encode(item)
+                    if key in changed:
+                        previous = None
+                    elif key in self._index:
+                        reader.seek(self._index[key])
+                        previous = reader.readline()
+                    else:
+                        previous = b''
+                    if line == previous:
+                        continue
+                    if previous != b'':
+                        self._garbage += 1
+                    self._index[key] = offset
+                    offset += len(line)
+                    lines.append(line)
+                    changed[key] = item
+            finally:
+                if reader is not None:
+                    reader.close()
+            if lines:
+                self._append(lines)
+                self._maybe_compact()
+        self._notify_added(list(changed.values()))
+        return len(changed)
+
+    @metrics.timed('storage_operation_seconds', backend='jsonl', operation='delete')
+    def delete_data(self, data: Dict) -> None:
+        """
+        Deletes the record with the same vacancy key by appending a tombstone.
+        :param data: A dictionary containing the data to be deleted.
+        """
+        with self._file_lock.exclusive(), self._lock:
+            self._refresh(repair=True)
+            key = vacancy_key(data)
+            if self._index.pop(key, None) is None:
+                return
+            self._append([self._encode({'_deleted': key})])
+            self._garbage += 2
+            self._maybe_compact()
+        self._notify_deleted([key])
+
+    @metrics.timed('storage_operation_seconds', backend='jsonl', operation='delete_many')
+    def delete_many(self, predicate_or_ids: Union[RecordPredicate, Iterable]) -> int:
+        """
+        Deletes many records by appending all their tombstones in a single write; the
+        space is reclaimed by the next compaction.
+        :param predicate_or_ids: A record predicate, or an iterable of vacancy keys and/or records.
+        :return: The number of deleted records.
+        """
+        keys, predicate = _deletion_target(predicate_or_ids)
+        with self._file_lock.exclusive(), self._lock:
+            self._refresh(repair=True)
+            if keys is not None:
+                deleted = [key for key in keys if key in self._index]
+            else:
+                deleted = [vacancy_key(item) for item in self.iter_data() if predicate(item)]
+            if deleted:
+                for key in deleted:
+                    del self._index[key]
+                self._append([self._encode({'_deleted': key}) for key in deleted])
+                self._garbage += 2 * len(deleted)
+                self._maybe_compact()
+        self._notify_deleted(deleted)
+        return len(deleted)
+
+    def _maybe_compact(self) -> None:
+        """Starts a background compaction if enough dead lines have accumulated."""
+        if not self._auto_compact or self._garbage < self._compact_min_garbage:
+            return
+        if self._garbage <= len(self._index) * self._compact_ratio:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
+
+    def wait_for_compaction(self) -> None:
+        """Blocks until a running background compaction has finished."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    @metrics.timed('storage_operation_seconds', backend='jsonl', operation='compact')
+    def compact(self) -> None:
+        """
+        Rewrites the file so that it only contains live records, then atomically
+        replaces the original file.
+        """
+        with self._file_lock.exclusive(), self._lock:
+            self._refresh(repair=True)
+            if not self._garbage:
+                return
+            live = set(self._index.values())
+            index = {}
+
+            def write(target):
+                offset = 0
+                with open(self._filename, 'rb') as source:
+                    position = 0
+                    for line in source:
+                        if position in live:
+                            index[vacancy_key(json.loads(line))] = offset
+                            target.write(line)
+                            offset += len(line)
+                        position += len(line)
+
+            atomic_write(self._filename, write, binary=True)
+            stat = os.stat(self._filename)
+            self._index = index
+            self._size = stat.st_size
+            self._identity = (stat.st_dev, stat.st_ino)
+            self._garbage = 0
+
+
+class SQLiteStorage(FileStorage):
+    """
+    Implementation of the FileStorage class backed by an SQLite database.
+
+    The database runs in WAL mode so that reader processes can query while a writer
+    ingests. Records are keyed by vacancy key (unique hh.ru id or URL) and inserted in
+    batched transactions. Salary bounds, ranking value and currency are indexed columns
+    and titles and descriptions are indexed by an FTS5 table, so ``query`` runs
+    entirely in SQL.
+    """
+
+    _COLUMNS = ('key', 'title', 'url', 'currency', 'salary_from', 'salary_to',
+                'bound_from', 'bound_to', 'salary_value', 'published_at', 'data')
+    _CHUNK = 500
+
+    def __init__(self, filename: str = "data/vacancies.sqlite3"):
+        """
+        Opens (or creates) the database and its schema.
+        :param filename: The name of the database file. Defaults to 'data/vacancies.sqlite3'.
+        """
+        super().__init__()
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._filename = filename
+        self._lock = threading.RLock()
+        self._connection = self._connect()
+        with self._lock, self._connection:
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS vacancies (
+                    key TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    currency TEXT,
+                    salary_from INTEGER,
+                    salary_to INTEGER,
+                    bound_from INTEGER,
+                    bound_to INTEGER,
+                    salary_value INTEGER NOT NULL,
+                    published_at TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS vacancies_bound_from ON vacancies (bound_from);
+                CREATE INDEX IF NOT EXISTS vacancies_bound_to ON vacancies (bound_to);
+                CREATE INDEX IF NOT EXISTS vacancies_salary_value ON vacancies (salary_value, key);
+                CREATE INDEX IF NOT EXISTS vacancies_currency ON vacancies (currency);
+                CREATE VIRTUAL TABLE IF NOT EXISTS vacancies_fts USING fts5(title, description);
+            """)
+
+    def _external_version(self) -> int:
+        """Returns SQLite's data version, which changes when another connection commits."""
+        with self._lock:
+            return self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens a connection configured for concurrent readers and a single writer."""
+        connection = sqlite3.connect(self._filename, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        """Returns the number of stored records."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM vacancies").fetchone()[0]
+
+    @classmethod
+    def _row(cls, record: Dict) -> Tuple:
+        """Builds the column values of a record."""
+        bound_from, bound_to = salary_bounds(record)
+        return (
+            vacancy_key(record), record['title'], record['url'], record.get('currency'),
+            record.get('salary_from'), record.get('salary_to'), bound_from, bound_to,
+            salary_value(record), record.get('published_at'),
+            json.dumps(record, ensure_ascii=False)
+        )
+
+    def _existing(self, keys: List[str]) -> Dict[str, Tuple[int, str]]:
+        """
+        Looks up stored records by key.
+        :param keys: The vacancy keys.
+        :return: A mapping of key to (rowid, encoded record) for the keys that are stored.
+        """
+        existing = {}
+        for start in range(0, len(keys), self._CHUNK):
+            chunk = keys[start:start + self._CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._connection.execute(
+                f"SELECT key, rowid, data FROM vacancies WHERE key IN ({placeholders})", chunk
+            )
+            for key, rowid, data in rows:
+                existing[key] = (rowid, data)
+        return existing
+
+    def _insert(self, rows: List[Tuple], records: List[Dict]) -> None:
+        """Inserts new rows and their full-text entries."""
+        placeholders = ','.join('?' * len(self._COLUMNS))
+        for row, record in zip(rows, records):
+            cursor = self._connection.execute(
+                f"INSERT INTO vacancies ({','.join(self._COLUMNS)}) VALUES ({placeholders})", row
+            )
+            self._connection.execute(
+                "INSERT INTO vacancies_fts (rowid, title, description) VALUES (?, ?, ?)",
+                (cursor.lastrowid, strip_markup(record['title']), strip_markup(record.get('description') or ''))
+            )
+
+    @metrics.timed('storage_operation_seconds', backend='sqlite', operation='read')
+    def read_data(self) -> List[Dict]:
+        """
+        Reads every stored record in insertion order.
+        :return: A list of dictionaries containing the stored data.
+        """
+        return list(self.iter_data())
+
+    def iter_data(self) -> Iterator[Dict]:
+        """
+        Streams the stored records from a dedicated read connection, so the iteration sees a
+        consistent snapshot while writers keep ingesting.
+        :return: An iterator over the stored records.
+        """
+        with closing(self._connect()) as connection:
+            for (data,) in connection.execute("SELECT data FROM vacancies ORDER BY rowid"):
+                yield json.loads(data)
+
+    @metrics.timed('storage_operation_seconds', backend='sqlite', operation='read_many')
+    def read_many(self, keys: Iterable[str]) -> List[Dict]:
+        """
+        Reads the records with the given vacancy keys.
+        :param keys: The vacancy keys of the records to read.
+        :return: The matching records in storage order.
+        """
+        with self._lock:
+            existing = self._existing(list(set(keys)))
+        return [json.loads(data) for _, data in sorted(existing.values())]
+
+    @metrics.timed('storage_operation_seconds', backend='sqlite', operation='write')
+    def write_data(self, data: List[Dict]) -> None:
+        """
+        Inserts the records whose vacancy key is not stored yet in a single transaction.
+        :param data: A list of dictionaries containing the data to be written.
+        """
+        latest = {}
+        for item in data:
+            latest.setdefault(vacancy_key(item), item)
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                existing = self._existing(list(latest))
+                added = [item for key, item in latest.items() if key not in existing]
+                self._insert([self._row(item) for item in added], added)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        self._notify_added(added)
+
+    @metrics.timed('storage_operation_seconds', backend='sqlite', operation='upsert')
+    def upsert_many(self, data: List[Dict]) -> int:
+        """
+        Inserts new records and replaces changed ones in a single transaction.
+        :param data: A list of dictionaries containing the records to upsert.
+        :return: The number of records that were inserted or changed.
+        """
+        latest = {vacancy_key(item): item for item in data}
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                existing = self._existing(list(latest))
+                changed = []
+                for key, item in latest.items():
+                    row = self._row(item)
+                    if key in existing:
+                        rowid, stored = existing[key]
+                        if json.loads(stored) == item:
+                            continue
+                        self._connection.execute("DELETE FROM vacancies WHERE rowid = ?", (rowid,))
+                        self._connection.execute("DELETE FROM vacancies_fts WHERE rowid = ?", (rowid,))
+                    self._insert([row], [item])
+                    changed.append(item)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        self._notify_added(changed)
+        return len(changed)
+
+    @metrics.timed('storage_operation_seconds', backend='sqlite', operation='delete')
+    def delete_data(self, data: Dict) -> None:
+        """
+        Deletes the record with the same vacancy key.
+        :param data: A dictionary containing the data to be deleted.
+        """
+        key = vacancy_key(data)
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute("SELECT rowid FROM vacancies WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._connection.execute("DELETE FROM vacancies WHERE rowid = ?", row)
+                    self._connection.execute("DELETE FROM vacancies_fts WHERE rowid = ?", row)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        if row is not None:
+            self._notify_deleted([key])
+
+    def _delete_keys(self, select: Callable[[], List[str]]) -> List[str]:
+        """
+        Deletes records and their full-text entries in a single transaction.
+        :param select: Called inside the transaction to choose the keys to delete.
+        :return: The deleted keys.
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                keys = select()
+                for start in range(0, len(keys), self._CHUNK):
+                    chunk = keys[start:start + self._CHUNK]
+                    placeholders = ','.join('?' * len(chunk))
+                    self._connection.execute(
+                        "DELETE FROM vacancies_fts WHERE rowid IN "
+                        f"(SELECT rowid FROM vacancies WHERE key IN ({placeholders}))", chunk
+                    )
+                    self._connection.execute(f"DELETE FROM vacancies WHERE key IN ({placeholders})", chunk)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        self._notify_deleted(keys)
+        return keys
+
+    @metrics.timed('storage_operation_seconds', backend='sqlite', operation='delete_many')
+    def delete_many(self, predicate_or_ids: Union[RecordPredicate, Iterable]) -> int:
+        """
+        Deletes many records in a single transaction.
+        :param predicate_or_ids: A record predicate, or an iterable of vacancy keys and/or records.
+        :return: The number of deleted records.
+        """
+        keys, predicate = _deletion_target(predicate_or_ids)
+        if keys is not None:
+            return len(self._delete_keys(lambda: list(self._existing(list(keys)))))
+        return len(self._delete_keys(lambda: [
+            key for key, data in self._connection.execute("SELECT key, data FROM vacancies").fetchall()
+            if predicate(json.loads(data))
+        ]))
+
+    def expire_older_than(self, timestamp: Union[datetime, str]) -> int:
+        """
+        Deletes the records published before the given time in a single transaction,
+        reading only the key and publication time columns.
+        :param timestamp: The cutoff as a timezone-aware datetime or an hh.ru timestamp string.
+        :return: The number of deleted records.
+        """
+        is_older = _published_before(timestamp)
+        return len(self._delete_keys(lambda: [
+            key for key, published_at in self._connection.execute(
+                "SELECT key, published_at FROM vacancies WHERE published_at IS NOT NULL").fetchall()
+            if is_older(published_at)
+        ]))
+
+    @staticmethod
+    def _match_expression(keywords: List[str], mode: str, prefix: bool) -> Optional[str]:
+        """
+        Translates keywords into an FTS5 MATCH expression.
+        :return: The expression, or None if no keyword contains a token.
+        """
+        clauses = []
+        for keyword in keywords:
+            tokens = tokenize(keyword)
+            if not tokens:
+                continue
+            terms = [f'"{token}"' for token in tokens]
+            if prefix:
+                terms[-1] += '*'
+            clauses.append('(' + ' AND '.join(terms) + ')')
+        if not clauses:
+            return None
+        return (' OR ' if mode == 'any' else ' AND ').join(clauses)
+
+    @metrics.timed('storage_operation_seconds', backend='sqlite', operation='query')
+    def _query(self, keywords: Optional[List[str]], mode: str, salary_range: Optional[Tuple[int, int]],
+               top_n: Optional[int], prefix: bool) -> List[Dict]:
+        """
+        Runs a query (see ``FileStorage.query``) in SQL: keywords through the FTS5 table,
+        salary bounds and ranking through the column indexes.
+        """
+        conditions = []
+        params: List = []
+        if keywords:
+            expression = self._match_expression(keywords, mode, prefix)
+            if expression is None:
+                return []
+            conditions.append("rowid IN (SELECT rowid FROM vacancies_fts WHERE vacancies_fts MATCH ?)")
+            params.append(expression)
+        if salary_range is not None:
+            conditions.append("bound_from >= ? AND bound_to <= ?")
+            params.extend(salary_range)
+        sql = "SELECT data FROM vacancies"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if top_n is not None:
+            sql += " ORDER BY salary_value DESC, key DESC LIMIT ?"
+            params.append(top_n)
+        else:
+            sql += " ORDER BY rowid"
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+
+def open_storage(filename: str = "data/vacancies.jsonl",
+                 legacy_filename: Optional[str] = "data/vacancies.json") -> FileStorage:
+    """
+    Opens a vacancy store, choosing the backend by file extension: SQLite for '.sqlite3'
+    and '.db' files, a JSON array for '.json' files and JSON Lines otherwise.
+
+    :param filename: The store file.
+    :param legacy_filename: JSON file imported into the store when the store is created.
+    :return: The opened storage.
+    """
+    is_new = not os.path.exists(filename)
+    if filename.endswith(('.sqlite3', '.db')):
+        storage = SQLiteStorage(filename)
+    elif filename.endswith('.json'):
+        storage = JSONFileStorage(filename)
+    else:
+        storage = JSONLinesStorage(filename)
+    if is_new and legacy_filename and legacy_filename != filename and os.path.exists(legacy_filename):
+        storage.write_data(JSONFileStorage(legacy_filename).read_data())
+    return storage
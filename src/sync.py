@@ -0,0 +1,166 @@
+import json
+import os
+from typing import Dict, NamedTuple, Optional
+
+from src.api import PRIORITY_BACKGROUND, HeadHunterAPI
+from src.currency import CurrencyConverter
+from src.ingest import IngestPipeline
+from src.storage import FileStorage, atomic_write
+from src.utils import parse_timestamp
+
+
+class SyncState:
+    """
+    Per-query high-water marks of incremental synchronization, persisted as JSON.
+    """
+
+    def __init__(self, filename: Optional[str] = 'data/sync_state.json'):
+        """
+        Loads the state file if it exists.
+        :param filename: The name of the state file (None keeps the state in memory only).
+        """
+        self._filename = filename
+        self._marks: Dict[str, str] = {}
+        if filename and os.path.exists(filename):
+            with open(filename, 'r', encoding='utf-8') as file:
+                self._marks = json.load(file)
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        """Normalizes the case and whitespace of a query."""
+        return ' '.join(query.lower().split())
+
+    def get(self, query: str) -> Optional[str]:
+        """
+        Returns the publication time of the newest vacancy synchronized for a query.
+        :param query: The search query.
+        """
+        return self._marks.get(self._normalize(query))
+
+    def set(self, query: str, timestamp: str) -> None:
+        """
+        Records the high-water mark of a query and saves the state.
+        :param query: The search query.
+        :param timestamp: The publication time of the newest synchronized vacancy.
+        """
+        self._marks[self._normalize(query)] = timestamp
+        self.save()
+
+    def save(self) -> None:
+        """Replaces the state file atomically."""
+        if not self._filename:
+            return
+        atomic_write(self._filename, lambda file: json.dump(self._marks, file, ensure_ascii=False, indent=4))
+
+
+class SyncResult(NamedTuple):
+    """
+    Outcome of synchronizing one query.
+    """
+    query: str
+    fetched: int
+    changed: int
+    high_water_mark: Optional[str]
+    # items skipped because their publication time could not be parsed
+    invalid_time: int = 0
+    # whether more vacancies matched than could be fetched; the high-water mark was not advanced
+    truncated: bool = False
+    # items skipped because they lack required fields or are malformed
+    malformed: int = 0
+    # records skipped because they failed validation (empty title, non-integer salary, bad URL)
+    invalid: int = 0
+
+    @property
+    def skipped(self) -> int:
+        """Returns the number of items skipped for any reason."""
+        return self.invalid_time + self.malformed + self.invalid
+
+
+class IncrementalSync:
+    """
+    Synchronizes search results into a storage, fetching only vacancies published since
+    the previous run of the same query and upserting them by hh.ru vacancy id.
+    """
+
+    def __init__(self, api: HeadHunterAPI, storage: FileStorage, state: SyncState,
+                 converter: Optional[CurrencyConverter] = None, batch_size: int = 500):
+        """
+        Initializes the synchronizer.
+
+        :param api: The API client used to fetch vacancies.
+        :param storage: The storage the vacancies are upserted into.
+        :param state: The high-water marks of previous runs.
+        :param converter: Converter adding base-currency salaries to the records, if any.
+        :param batch_size: Number of records upserted at once.
+        """
+        self._api = api
+        self._storage = storage
+        self._state = state
+        self._converter = converter
+        self._batch_size = batch_size
+
+    def sync(self, query: str, full: bool = False) -> SyncResult:
+        """
+        Fetches the vacancies of a query published since its high-water mark and upserts them.
+
+        The high-water mark itself is requested again (``date_from`` is inclusive), so
+        vacancies published in the same second are not missed; upserting makes the
+        overlap harmless. hh.ru returns at most ``max_results`` vacancies per query, newest
+        first: when a window reaches that depth, its older part is requested again with
+        ``date_to`` set to the oldest vacancy received. If a window cannot be narrowed any
+        further, the result is marked truncated and the high-water mark is left unchanged.
+        Items are parsed and validated like ``IngestPipeline`` does; items that fail either
+        stage or whose publication time cannot be parsed are skipped and counted by reason.
+
+        :param query: The search query.
+        :param full: Whether to ignore the high-water mark and fetch every result.
+        :return: The number of fetched, changed and skipped records and the new high-water mark.
+        :raises ConnectionError: If the API request fails.
+        """
+        date_from = None if full else self._state.get(query)
+        high_water_mark = self._state.get(query)
+        newest = parse_timestamp(high_water_mark) if high_water_mark else None
+        pipeline = IngestPipeline(self._storage, converter=self._converter, upsert=True)
+        parsed = pipeline.stats.parse
+        changed = 0
+        invalid_time = 0
+        truncated = False
+        date_to = None
+        window_end = None
+        batch = []
+        while True:
+            seen = parsed.count + parsed.errors
+            oldest = None
+            oldest_at = None
+            items = self._api.iter_vacancies(query, date_from=date_from, priority=PRIORITY_BACKGROUND,
+                                             date_to=date_to)
+            for record, _ in pipeline.validate(pipeline.parse(items)):
+                published_at = record.get('published_at')
+                try:
+                    published = parse_timestamp(published_at) if published_at else None
+                except ValueError:
+                    invalid_time += 1
+                    continue
+                if published is not None:
+                    if newest is None or published > newest:
+                        newest, high_water_mark = published, published_at
+                    if oldest is None or published < oldest:
+                        oldest, oldest_at = published, published_at
+                batch.append(record)
+                if len(batch) >= self._batch_size:
+                    changed += self._storage.upsert_many(batch)
+                    batch = []
+            if parsed.count + parsed.errors - seen < self._api.max_results:
+                break
+            if oldest is None or (window_end is not None and oldest >= window_end):
+                truncated = True
+                break
+            date_to, window_end = oldest_at, oldest
+        if batch:
+            changed += self._storage.upsert_many(batch)
+        if truncated:
+            high_water_mark = self._state.get(query)
+        elif high_water_mark is not None:
+            self._state.set(query, high_water_mark)
+        return SyncResult(query, parsed.count + parsed.errors, changed, high_water_mark, invalid_time, truncated,
+                          parsed.errors, pipeline.stats.validate.errors)
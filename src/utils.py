@@ -1,3 +1,11 @@
+import re
+from datetime import datetime
+
+_VACANCY_ID_RE = re.compile(r'/vacancy/(\d+)')
+_MARKUP_RE = re.compile(r'<[^>]+>')
+_TOKEN_RE = re.compile(r'\w+')
+_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+
 
 def validate_url(url: str) -> str:
     """
@@ -29,4 +37,108 @@ def parse_salary(salary: dict) -> tuple:
     salary_to = salary.get('to')
     currency = salary.get('currency', 'RUR')
 
-    return (salary_from, salary_to, currency)
\ No newline at end of file
+    return (salary_from, salary_to, currency)
+
+
+def vacancy_key(record: dict) -> str:
+    """
+    Returns the identity key of a stored vacancy record.
+
+    The hh.ru vacancy id is used when present; otherwise the id is taken from the
+    ``/vacancy/<id>`` URL, falling back to the URL itself for non-hh.ru links.
+
+    :param record: The vacancy record (must contain 'id' or 'url').
+    :return: The key used to deduplicate and address the record.
+    """
+    vacancy_id = record.get('id')
+    if vacancy_id is not None:
+        return str(vacancy_id)
+    url = record['url']
+    match = _VACANCY_ID_RE.search(url)
+    return match.group(1) if match else url
+
+
+def parse_vacancy_item(item: dict) -> dict:
+    """
+    Converts a vacancy item of the HeadHunter API response into a storage record.
+
+    :param item: The vacancy dictionary from the API response.
+    :return: A record with id, title, url, salary_from, salary_to, currency, employer,
+             description and published_at.
+    :raises ValueError: If the vacancy URL is invalid.
+    """
+    salary_from, salary_to, currency = parse_salary(item.get('salary'))
+    snippet = item.get('snippet') or {}
+    return {
+        'id': item.get('id'),
+        'title': item['name'],
+        'url': validate_url(item['alternate_url']),
+        'salary_from': salary_from,
+        'salary_to': salary_to,
+        'currency': currency,
+        'employer': (item.get('employer') or {}).get('name'),
+        'description': snippet.get('requirement') or "No description available",
+        'published_at': item.get('published_at')
+    }
+
+
+def strip_markup(text: str) -> str:
+    """
+    Removes markup such as hh.ru's <highlighttext> tags from a text.
+
+    :param text: The text to clean.
+    :return: The text with every tag replaced by a space.
+    """
+    return _MARKUP_RE.sub(' ', text)
+
+
+def tokenize(text: str) -> list:
+    """
+    Splits text into lowercase word tokens, dropping hh.ru's <highlighttext> markup.
+
+    :param text: The text to tokenize.
+    :return: The list of tokens in order of appearance.
+    """
+    if not text:
+        return []
+    return _TOKEN_RE.findall(strip_markup(text).lower())
+
+
+def salary_bounds(record: dict) -> tuple:
+    """
+    Returns the salary bounds used for comparisons: the values converted to the base
+    currency when the record was normalized, otherwise the raw values. A normalized record
+    whose currency could not be converted has no comparable bounds.
+
+    :param record: The vacancy record (or a ``Vacancy``).
+    :return: A tuple with (salary_from, salary_to), either of which may be None.
+    """
+    if 'salary_from_norm' in record or 'salary_to_norm' in record:
+        return (record.get('salary_from_norm'), record.get('salary_to_norm'))
+    return (record.get('salary_from'), record.get('salary_to'))
+
+
+def salary_value(record: dict) -> int:
+    """
+    Returns the value vacancies are ranked by: the maximum salary, else the minimum, else 0.
+
+    :param record: The vacancy record.
+    :return: The ranking value.
+    """
+    salary_from, salary_to = salary_bounds(record)
+    if salary_to is not None:
+        return salary_to
+    if salary_from is not None:
+        return salary_from
+    return 0
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parses an hh.ru timestamp such as '2024-03-01T10:00:00+0300'.
+
+    :param value: The timestamp string.
+    :return: The timezone-aware datetime.
+    :raises ValueError: If the timestamp is malformed.
+    """
+    return datetime.strptime(value, _TIMESTAMP_FORMAT)
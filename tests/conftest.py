@@ -0,0 +1,73 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pytest
+import src.api
+
+
+@pytest.fixture
+def local_server():
+    """Serves GET requests through a replaceable handler function: handler(query) -> (status, headers, body)."""
+    state = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+            status, headers, body = state['handler'](query)
+            payload = json.dumps(body).encode('utf-8') if body is not None else b''
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state['url'] = f"http://127.0.0.1:{server.server_address[1]}/vacancies"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def _make_record(idx, api_item=False, **fields):
+    if api_item:
+        record = {
+            'id': str(idx),
+            'name': f'Developer {idx}',
+            'alternate_url': f'https://hh.ru/vacancy/{idx}',
+            'salary': {'from': 100000, 'to': 150000, 'currency': 'RUR'},
+            'employer': {'name': 'Яндекс'},
+            'snippet': {'requirement': 'Python, Django'},
+            'published_at': '2024-03-01T10:00:00+0300'
+        }
+    else:
+        record = {
+            'id': str(idx),
+            'title': f'Developer {idx}',
+            'url': f'https://hh.ru/vacancy/{idx}',
+            'salary_from': 100000,
+            'salary_to': 150000,
+            'currency': 'RUR',
+            'employer': 'Яндекс',
+            'description': 'Python, Django'
+        }
+    record.update(fields)
+    return record
+
+
+@pytest.fixture
+def make_record():
+    """Builds vacancy idx as a stored record, or as a raw API item with api_item=True; fields override defaults."""
+    return _make_record
+
+
+@pytest.fixture(autouse=True)
+def fresh_default_scheduler(monkeypatch):
+    """Gives every test its own default request scheduler, so rate limits and breaker states do not leak."""
+    monkeypatch.setattr(src.api, '_default_scheduler', None)
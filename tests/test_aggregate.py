@@ -0,0 +1,73 @@
+import time
+import pytest
+from src.aggregate import FacetedAggregator, SalarySummary, aggregate, record_salary
+from src.storage import JSONLinesStorage
+
+
+def test_salary_summary_statistics():
+    summary = SalarySummary()
+    for salary in [300, None, 100, 200, 400]:
+        summary.add(salary)
+    assert (summary.count, summary.salaried, summary.min, summary.max, summary.mean) == (5, 4, 100, 400, 250)
+    assert summary.percentile(50) == 250
+    assert summary.percentile(90) == pytest.approx(370)
+    assert summary.histogram([200, 400]) == [1, 2, 1]
+    summary.remove(400)
+    assert (summary.count, summary.max, summary.percentile(100)) == (4, 300, 300)
+    with pytest.raises(ValueError):
+        summary.percentile(101)
+    assert SalarySummary().as_dict(percentiles=[50])['p50'] is None
+
+
+def test_aggregate_groups_by_currency_employer_and_keyword(make_record):
+    records = [
+        make_record(1, salary_from=100000, salary_to=200000),
+        make_record(2, salary_from=300000, salary_to=None, employer='Ozon', description="Go, Kafka"),
+        make_record(3, salary_from=None, salary_to=2000, currency='USD', employer=None, description="Python and Go"),
+        make_record(4, salary_from=None, salary_to=None, currency=None),
+    ]
+    assert record_salary(records[0]) == 150000
+    stats = aggregate(records, keywords=['Python', 'go'])
+    assert stats.total.count == 4 and stats.total.salaried == 3
+    assert [(group, summary.count) for group, summary in stats.groups('currency')] == [('RUR', 2), ('USD', 1)]
+    assert [group for group, _ in stats.groups('employer')] == ['Яндекс', 'Ozon']
+    assert stats.groups('employer', order_by='mean', limit=1)[0][0] == 'Ozon'
+    keywords = dict(stats.groups('keyword'))
+    assert (keywords['python'].count, keywords['go'].count) == (3, 2)
+    assert keywords['go'].percentile(50) == 151000
+
+    result = stats.to_dict(percentiles=[50], bounds=[200000])
+    assert result['total']['histogram'] == [2, 1]
+    assert result['facets']['currency']['RUR'] == {'count': 2, 'salaried': 2, 'min': 150000, 'max': 300000,
+                                                   'mean': 225000, 'p50': 225000, 'histogram': [1, 1]}
+
+
+def test_attached_aggregator_follows_storage_changes(tmp_path, make_record):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'), auto_compact=False)
+    storage.write_data([make_record(1, salary_from=100000, salary_to=None),
+                        make_record(2, salary_from=200000, salary_to=None, currency='EUR')])
+    stats = FacetedAggregator(keywords=['kafka']).attach(storage)
+
+    storage.write_data([make_record(3, salary_from=300000, salary_to=None, description="Kafka")])
+    storage.upsert_many([make_record(1, salary_from=150000, salary_to=None, employer='Ozon')])
+    assert storage.delete_many(['2']) == 1
+
+    fresh = aggregate(storage.iter_data(), keywords=['kafka'])
+    assert stats.to_dict(bounds=[200000]) == fresh.to_dict(bounds=[200000])
+    assert [group for group, _ in stats.groups('currency')] == ['RUR']
+    assert stats.total.mean == 225000
+
+
+def test_upserts_into_a_large_aggregator_stay_cheap(tmp_path, make_record):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'), auto_compact=False)
+    stats = FacetedAggregator().attach(storage)
+    stats.on_records_added([make_record(idx, salary_from=1000 * idx, salary_to=None) for idx in range(100000)])
+    assert stats.total.percentile(50) == pytest.approx(49999500)
+
+    started = time.perf_counter()
+    for idx in range(1000):
+        stats.on_records_added([make_record(idx, salary_from=5000, salary_to=None, employer='Ozon')])
+    assert time.perf_counter() - started < 1.0
+
+    assert (stats.total.count, stats.total.min, stats.total.max) == (100000, 5000, 99999000)
+    assert dict(stats.groups('employer'))['Ozon'].histogram([5001]) == [1000, 0]
@@ -1,21 +1,12 @@
+import asyncio
 import sys
+import time
 import pytest
+import requests
 import requests_mock
-from src.api import HeadHunterAPI
-
-def test_connect_to_api_success():
-    api = HeadHunterAPI()
-    # Mocking requests.get to simulate API response
-    with requests_mock.Mocker() as m:
-        m.get(api._base_url, status_code=200)
-        assert api._connect_to_api() is None
-
-def test_connect_to_api_failure():
-    api = HeadHunterAPI()
-    with requests_mock.Mocker() as m:
-        m.get(api._base_url, status_code=500)
-        with pytest.raises(ConnectionError):
-            api._connect_to_api()
+import threading
+from src.api import PRIORITY_BACKGROUND, AsyncHeadHunterAPI, HeadHunterAPI, RequestScheduler, default_scheduler
+from src.ratelimit import AdaptiveTokenBucket, CircuitBreaker, CircuitOpenError, ExponentialBackoff
 
 def test_get_vacancies():
     api = HeadHunterAPI()
@@ -26,3 +17,146 @@ def test_get_vacancies():
         assert len(vacancies) == 1
         assert vacancies[0]['name'] == "Developer"
 
+
+def _paged_response(total_pages, per_page):
+    def callback(request, context):
+        page = int(request.qs['page'][0])
+        return {
+            "items": [{"name": f"Developer {page}-{idx}"} for idx in range(per_page)],
+            "page": page,
+            "pages": total_pages
+        }
+    return callback
+
+def test_iter_vacancies_fetches_all_pages_in_order():
+    api = HeadHunterAPI(per_page=3, max_workers=4)
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json=_paged_response(5, 3))
+        names = [vac['name'] for vac in api.iter_vacancies("Developer")]
+    assert len(names) == 15
+    assert names[:4] == ["Developer 0-0", "Developer 0-1", "Developer 0-2", "Developer 1-0"]
+    assert names[-1] == "Developer 4-2"
+    assert m.call_count == 5
+
+def test_iter_vacancies_respects_max_pages_and_depth():
+    api = HeadHunterAPI(per_page=100)
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json=_paged_response(50, 1))
+        assert len(api.get_vacancies("Developer", max_pages=3)) == 3
+        assert len(api.get_vacancies("Developer")) == HeadHunterAPI.MAX_DEPTH // 100
+
+def test_iter_vacancies_requests_first_pages_together():
+    api = HeadHunterAPI(per_page=2, max_workers=4, prefetch_pages=4)
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json=_paged_response(2, 2))
+        assert len(api.get_vacancies("Developer")) == 4
+        # pages past the count are cancelled if they have not been sent yet
+        assert {0, 1} <= {int(request.qs['page'][0]) for request in m.request_history} <= {0, 1, 2, 3}
+
+        m.reset_mock()
+        assert len(api.get_vacancies("Developer", max_pages=1)) == 2
+        assert m.call_count == 1
+
+    with pytest.raises(ValueError):
+        HeadHunterAPI(per_page=0)
+
+def test_clients_share_the_default_scheduler():
+    interactive, background = HeadHunterAPI(), HeadHunterAPI(per_page=10)
+    assert interactive._scheduler is background._scheduler is default_scheduler()
+    scheduler = RequestScheduler(2)
+    assert HeadHunterAPI(scheduler=scheduler)._scheduler is scheduler
+
+def test_iter_vacancies_raises_on_failed_page():
+    api = HeadHunterAPI(per_page=1)
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json=_paged_response(3, 1))
+        m.get(api._base_url + "?page=2", status_code=500)
+        with pytest.raises(ConnectionError):
+            list(api.iter_vacancies("Developer"))
+
+def _collect_many(api, queries, **kwargs):
+    async def collect():
+        return [pair async for pair in api.get_vacancies_many(queries, **kwargs)]
+    return asyncio.run(collect())
+
+def test_get_vacancies_many_runs_queries_concurrently(local_server):
+    def handler(query):
+        time.sleep(0.2)
+        return 200, {}, {"items": [{"name": f"{query['text']} {idx}"} for idx in range(2)], "pages": 1}
+
+    local_server['handler'] = handler
+    api = AsyncHeadHunterAPI(per_page=2, max_per_host=10, requests_per_second=100,
+                             base_url=local_server['url'])
+    queries = [f"query{idx}" for idx in range(8)]
+    started = time.monotonic()
+    pairs = _collect_many(api, queries)
+    elapsed = time.monotonic() - started
+    api.close()
+
+    assert len(pairs) == 16
+    assert {query for query, _ in pairs} == set(queries)
+    assert all(vacancy['name'].startswith(query) for query, vacancy in pairs)
+    assert elapsed < 0.2 * len(queries) / 2
+
+def test_get_vacancies_many_fetches_all_pages_and_propagates_errors():
+    api = AsyncHeadHunterAPI(per_page=3, requests_per_second=100)
+    with requests_mock.Mocker() as m:
+        m.get(api._api._base_url, json=_paged_response(4, 3))
+        assert len(asyncio.run(api.get_vacancies("Developer"))) == 12
+
+        m.get(api._api._base_url + "?text=broken", status_code=503)
+        with pytest.raises(ConnectionError):
+            _collect_many(api, ["Developer", "broken"])
+    api.close()
+
+def test_iter_vacancies_survives_throttling(local_server):
+    attempts = {}
+    lock = threading.Lock()
+
+    def handler(query):
+        with lock:
+            attempts[query['page']] = attempts.get(query['page'], 0) + 1
+            if attempts[query['page']] <= 2:
+                return 429, {'Retry-After': '0'}, {'errors': [{'type': 'too_many_requests'}]}
+        items = [{"name": f"Developer {query['page']}-{idx}"} for idx in range(2)]
+        return 200, {}, {"items": items, "pages": 5}
+
+    local_server['handler'] = handler
+    scheduler = RequestScheduler(4, rate_limiter=AdaptiveTokenBucket(200, min_rate=50),
+                                 backoff=ExponentialBackoff(base=0.01))
+    api = HeadHunterAPI(per_page=2, base_url=local_server['url'], scheduler=scheduler)
+    names = [vac['name'] for vac in api.iter_vacancies("Developer")]
+    assert names == [f"Developer {page}-{idx}" for page in range(5) for idx in range(2)]
+    assert all(count == 3 for count in attempts.values())
+    assert scheduler.rate_limiter.rate < 200
+
+def test_scheduler_gives_up_and_opens_circuit_on_persistent_errors(local_server):
+    local_server['handler'] = lambda query: (503, {}, None)
+    slept = []
+    scheduler = RequestScheduler(1, backoff=ExponentialBackoff(max_retries=2),
+                                 breaker=CircuitBreaker(failure_threshold=4), sleep=slept.append)
+    api = HeadHunterAPI(per_page=2, prefetch_pages=1, base_url=local_server['url'], scheduler=scheduler)
+    with pytest.raises(ConnectionError, match='503'):
+        api.get_vacancies("Developer")
+    assert len(slept) == 2
+    with pytest.raises(CircuitOpenError):
+        api.get_vacancies("Developer")
+    assert scheduler.breaker.state == 'open'
+
+def _response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return response
+
+def test_scheduler_sends_interactive_requests_before_background_ones():
+    scheduler = RequestScheduler(1)
+    release = threading.Event()
+    order = []
+    blocker = scheduler.submit(lambda: release.wait() and _response(200))
+    futures = [scheduler.submit(lambda name=name: order.append(name) or _response(200), priority)
+               for name, priority in [('backfill-1', PRIORITY_BACKGROUND), ('backfill-2', PRIORITY_BACKGROUND),
+                                      ('search', 0)]]
+    release.set()
+    for future in [blocker] + futures:
+        assert future.result(timeout=5).status_code == 200
+    assert order == ['search', 'backfill-1', 'backfill-2']
@@ -0,0 +1,50 @@
+import pytest
+from src.batch import StringPool, VacancyBatch
+from src.models import Vacancy
+
+
+RECORDS = [
+    {'title': 'Python Developer', 'url': 'https://hh.ru/vacancy/1', 'salary_from': 100000,
+     'salary_to': 150000, 'currency': 'RUR', 'description': 'Python, Django'},
+    {'title': 'Аналитик', 'url': 'https://hh.ru/vacancy/2', 'salary_from': None,
+     'salary_to': 3000, 'currency': 'USD', 'description': 'SQL, <highlighttext>Python</highlighttext>'},
+    {'title': 'Go Developer', 'url': 'https://hh.ru/vacancy/3', 'salary_from': 120000,
+     'salary_to': None, 'currency': 'RUR', 'description': 'Go, Kubernetes'},
+    {'title': 'QA', 'url': 'https://hh.ru/vacancy/4', 'salary_from': None,
+     'salary_to': None, 'currency': 'RUR', 'description': 'Тестирование'},
+]
+
+
+def test_string_pool_round_trip():
+    pool = StringPool()
+    for value in ['', 'abc', 'Привет']:
+        pool.append(value)
+    assert [pool[idx] for idx in range(len(pool))] == ['', 'abc', 'Привет']
+
+
+def test_batch_round_trips_records_and_materializes_vacancies():
+    batch = VacancyBatch.from_records(RECORDS)
+    assert len(batch) == 4
+    assert [batch.record(row) for row in range(len(batch))] == RECORDS
+    vacancy = next(batch.vacancies([1]))
+    assert isinstance(vacancy, Vacancy)
+    assert vacancy.title == 'Аналитик'
+    assert vacancy.salary_from is None
+
+
+def test_batch_filters_and_sorts_columns():
+    batch = VacancyBatch.from_records(RECORDS)
+    assert batch.filter_salary(90000, 150000) == [0]
+    assert batch.filter_currency('RUR') == [0, 2, 3]
+    assert batch.filter_currency('EUR') == []
+    assert batch.filter_keywords(['python']) == [0, 1]
+    assert batch.filter_keywords(['kubernetes', 'тестирование']) == [2, 3]
+    assert batch.argsort_salary() == [0, 2, 1, 3]
+    assert batch.top(2, rows=batch.filter_currency('RUR')) == [0, 2]
+
+
+def test_batch_encodes_more_than_256_currencies():
+    records = [dict(RECORDS[0], currency=f'C{idx}') for idx in range(300)]
+    batch = VacancyBatch.from_records(records)
+    assert batch.currency(299) == 'C299'
+    assert batch.filter_currency('C280') == [280]
@@ -0,0 +1,30 @@
+import pytest
+from benchmarks.generator import generate_items, generate_pages
+from benchmarks.run import compare
+from src.utils import parse_vacancy_item
+
+
+def test_generator_is_deterministic_and_hh_shaped():
+    items = list(generate_items(50, seed=3))
+    assert items == list(generate_items(50, seed=3))
+    assert len({item['id'] for item in items}) == 50
+    records = [parse_vacancy_item(item) for item in items]
+    assert all(record['url'].startswith('https://hh.ru/vacancy/') for record in records)
+    pages = generate_pages(250, per_page=100)
+    assert [len(page['items']) for page in pages] == [100, 100, 50]
+    assert pages[0]['pages'] == 3
+
+
+def _results(seconds, peak, records=100):
+    return {'meta': {'records': records, 'json_records': 10},
+            'cases': {'sort_vacancies': {'seconds': seconds, 'peak_bytes': peak}}}
+
+
+def test_compare_reports_time_and_memory_regressions():
+    baseline = _results(1.0, 1000)
+    assert compare(_results(1.2, 1050), baseline, tolerance=0.25, memory_tolerance=0.1) == []
+    regressions = compare(_results(1.5, 2000), baseline, tolerance=0.25, memory_tolerance=0.1)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('sort_vacancies: 1.5000s')
+    with pytest.raises(ValueError):
+        compare(_results(1.0, 1000, records=200), baseline, tolerance=0.25, memory_tolerance=0.1)
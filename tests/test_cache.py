@@ -0,0 +1,67 @@
+import pytest
+import requests_mock
+from src.api import HeadHunterAPI
+from src.cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_make_key_normalizes_parameters():
+    url = 'https://api.hh.ru/vacancies'
+    key = ResponseCache.make_key(url, {'text': 'Python  Developer', 'page': 0, 'per_page': 100})
+    assert key == ResponseCache.make_key(url, {'per_page': '100', 'page': '0', 'text': ' python developer'})
+    assert key != ResponseCache.make_key(url, {'text': 'python developer', 'page': 1, 'per_page': 100})
+
+
+def test_cache_persists_and_evicts_least_recently_used(tmp_path):
+    clock = FakeClock()
+    filename = str(tmp_path / 'cache.sqlite3')
+    cache = ResponseCache(filename, max_bytes=60, clock=clock)
+    body = b'x' * 1000
+    for key in ('a', 'b', 'c'):
+        clock.now += 1
+        cache.put(key, body, etag=f'"{key}"')
+    clock.now += 1
+    assert cache.get('a').etag == '"a"'
+    clock.now += 1
+    cache.put('d', body)
+    cache.close()
+
+    reopened = ResponseCache(filename, max_bytes=60, clock=clock)
+    assert reopened.get('b') is None
+    assert reopened.get('a').body == body
+    assert reopened.get('d').body == body
+    assert len(reopened) < 4
+
+
+def test_api_serves_fresh_hits_and_revalidates_stale_entries(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite3'), ttl=60, clock=clock)
+    api = HeadHunterAPI(cache=cache, prefetch_pages=1)
+    page = {"items": [{"name": "Developer"}], "pages": 1}
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json=page, headers={'ETag': '"v1"'})
+        assert api.get_vacancies("Developer") == page['items']
+        assert api.get_vacancies("developer") == page['items']
+        assert m.call_count == 1
+
+        clock.now += 61
+        m.get(api._base_url, status_code=304)
+        assert api.get_vacancies("Developer") == page['items']
+        assert m.call_count == 2
+        assert m.last_request.headers['If-None-Match'] == '"v1"'
+
+        assert api.get_vacancies("Developer") == page['items']
+        assert m.call_count == 2
+
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 2
+    assert stats['revalidated'] == 1
+    assert stats['hit_rate'] == 0.5
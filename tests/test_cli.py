@@ -0,0 +1,105 @@
+import io
+import json
+import subprocess
+import sys
+import pytest
+from src.cli import main
+
+
+def _handler(query):
+    page = int(query['page'])
+    items = [{
+        'id': f"{query['text']}{page}{idx}",
+        'name': f"{query['text']} developer {page}-{idx}",
+        'alternate_url': f"https://hh.ru/vacancy/{len(query['text'])}{page}{idx}",
+        'salary': {'from': 100000 + 10000 * idx, 'to': 120000 + 10000 * idx, 'currency': 'RUR'},
+        'snippet': {'requirement': f"{query['text']} experience"},
+    } for idx in range(int(query['per_page']) if page < 2 else 0)]
+    return 200, {}, {'items': items, 'pages': 2}
+
+
+def test_importing_cli_does_not_import_requests():
+    code = "import sys, src.cli; print('requests' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'
+
+
+def test_fetch_streams_and_stores_then_query_reads_back(tmp_path, local_server):
+    local_server['handler'] = _handler
+    store = str(tmp_path / 'vacancies.jsonl')
+    output = io.StringIO()
+    status = main(['fetch', '-q', 'python', '-q', 'go', '--pages', 'all', '--workers', '2', '--store', store,
+                   '--no-cache', '--no-convert', '--base-url', local_server['url']], output)
+    assert status == 0
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert len(records) == 2 * 2 * 100
+    assert {record['title'].split()[0] for record in records} == {'python', 'go'}
+
+    output = io.StringIO()
+    assert main(['query', '--keywords', 'go', '--salary', '100000-150000', '--top', '3', '--store', store,
+                 '--format', 'text'], output) == 0
+    lines = output.getvalue().splitlines()
+    assert [line.split('\t')[1] for line in lines] == ['130000-150000 RUR', '130000-150000 RUR', '120000-140000 RUR']
+    assert all(line.startswith('go developer') for line in lines)
+
+
+def test_invalid_arguments_are_rejected():
+    with pytest.raises(SystemExit):
+        main(['query', '--salary', 'lots'])
+    with pytest.raises(SystemExit):
+        main(['fetch', '-q', 'python', '--pages', '0'])
+
+
+def test_ingest_stores_dump_lines_with_worker_processes(tmp_path):
+    dump = tmp_path / 'dump.jsonl'
+    pages = [_handler({'text': 'rust', 'page': page, 'per_page': 20}) for page in range(2)]
+    lines = [json.dumps(body) for _, _, body in pages] + ['', '{broken']
+    dump.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    store = str(tmp_path / 'vacancies.jsonl')
+    output = io.StringIO()
+    assert main(['ingest', str(dump), '--workers', '2', '--shard-size', '1', '--store', store, '--no-convert',
+                 '--echo'], output) == 0
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [record['id'] for record in records] == [f"rust{page}{idx}" for page in range(2) for idx in range(20)]
+
+    output = io.StringIO()
+    assert main(['query', '--keywords', 'rust', '--store', store], output) == 0
+    assert len(output.getvalue().splitlines()) == 40
+
+
+def test_snapshot_converts_store_and_back(tmp_path):
+    store = tmp_path / 'vacancies.jsonl'
+    records = [{'id': str(idx), 'title': f"Python {idx}", 'url': f"https://hh.ru/vacancy/{idx}"} for idx in range(5)]
+    store.write_text(''.join(json.dumps(record) + '\n' for record in records), encoding='utf-8')
+    snapshot, restored = str(tmp_path / 'vacancies.snap'), tmp_path / 'vacancies.json'
+    assert main(['snapshot', str(store), snapshot]) == 0
+    assert main(['snapshot', snapshot, str(restored)]) == 0
+    assert json.loads(restored.read_text(encoding='utf-8')) == records
+    assert main(['snapshot', str(restored), str(store)]) == 1
+
+
+def test_stats_prints_groups(tmp_path):
+    store = tmp_path / 'vacancies.jsonl'
+    records = [{'id': str(idx), 'title': f"Python {idx}", 'url': f"https://hh.ru/vacancy/{idx}",
+                'salary_from': 100000 * (idx + 1), 'salary_to': None, 'currency': 'RUR' if idx else 'USD'}
+               for idx in range(3)]
+    store.write_text(''.join(json.dumps(record) + '\n' for record in records), encoding='utf-8')
+    output = io.StringIO()
+    assert main(['stats', '--by', 'currency', '--percentiles', '50', '--store', str(store)], output) == 0
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [(row['facet'], row['group'], row['count'], row['p50']) for row in rows] == [
+        ('total', None, 3, 200000), ('currency', 'RUR', 2, 250000), ('currency', 'USD', 1, 100000)]
+    assert main(['stats', '--by', 'keyword', '--store', str(store)], output) == 1
+
+
+def test_rank_orders_by_weighted_score(tmp_path):
+    store = tmp_path / 'vacancies.jsonl'
+    records = [{'id': str(idx), 'title': title, 'url': f"https://hh.ru/vacancy/{idx}", 'salary_from': salary,
+                'salary_to': None, 'currency': 'RUR', 'description': "Backend"}
+               for idx, (title, salary) in enumerate([("Python", 100000), ("Java", 300000), ("Python Kafka", 200000)])]
+    store.write_text(''.join(json.dumps(record) + '\n' for record in records), encoding='utf-8')
+    output = io.StringIO()
+    assert main(['rank', '--keywords', 'python', '--match', '--weights', 'salary=1', 'relevance=0', 'recency=0',
+                 '--store', str(store)], output) == 0
+    assert [json.loads(line)['id'] for line in output.getvalue().splitlines()] == ['2', '0']
+    assert main(['rank', '--weights', 'popularity=1', '--store', str(store)], output) == 1
@@ -0,0 +1,110 @@
+import json
+import pytest
+import requests_mock
+from src.currency import CurrencyConverter
+from src.index import SalaryIndex
+from src.models import Vacancy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_convert_uses_rates_relative_to_rouble():
+    converter = CurrencyConverter(rates_file=None, fetch_remote=False)
+    converter.set_rates({'RUR': 1.0, 'USD': 0.01, 'KZT': 5.0})
+    assert converter.convert(1000, 'USD') == 100000
+    assert converter.convert(500000, 'KZT') == 100000
+    assert converter.convert(None, 'USD') is None
+    assert converter.convert(1000, 'XYZ') is None
+
+    usd = CurrencyConverter(base_currency='USD', rates_file=None, fetch_remote=False)
+    usd.set_rates({'RUR': 1.0, 'USD': 0.01})
+    assert usd.convert(100000, 'RUR') == 1000
+
+
+def test_rates_are_cached_with_ttl(tmp_path):
+    clock = FakeClock()
+    rates_file = str(tmp_path / 'rates.json')
+    converter = CurrencyConverter(rates_file=rates_file, ttl=60, clock=clock)
+    dictionaries = {'currency': [{'code': 'RUR', 'rate': 1.0}, {'code': 'USD', 'rate': 0.01}]}
+    with requests_mock.Mocker() as m:
+        m.get(CurrencyConverter.DICTIONARIES_URL, json=dictionaries)
+        assert converter.convert(10, 'USD') == 1000
+        assert converter.convert(20, 'USD') == 2000
+        assert m.call_count == 1
+
+        reloaded = CurrencyConverter(rates_file=rates_file, ttl=60, clock=clock)
+        assert reloaded.convert(10, 'USD') == 1000
+        assert m.call_count == 1
+
+        clock.now += 61
+        dictionaries['currency'][1]['rate'] = 0.02
+        m.get(CurrencyConverter.DICTIONARIES_URL, json=dictionaries)
+        assert converter.convert(10, 'USD') == 500
+        assert m.call_count == 2
+    with open(rates_file, encoding='utf-8') as file:
+        assert json.load(file)['rates']['USD'] == 0.02
+
+
+def test_stale_rates_are_kept_when_refresh_fails(tmp_path):
+    clock = FakeClock()
+    converter = CurrencyConverter(rates_file=None, ttl=60, clock=clock)
+    converter.set_rates({'RUR': 1.0, 'USD': 0.01})
+    clock.now += 120
+    with requests_mock.Mocker() as m:
+        m.get(CurrencyConverter.DICTIONARIES_URL, status_code=503)
+        assert converter.convert(10, 'USD') == 1000
+
+
+def test_failed_fetch_is_not_retried_before_the_retry_interval():
+    clock = FakeClock()
+    converter = CurrencyConverter(rates_file=None, ttl=60, clock=clock, retry_interval=30)
+    with requests_mock.Mocker() as m:
+        m.get(CurrencyConverter.DICTIONARIES_URL, status_code=500)
+        assert all(converter.convert(10, 'USD') is None for _ in range(100))
+        assert m.call_count == 1
+        assert m.last_request.timeout == 10.0
+
+        clock.now += 31
+        m.get(CurrencyConverter.DICTIONARIES_URL, json={'currency': [{'code': 'RUR', 'rate': 1.0},
+                                                                     {'code': 'USD', 'rate': 0.01}]})
+        assert converter.convert(10, 'USD') == 1000
+        assert m.call_count == 2
+
+
+def test_normalized_salaries_drive_ranking():
+    converter = CurrencyConverter(rates_file=None, fetch_remote=False)
+    converter.set_rates({'RUR': 1.0, 'USD': 0.01, 'KZT': 5.0})
+    records = [
+        converter.normalize_record({'title': 'KZT', 'url': 'https://hh.ru/vacancy/1', 'salary_from': 700000,
+                                    'salary_to': 1300000, 'currency': 'KZT', 'description': 'Go'}),
+        converter.normalize_record({'title': 'USD', 'url': 'https://hh.ru/vacancy/2', 'salary_from': 3000,
+                                    'salary_to': None, 'currency': 'USD', 'description': 'Go'}),
+        converter.normalize_record({'title': 'RUR', 'url': 'https://hh.ru/vacancy/3', 'salary_from': 200000,
+                                    'salary_to': 280000, 'currency': 'RUR', 'description': 'Go'}),
+    ]
+    index = SalaryIndex()
+    index.add_records(records)
+    assert index.top(3) == ['2', '3', '1']
+    assert index.range(100000, 300000) == {'1', '3'}
+
+    vacancies = [Vacancy.from_record(record) for record in records]
+    assert max(vacancies).title == 'USD'
+    assert min(vacancies).title == 'KZT'
+
+
+def test_unknown_currencies_are_left_out_of_comparisons():
+    converter = CurrencyConverter(rates_file=None, fetch_remote=False)
+    converter.set_rates({'RUR': 1.0, 'USD': 0.01})
+    record = converter.normalize_record({'title': 'KZT', 'url': 'https://hh.ru/vacancy/1', 'salary_from': 700000,
+                                         'salary_to': None, 'currency': 'KZT', 'description': 'Go'})
+    assert (record['salary_from_norm'], record['salary_to_norm']) == (None, None)
+    index = SalaryIndex()
+    index.add_records([record])
+    assert index.range(100000, 1000000) == set()
+    assert Vacancy.from_record(record) < Vacancy('RUR', 'https://hh.ru/vacancy/2', 1, None, 'RUR', 'Go')
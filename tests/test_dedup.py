@@ -0,0 +1,79 @@
+import pytest
+from src.dedup import LSHIndex, MinHasher, NearDuplicateDetector, deduplicate_storage, shingles, similarity
+from src.ingest import IngestPipeline
+from src.storage import JSONLinesStorage
+
+DESCRIPTION = ("Опыт коммерческой разработки на <highlighttext>Python</highlighttext> от 3 лет, "
+               "знание Django и PostgreSQL, понимание принципов REST, опыт работы с Docker и Kubernetes")
+POSTING = {'title': 'Python Developer', 'description': DESCRIPTION}
+
+
+def test_minhash_estimates_jaccard_similarity():
+    hasher = MinHasher(num_perm=128)
+    first = shingles(DESCRIPTION)
+    second = shingles(DESCRIPTION + ' и Kafka')
+    jaccard = len(first & second) / len(first | second)
+    assert abs(similarity(hasher.signature(first), hasher.signature(second)) - jaccard) < 0.15
+    assert hasher.signature(first) == MinHasher(num_perm=128).signature(first)
+    assert shingles('Go') == shingles('go') != set()
+
+
+def test_lsh_index_add_remove_and_query():
+    hasher = MinHasher()
+    index = LSHIndex(64, 16)
+    index.add('1', hasher.signature(shingles(DESCRIPTION)))
+    index.add('2', hasher.signature(shingles('Ведущий бухгалтер, 1С, отчётность')))
+    matches = index.query(hasher.signature(shingles(DESCRIPTION + ' и Kafka')), 0.7)
+    assert [key for _, key in matches] == ['1']
+    index.remove('1')
+    assert index.query(hasher.signature(shingles(DESCRIPTION)), 0.7) == []
+    assert len(index) == 1
+    with pytest.raises(ValueError):
+        LSHIndex(64, 10)
+
+
+def test_detector_keeps_first_record_canonical(make_record):
+    detector = NearDuplicateDetector()
+    duplicates = detector.find_duplicates([
+        make_record(1, **POSTING), make_record(2, title='Python Developer', description=DESCRIPTION + ' и Kafka'),
+        make_record(3, title='Accountant', description='1C'), make_record(1, **POSTING),
+    ])
+    assert duplicates == {'2': '1'}
+
+
+def test_ingest_collapses_or_flags_near_duplicates(tmp_path, make_record):
+    postings = [(1, 'Python Developer', DESCRIPTION), (2, 'Python Developer', DESCRIPTION.replace('3', '5')),
+                (3, 'Go Developer', 'Go, gRPC')]
+    items = [make_record(idx, api_item=True, name=name, snippet={'requirement': description})
+             for idx, name, description in postings]
+    storage = JSONLinesStorage(str(tmp_path / 'collapse.jsonl'))
+    pipeline = IngestPipeline(storage, dedup=NearDuplicateDetector().attach(storage))
+    pipeline.run(items)
+    assert sorted(record['id'] for record in storage.read_data()) == ['1', '3']
+    assert pipeline.stats.duplicates == 1
+
+    storage = JSONLinesStorage(str(tmp_path / 'flag.jsonl'))
+    IngestPipeline(storage, dedup=NearDuplicateDetector(), dedup_mode='flag').run(items)
+    assert {record['id']: record.get('duplicate_of') for record in storage.read_data()} == \
+        {'1': None, '2': '1', '3': None}
+
+
+@pytest.mark.parametrize('mode', ['collapse', 'flag'])
+def test_deduplicate_storage(tmp_path, mode, make_record):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    storage.write_data([make_record(1, **POSTING), make_record(2, title='Python developer', description=DESCRIPTION),
+                        make_record(3, title='Go Developer', description='Go, gRPC')])
+    assert deduplicate_storage(storage, mode) == {'2': '1'}
+    if mode == 'collapse':
+        assert [record['id'] for record in storage.read_data()] == ['1', '3']
+    else:
+        assert storage.read_many(['2'])[0]['duplicate_of'] == '1'
+        assert deduplicate_storage(storage, mode) == {}
+
+
+def test_identical_text_of_different_employers_is_not_a_duplicate(tmp_path, make_record):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    storage.write_data([make_record(1, **POSTING), make_record(2, employer='Ozon', **POSTING),
+                        make_record(3, employer=' ozon ', **POSTING)])
+    assert deduplicate_storage(storage, 'collapse') == {'3': '2'}
+    assert [record['id'] for record in storage.read_data()] == ['1', '2']
@@ -0,0 +1,84 @@
+import pytest
+from src.index import KeywordIndex, SalaryIndex, tokenize, top_n
+from src.storage import JSONLinesStorage
+
+
+def test_tokenize_strips_highlight_markup():
+    text = "Опыт работы с <highlighttext>Python</highlighttext>/Django, SQL."
+    assert tokenize(text) == ['опыт', 'работы', 'с', 'python', 'django', 'sql']
+
+
+def test_keyword_search_modes_and_prefix(make_record):
+    index = KeywordIndex()
+    index.add_records([
+        make_record(1, title='Python Developer', description='Django, PostgreSQL'),
+        make_record(2, title='Data Analyst', description='Python, pandas'),
+        make_record(3, title='Frontend Developer', description='React, TypeScript')
+    ])
+    assert index.search(['python']) == {'1', '2'}
+    assert index.search(['python', 'react']) == {'1', '2', '3'}
+    assert index.search(['python', 'django'], mode='all') == {'1'}
+    assert index.search(['postgres']) == set()
+    assert index.search(['postgres', 'type'], prefix=True) == {'1', '3'}
+    assert index.search(['data analyst'], mode='all') == {'2'}
+    with pytest.raises(ValueError):
+        index.search(['python'], mode='xor')
+
+
+def test_index_follows_storage_changes(tmp_path, make_record):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    storage.write_data([make_record(1, title='Python Developer', description='Django')])
+    index = KeywordIndex().attach(storage)
+
+    storage.write_data([make_record(2, title='Go Developer', description='Kubernetes')])
+    assert index.search(['developer']) == {'1', '2'}
+    storage.delete_data(make_record(1, title='Python Developer', description='Django'))
+    assert index.search(['developer']) == {'2'}
+    assert index.search(['pyth'], prefix=True) == set()
+    assert [item['title'] for item in storage.read_many(index.search(['kubernetes']))] == ['Go Developer']
+
+
+def test_index_save_and_load(tmp_path, make_record):
+    index = KeywordIndex()
+    index.add_records([make_record(1, title='Python Developer', description='Django')])
+    filename = str(tmp_path / 'index.json')
+    index.save(filename)
+
+    loaded = KeywordIndex.load(filename)
+    assert len(loaded) == 1
+    assert loaded.search(['djan'], prefix=True) == {'1'}
+
+
+SALARIES = [(100000, 150000), (90000, 140000), (120000, None), (None, 200000), (None, None), (80000, 110000)]
+
+
+def test_salary_range_matches_linear_filter(make_record):
+    index = SalaryIndex()
+    records = [make_record(idx, salary_from=low, salary_to=high) for idx, (low, high) in enumerate(SALARIES * 4)]
+    index.add_records(records)
+    index.add_records(records)
+    assert len(index) == len(records)
+    for min_salary, max_salary in [(0, 10 ** 9), (90000, 150000), (95000, 150000), (100000, 110000)]:
+        expected = {
+            str(idx) for idx, (low, high) in enumerate(SALARIES * 4)
+            if low is not None and low >= min_salary and high is not None and high <= max_salary
+        }
+        assert index.range(min_salary, max_salary) == expected
+
+
+def test_salary_top_and_incremental_updates(tmp_path, make_record):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    storage.write_data([make_record(idx, salary_from=low, salary_to=high) for idx, (low, high) in enumerate(SALARIES)])
+    index = SalaryIndex().attach(storage)
+    assert index.top(3) == ['3', '0', '1']
+    assert index.top(2, keys={'2', '4', '5'}) == ['2', '5']
+
+    storage.delete_data(make_record(3, salary_from=None, salary_to=200000))
+    storage.write_data([make_record(6, salary_from=300000, salary_to=400000)])
+    assert index.top(2) == ['6', '0']
+    assert index.range(250000, 500000) == {'6'}
+
+
+def test_top_n_matches_full_sort():
+    values = [5, 1, 9, 3, 9, 7, 2]
+    assert top_n(values, 3, key=lambda value: value) == sorted(values, reverse=True)[:3]
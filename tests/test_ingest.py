@@ -0,0 +1,82 @@
+import pytest
+import json
+from src.currency import CurrencyConverter
+from src.ingest import IngestPipeline, prepare_shard, shard
+from src.storage import JSONLinesStorage
+
+
+class CountingStorage(JSONLinesStorage):
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.writes = []
+
+    def write_data(self, data):
+        self.writes.append(len(data))
+        super().write_data(data)
+
+
+def test_pipeline_commits_in_batches_and_counts_stages(tmp_path, make_record):
+    storage = CountingStorage(str(tmp_path / 'vacancies.jsonl'))
+    errors = []
+    pipeline = IngestPipeline(storage, batch_size=4, on_error=lambda item, error: errors.append(item['id']))
+    items = [make_record(idx, api_item=True) for idx in range(10)]
+    items += [make_record(10, api_item=True, alternate_url='ftp://hh.ru/vacancy/10'), {'id': '11'}]
+
+    stats = pipeline.run(items)
+    assert storage.writes == [4, 4, 2]
+    assert len(storage) == 10
+    assert sorted(errors) == ['10', '11']
+    assert stats.parse.count == 10
+    assert stats.parse.errors == 2
+    assert stats.validate.count == 10
+    assert stats.commit.count == 10
+    assert stats.as_dict()['batches'] == 3
+
+
+def test_pipeline_yields_vacancies_and_flushes_on_early_stop(tmp_path, make_record):
+    storage = CountingStorage(str(tmp_path / 'vacancies.jsonl'))
+    pipeline = IngestPipeline(storage, batch_size=100)
+    vacancies = pipeline.process(make_record(idx, api_item=True) for idx in range(10))
+    assert [next(vacancies).title for _ in range(3)] == ['Developer 0', 'Developer 1', 'Developer 2']
+    vacancies.close()
+    assert storage.writes == [3]
+
+
+def test_pipeline_rejects_invalid_batch_size(tmp_path):
+    with pytest.raises(ValueError):
+        IngestPipeline(JSONLinesStorage(str(tmp_path / 'vacancies.jsonl')), batch_size=0)
+
+
+def test_prepare_shard_returns_compact_rows(make_record):
+    items = [make_record(1, api_item=True), make_record(2, api_item=True, alternate_url='ftp://hh.ru/vacancy/2')]
+    page = json.dumps({'items': items}).encode('utf-8')
+    result = prepare_shard([page, make_record(3, api_item=True), b'{broken', 42])
+    assert result.fields[:3] == ('id', 'title', 'url')
+    assert [row[0] for row in result.rows] == ['1', '3']
+    assert [(stage, type(error)) for stage, _, error in result.errors] == [
+        ('parse', json.JSONDecodeError), ('parse', TypeError), ('parse', ValueError)]
+    assert result.parsed == result.validated == 2
+
+
+def test_parallel_ingest_matches_sequential_order(tmp_path, make_record):
+    payloads = [json.dumps({'items': [make_record(page * 10 + idx, api_item=True) for idx in range(10)]})
+                for page in range(20)]
+    payloads.append(json.dumps([make_record(999, api_item=True, alternate_url='ftp://hh.ru/vacancy/999')]))
+    converter = CurrencyConverter(rates_file=None, fetch_remote=False)
+    converter.set_rates({'RUR': 1, 'USD': 0.01})
+
+    sequential = CountingStorage(str(tmp_path / 'sequential.jsonl'))
+    items = [item for page in range(20) for item in json.loads(payloads[page])['items']]
+    IngestPipeline(sequential, batch_size=50, converter=converter).run(items + json.loads(payloads[-1]))
+    parallel = CountingStorage(str(tmp_path / 'parallel.jsonl'))
+    errors = []
+    pipeline = IngestPipeline(parallel, batch_size=50, converter=converter,
+                              on_error=lambda item, error: errors.append(item['id']))
+    records = list(pipeline.process_parallel(shard(payloads, 3), workers=3))
+
+    assert [record['id'] for record in records] == [str(idx) for idx in range(200)]
+    assert parallel.read_data() == sequential.read_data()
+    assert records[5]['salary_from_norm'] == 100000
+    assert parallel.writes == [50, 50, 50, 50]
+    assert errors == ['999']
+    assert pipeline.stats.parse.count == 200 and pipeline.stats.parse.errors == 1
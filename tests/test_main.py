@@ -0,0 +1,28 @@
+import pytest
+from main import filter_vacancies, get_top_vacancies, get_vacancies_by_salary
+from src.index import KeywordIndex, SalaryIndex
+from src.models import Vacancy
+
+RECORDS = [
+    {'id': '99', 'title': 'Python Developer', 'url': 'https://example.com/job/5', 'salary_from': 100000,
+     'salary_to': 150000, 'currency': 'RUR', 'description': 'Python, Django'},
+    {'id': '7', 'title': 'Go Developer', 'url': 'https://hh.ru/vacancy/8', 'salary_from': 1000,
+     'salary_to': 2000, 'currency': 'USD', 'description': 'Go', 'salary_from_norm': 90000, 'salary_to_norm': 180000},
+    {'title': 'Analyst', 'url': 'https://hh.ru/vacancy/3', 'salary_from': None, 'salary_to': 90000,
+     'currency': 'RUR', 'description': 'SQL, Python'},
+]
+
+
+@pytest.mark.parametrize('indexed', [False, True])
+def test_filters_match_with_and_without_indexes(indexed):
+    vacancies = [Vacancy.from_record(record) for record in RECORDS]
+    keyword_index = salary_index = None
+    if indexed:
+        keyword_index, salary_index = KeywordIndex(), SalaryIndex()
+        keyword_index.add_records(RECORDS)
+        salary_index.add_records(RECORDS)
+    assert [vac.title for vac in filter_vacancies(vacancies, ['python'], keyword_index)] == \
+        ['Python Developer', 'Analyst']
+    assert [vac.title for vac in get_vacancies_by_salary(vacancies, '80000 - 200000', salary_index)] == \
+        ['Python Developer', 'Go Developer']
+    assert [vac.title for vac in get_top_vacancies(vacancies, 1)] == ['Go Developer']
@@ -0,0 +1,78 @@
+import json
+import pstats
+import pytest
+import requests_mock
+from src.api import HeadHunterAPI
+from src.metrics import MetricsRegistry, metrics, profile
+from src.storage import JSONLinesStorage
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry()
+    registry.inc('api_requests_total')
+    with registry.timer('api_request_seconds'):
+        pass
+    assert registry.to_dict() == {'counters': [], 'histograms': []}
+
+
+def test_counters_histograms_and_exports(tmp_path):
+    registry = MetricsRegistry(enabled=True, buckets=(0.1, 1.0))
+    registry.inc('api_requests_total', status='200')
+    registry.inc('api_requests_total', 2, status='200')
+    registry.observe('api_request_seconds', 0.05)
+    registry.observe('api_request_seconds', 0.5)
+    registry.observe('api_request_seconds', 5)
+
+    @registry.timed('filter_seconds', stage='sort')
+    def work():
+        return 42
+
+    assert work() == 42
+    assert registry.counter_value('api_requests_total', status='200') == 3
+    assert registry.histogram('filter_seconds', stage='sort').count == 1
+    text = registry.to_prometheus()
+    assert 'jobsearch_api_requests_total{status="200"} 3' in text
+    assert 'jobsearch_api_request_seconds_bucket{le="0.1"} 1' in text
+    assert 'jobsearch_api_request_seconds_bucket{le="1.0"} 2' in text
+    assert 'jobsearch_api_request_seconds_bucket{le="+Inf"} 3' in text
+    assert 'jobsearch_filter_seconds_count{stage="sort"} 1' in text
+
+    registry.export(str(tmp_path / 'metrics.json'))
+    exported = json.loads((tmp_path / 'metrics.json').read_text())
+    assert exported['counters'] == [{'name': 'api_requests_total', 'labels': {'status': '200'}, 'value': 3}]
+    registry.export(str(tmp_path / 'metrics.prom'))
+    assert (tmp_path / 'metrics.prom').read_text() == registry.to_prometheus()
+
+
+def test_api_and_storage_are_instrumented(tmp_path, enabled_metrics):
+    api = HeadHunterAPI(prefetch_pages=1)
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json={"items": [{"name": "Developer", "alternate_url": "https://hh.ru/vacancy/1"}]})
+        api.get_vacancies("Developer")
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    storage.write_data([{'title': 'Developer', 'url': 'https://hh.ru/vacancy/1', 'description': 'Python'}])
+    storage.read_data()
+
+    assert enabled_metrics.counter_value('api_requests_total', status='200') == 1
+    assert enabled_metrics.counter_value('api_bytes_read_total') > 0
+    assert enabled_metrics.histogram('api_request_seconds').count == 1
+    assert enabled_metrics.counter_value('storage_records_written_total') == 1
+    assert enabled_metrics.counter_value('storage_bytes_written_total') == \
+        enabled_metrics.counter_value('storage_bytes_read_total') > 0
+    assert enabled_metrics.histogram('storage_operation_seconds', backend='jsonl', operation='write').count == 1
+
+
+def test_profile_dumps_statistics(tmp_path):
+    filename = str(tmp_path / 'run.prof')
+    with profile(filename):
+        sorted(range(1000), reverse=True)
+    assert pstats.Stats(filename).total_calls > 0
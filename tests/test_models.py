@@ -24,3 +24,25 @@ def test_salary_comparison():
     vac2 = Vacancy("Dev", "https://hh.ru/vacancy/2", 90000, 140000, "RUR", "Some desc")
     assert vac1 > vac2
     assert vac2 < vac1
+
+
+def test_trusted_construction_matches_validated_path():
+    record = {'title': 'Dev', 'url': 'https://hh.ru/vacancy/7', 'salary_from': 1000, 'salary_to': None,
+              'currency': 'USD', 'description': 'Go', 'salary_from_norm': 90000, 'salary_to_norm': None}
+    validated = Vacancy.from_record(record)
+    trusted = Vacancy.from_trusted_row(record)
+    for name in Vacancy.__slots__:
+        assert getattr(trusted, name) == getattr(validated, name)
+    assert [vac.key for vac in Vacancy.from_rows([record, record])] == ['7', '7']
+
+    with pytest.raises(ValueError):
+        Vacancy.from_record(dict(record, url='ftp://hh.ru/vacancy/7'))
+    assert Vacancy.from_trusted_row(dict(record, url='ftp://hh.ru/vacancy/7')).url == 'ftp://hh.ru/vacancy/7'
+
+
+def test_key_prefers_the_record_id_like_the_indexes():
+    record = {'id': '99', 'title': 'Dev', 'url': 'https://example.com/job/5', 'salary_from': None,
+              'salary_to': None, 'currency': 'RUR', 'description': 'Go'}
+    assert Vacancy.from_record(record).key == Vacancy.from_trusted_row(record).key == '99'
+    assert Vacancy.from_record(dict(record, id=None)).key == 'https://example.com/job/5'
+    assert Vacancy.from_record(record).get('salary_from', 0) == 0
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from src.ranking import Ranker, RankingEngine, VacancyColumns, bm25_scorer, recency_scorer, salary_scorer
+from src.storage import JSONLinesStorage
+
+NOW = 1709276400.0  # 2024-03-01T07:00:00Z
+
+
+@pytest.fixture
+def records(make_record):
+    return [
+        make_record(0, salary_from=100000, salary_to=None, description="Python, Django",
+                    published_at='2024-02-16T10:00:00+0300'),
+        make_record(1, salary_from=300000, salary_to=None, description="Java", published_at=None),
+        make_record(2, salary_from=None, salary_to=None, description="Python Python Kafka",
+                    published_at='2024-03-01T10:00:00+0300'),
+        make_record(3, salary_from=200000, salary_to=None, description="Go and Kafka",
+                    published_at='2024-03-01T10:00:00+0300'),
+    ]
+
+
+def test_scorers_are_normalized(records):
+    columns = VacancyColumns(records)
+    assert columns.salary[2] != columns.salary[2]
+    assert salary_scorer()(columns, []).tolist() == [0, 1, 0, 0.5]
+
+    relevance = bm25_scorer()(columns, ['python'])
+    assert relevance[2] == 1 and 0 < relevance[0] < 1 and relevance[1] == relevance[3] == 0
+    assert not bm25_scorer()(columns, []).any()
+
+    recency = recency_scorer(half_life_days=14, now=lambda: NOW)(columns, [])
+    assert recency.tolist() == pytest.approx([0.5, 0, 1, 1])
+
+
+def test_ranker_selects_top_k_by_weighted_score(records):
+    columns = VacancyColumns(records)
+    ranker = Ranker({'salary': (1.0, salary_scorer())})
+    assert [row for row, _ in ranker.top(columns, k=2)] == [1, 3]
+    assert [row for row, _ in ranker.top(columns, k=10)] == [1, 3, 0, 2]
+
+    ranker.register('relevance', bm25_scorer(), 1.0)
+    assert [row for row, _ in ranker.top(columns, ['kafka'], k=3)] == [3, 1, 2]
+    assert [row for row, _ in ranker.top(columns, ['python'], k=5, require_match=True)] == [2, 0]
+    ranker.set_weights(salary=0)
+    assert ranker.top(columns, ['go'], k=1) == [(3, pytest.approx(1.0))]
+    assert ranker.top(columns, k=0) == []
+
+
+def test_ranker_matches_full_sort_on_random_scores(make_record):
+    rng = np.random.default_rng(1)
+    salaries = rng.integers(1, 50, 500) * 1000
+    records = [make_record(idx, salary_from=int(salary), salary_to=None) for idx, salary in enumerate(salaries)]
+    top = Ranker({'salary': (1.0, salary_scorer())}).top(VacancyColumns(records), k=25)
+    expected = sorted(range(len(records)), key=lambda idx: (-records[idx]['salary_from'], idx))[:25]
+    assert [row for row, _ in top] == expected
+
+
+def test_engine_follows_storage_changes(tmp_path, make_record, records):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'), auto_compact=False)
+    storage.write_data(records)
+    engine = RankingEngine(storage, Ranker({'salary': (1.0, salary_scorer())}))
+    assert [record['id'] for _, record in engine.rank(k=1)] == ['1']
+    columns = engine.columns()
+
+    storage.write_data([make_record(4, salary_from=500000, salary_to=None, description="Rust")])
+    assert [record['id'] for _, record in engine.rank(k=2)] == ['4', '1']
+    storage.upsert_many([make_record(1, salary_from=50000, salary_to=None, description="Java")])
+    storage.delete_many(['4'])
+    assert engine.columns() is columns
+    assert [record['id'] for _, record in engine.rank(k=10)] == ['3', '0', '2', '1']
+    assert (len(columns), columns.live) == (6, 4)
+
+
+def test_columns_ignore_and_compact_dead_rows(monkeypatch, make_record, records):
+    monkeypatch.setattr(VacancyColumns, 'MIN_COMPACT', 2)
+    columns = VacancyColumns(records)
+    columns.delete(['2'])
+    assert columns.postings('python')[0].tolist() == [0]
+    assert bm25_scorer()(columns, ['kafka'])[3] == 1
+    assert [row for row, _ in Ranker({'salary': (1.0, salary_scorer())}).top(columns, k=10)] == [1, 3, 0]
+
+    columns.add_records([make_record(idx, salary_from=400000, salary_to=None, description="Rust") for idx in (0, 3)])
+    assert (len(columns), columns.live) == (6, 3)
+    columns.delete(['1'])
+    assert [record['id'] for record in columns.records] == ['0', '3']
+    assert columns.matches(['rust']).tolist() == [True, True]
+
+
+def test_ranker_replace_keeps_the_weight():
+    ranker = Ranker()
+    ranker.replace('recency', recency_scorer(half_life_days=1))
+    assert ranker.scorers['recency'][0] == 0.2
+    with pytest.raises(KeyError):
+        ranker.replace('unknown', salary_scorer())
@@ -0,0 +1,66 @@
+import pytest
+from src.ratelimit import AdaptiveTokenBucket, CircuitBreaker, ExponentialBackoff, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_spaces_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    clock.now = 10.0
+    assert bucket.reserve() == 0
+
+
+def test_token_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_adaptive_bucket_slows_down_on_throttling_and_recovers():
+    clock = FakeClock()
+    bucket = AdaptiveTokenBucket(rate=10, capacity=10, min_rate=2, increase=1, clock=clock)
+    bucket.on_throttle(retry_after=2)
+    assert bucket.rate == 5
+    assert bucket.reserve() == pytest.approx(2.2)
+    bucket.on_throttle()
+    bucket.on_throttle()
+    assert bucket.rate == 2
+    for _ in range(20):
+        bucket.on_success()
+    assert bucket.rate == 10
+
+
+def test_exponential_backoff_is_capped_and_jittered():
+    backoff = ExponentialBackoff(base=0.5, cap=3, rng=lambda: 0.5)
+    assert [backoff.delay(attempt) for attempt in range(4)] == [0.25, 0.5, 1.0, 1.5]
+
+
+def test_circuit_breaker_opens_and_lets_one_trial_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow() and breaker.state == 'half-open'
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow()
@@ -0,0 +1,79 @@
+import os
+import pytest
+from src.snapshot import Snapshot, SnapshotError, json_to_snapshot, snapshot_to_json, write_snapshot
+from src.storage import JSONFileStorage
+
+
+def _records(count):
+    return [{
+        'id': str(idx),
+        'title': f"Разработчик {idx}",
+        'url': f"https://hh.ru/vacancy/{idx}",
+        'salary_from': 1000 * idx or None,
+        'salary_to': None,
+        'currency': 'RUR',
+        'description': "Python, SQL",
+    } for idx in range(count)]
+
+
+def test_snapshot_round_trips_records_with_random_access(tmp_path, monkeypatch):
+    records = _records(10)
+    records[3]['duplicate_of'] = '1'
+    del records[7]['currency']
+    filename = str(tmp_path / 'vacancies.snap')
+    assert write_snapshot(records, filename) == 10
+    monkeypatch.setattr(Snapshot, 'batch_size', 3)
+    with Snapshot(filename) as snapshot:
+        assert len(snapshot) == 10
+        assert snapshot.fields[:3] == ('id', 'title', 'url')
+        assert snapshot[3] == records[3]
+        assert snapshot[-1] == records[9]
+        assert list(snapshot) == records
+        assert [vac.title for vac in snapshot.iter_vacancies()][:2] == ["Разработчик 0", "Разработчик 1"]
+        with pytest.raises(IndexError):
+            snapshot[10]
+
+
+def test_empty_snapshot(tmp_path):
+    filename = str(tmp_path / 'empty.snap')
+    assert write_snapshot([], filename) == 0
+    with Snapshot(filename) as snapshot:
+        assert len(snapshot) == 0
+        assert snapshot.read_all() == []
+
+
+def test_corrupt_snapshots_are_detected(tmp_path):
+    filename = str(tmp_path / 'vacancies.snap')
+    write_snapshot(_records(5), filename)
+    with open(filename, 'rb') as file:
+        data = bytearray(file.read())
+
+    corrupt = bytearray(data)
+    corrupt[100] ^= 0xFF
+    with open(filename, 'wb') as file:
+        file.write(corrupt)
+    with pytest.raises(SnapshotError, match='Checksum'):
+        Snapshot(filename)
+    with open(filename, 'wb') as file:
+        file.write(data[:-3])
+    with pytest.raises(SnapshotError, match='truncated'):
+        Snapshot(filename)
+    with open(filename, 'wb') as file:
+        file.write(b'[]' + bytes(40))
+    with pytest.raises(SnapshotError, match='not a snapshot'):
+        Snapshot(filename)
+
+
+def test_json_conversion_round_trip(tmp_path):
+    records = _records(50)
+    json_filename = str(tmp_path / 'vacancies.json')
+    JSONFileStorage(json_filename).write_data(records)
+    snapshot_filename = str(tmp_path / 'vacancies.snap')
+    assert json_to_snapshot(json_filename, snapshot_filename) == 50
+    assert os.path.getsize(snapshot_filename) < os.path.getsize(json_filename) / 2
+
+    restored = str(tmp_path / 'restored.json')
+    assert snapshot_to_json(snapshot_filename, restored) == 50
+    with open(restored, encoding='utf-8') as restored_file, open(json_filename, encoding='utf-8') as original:
+        assert restored_file.read() == original.read()
+    assert JSONFileStorage(restored).read_data() == records
@@ -1,7 +1,12 @@
 import sys
 import os
 import pytest
-from src.storage import JSONFileStorage
+import json
+import multiprocessing
+import threading
+from src.storage import (FileLock, GroupCommitWriter, JSONFileStorage, JSONLinesStorage, SQLiteStorage,
+                         StorageListener)
+from src.utils import vacancy_key
 
 
 def test_write_and_read_data():
@@ -21,3 +26,332 @@ def test_write_and_read_data():
 
     # Cleanup
     os.remove('test_vacancies.json')
+    os.remove('test_vacancies.json.lock')
+
+
+def test_jsonl_write_deduplicates_by_key(tmp_path, make_record):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    storage.write_data([make_record(1), make_record(2)])
+    storage.write_data([make_record(2, title='Changed'), make_record(3)])
+    read_data = storage.read_data()
+    assert [item['url'] for item in read_data] == [
+        'https://hh.ru/vacancy/1', 'https://hh.ru/vacancy/2', 'https://hh.ru/vacancy/3'
+    ]
+    assert read_data[1]['title'] == 'Developer 2'
+
+
+def test_jsonl_delete_and_reload(tmp_path, make_record):
+    filename = str(tmp_path / 'vacancies.jsonl')
+    storage = JSONLinesStorage(filename)
+    storage.write_data([make_record(1), make_record(2)])
+    storage.delete_data(make_record(1))
+
+    reloaded = JSONLinesStorage(filename)
+    assert len(reloaded) == 1
+    assert reloaded.read_data() == [make_record(2)]
+
+
+def test_jsonl_compaction_drops_dead_lines(tmp_path, make_record):
+    filename = str(tmp_path / 'vacancies.jsonl')
+    storage = JSONLinesStorage(filename, compact_min_garbage=6)
+    storage.write_data([make_record(idx) for idx in range(4)])
+    for idx in range(3):
+        storage.delete_data(make_record(idx))
+    storage.wait_for_compaction()
+
+    with open(filename, encoding='utf-8') as file:
+        assert len(file.readlines()) == 1
+    storage.write_data([make_record(5)])
+    assert JSONLinesStorage(filename).read_data() == [make_record(3), make_record(5)]
+
+
+def test_jsonl_truncates_partial_last_line(tmp_path, make_record):
+    filename = str(tmp_path / 'vacancies.jsonl')
+    JSONLinesStorage(filename).write_data([make_record(1)])
+    with open(filename, 'a', encoding='utf-8') as file:
+        file.write('{"title": "Broken')
+
+    storage = JSONLinesStorage(filename)
+    storage.write_data([make_record(2)])
+    assert storage.read_data() == [make_record(1), make_record(2)]
+
+
+def test_json_iter_data_matches_read_data_for_any_chunk_size(tmp_path, make_record):
+    storage = JSONFileStorage(str(tmp_path / 'vacancies.json'))
+    records = [make_record(idx, description=f'Описание, [{idx}] "quoted" }}') for idx in range(20)]
+    storage.write_data(records)
+    for chunk_size in (1, 7, 64, 65536):
+        assert list(storage.iter_data(chunk_size=chunk_size)) == records
+
+
+def test_json_iter_data_is_lazy_and_detects_truncation(tmp_path, make_record):
+    filename = str(tmp_path / 'vacancies.json')
+    storage = JSONFileStorage(filename)
+    storage.write_data([make_record(1), make_record(2)])
+    with open(filename, 'r+', encoding='utf-8') as file:
+        content = file.read()
+        file.seek(0)
+        file.truncate()
+        file.write(content[:-40])
+
+    records = storage.iter_data(chunk_size=16)
+    assert next(records) == make_record(1)
+    with pytest.raises(ValueError):
+        next(records)
+
+
+def test_jsonl_iter_data_uses_snapshot_of_live_records(tmp_path, make_record):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    storage.write_data([make_record(1), make_record(2)])
+    records = storage.iter_data()
+    assert next(records) == make_record(1)
+    storage.write_data([make_record(3)])
+    assert list(records) == [make_record(2)]
+    assert [vac.url for vac in storage.iter_vacancies()] == [
+        'https://hh.ru/vacancy/1', 'https://hh.ru/vacancy/2', 'https://hh.ru/vacancy/3'
+    ]
+
+
+def test_jsonl_upsert_replaces_changed_records_only(tmp_path, make_record):
+    filename = str(tmp_path / 'vacancies.jsonl')
+    storage = JSONLinesStorage(filename)
+    assert storage.upsert_many([make_record(1), make_record(2)]) == 2
+    assert storage.upsert_many([make_record(1), make_record(2, title='Changed'), make_record(3)]) == 2
+
+    reloaded = JSONLinesStorage(filename)
+    assert reloaded.read_data() == [make_record(1), make_record(2, title='Changed'), make_record(3)]
+    reloaded.compact()
+    with open(filename, encoding='utf-8') as file:
+        assert len(file.readlines()) == 3
+
+
+@pytest.fixture
+def query_records(make_record):
+    return [
+        make_record(1, title='Python Developer', description='<highlighttext>Django</highlighttext>, PostgreSQL',
+                    salary_from=150000, salary_to=250000),
+        make_record(2, title='Data Analyst', description='Python, pandas', salary_from=90000, salary_to=140000),
+        make_record(3, title='Go Developer', description='Kubernetes', salary_from=None, salary_to=300000),
+        make_record(4, title='Аналитик данных', description='SQL, Python', currency='USD', salary_from=2000,
+                    salary_to=3000, salary_from_norm=180000, salary_to_norm=270000),
+        make_record(5, title='QA Engineer', description='Pytest', salary_from=None, salary_to=None),
+    ]
+
+
+QUERIES = [
+    dict(),
+    dict(keywords=['python']),
+    dict(keywords=['python', 'kubernetes'], top_n=3),
+    dict(keywords=['python', 'sql'], mode='all'),
+    dict(keywords=['py']),
+    dict(keywords=['py'], prefix=False),
+    dict(keywords=['go developer']),
+    dict(keywords=['данн']),
+    dict(salary_range=(100000, 300000)),
+    dict(keywords=['python'], salary_range=(100000, 300000), top_n=1),
+    dict(top_n=2),
+]
+
+
+def test_sqlite_write_upsert_delete(tmp_path, make_record):
+    filename = str(tmp_path / 'vacancies.sqlite3')
+    storage = SQLiteStorage(filename)
+    storage.write_data([make_record(1), make_record(2), make_record(1, title='Duplicate')])
+    storage.write_data([make_record(2, title='Ignored'), make_record(3)])
+    assert [item['title'] for item in storage.read_data()] == ['Developer 1', 'Developer 2', 'Developer 3']
+
+    assert storage.upsert_many([make_record(1), make_record(2, title='Changed'), make_record(4)]) == 2
+    storage.delete_data(make_record(3))
+    reader = SQLiteStorage(filename)
+    assert len(reader) == 3
+    assert {item['title'] for item in reader.read_data()} == {'Developer 1', 'Changed', 'Developer 4'}
+    assert reader.query(keywords=['changed']) == [make_record(2, title='Changed')]
+    assert reader.query(keywords=['developer'], mode='all') == [make_record(1), make_record(4)]
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_sqlite_query_matches_default_scan(tmp_path, query, query_records):
+    sqlite_storage = SQLiteStorage(str(tmp_path / 'vacancies.sqlite3'))
+    sqlite_storage.write_data(query_records)
+    jsonl_storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    jsonl_storage.write_data(query_records)
+
+    expected = jsonl_storage.query(**query)
+    assert sqlite_storage.query(**query) == expected
+    assert expected or query.get('keywords') == ['py'] and query.get('prefix') is False
+
+
+def test_json_write_is_atomic_on_crash(tmp_path, monkeypatch, make_record):
+    filename = str(tmp_path / 'vacancies.json')
+    storage = JSONFileStorage(filename)
+    storage.write_data([make_record(1)])
+
+    def crash(data, file, **kwargs):
+        file.write('[{"title": "trunc')
+        raise OSError('disk full')
+
+    monkeypatch.setattr(json, 'dump', crash)
+    with pytest.raises(OSError):
+        storage.write_data([make_record(2)])
+    monkeypatch.undo()
+    assert storage.read_data() == [make_record(1)]
+    assert sorted(os.listdir(tmp_path)) == ['vacancies.json', 'vacancies.json.lock']
+
+
+def _write_from_process(storage_class, filename, worker, make_record):
+    storage = storage_class(filename)
+    for idx in range(10):
+        storage.write_data([make_record(worker * 100 + idx)])
+
+
+@pytest.mark.parametrize('storage_class', [JSONFileStorage, JSONLinesStorage])
+def test_concurrent_processes_do_not_lose_writes(tmp_path, storage_class, make_record):
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        pytest.skip('requires the fork start method')
+    filename = str(tmp_path / 'vacancies.data')
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_write_from_process, args=(storage_class, filename, worker, make_record))
+                 for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    assert len(storage_class(filename).read_data()) == 40
+
+
+def test_jsonl_sees_appends_and_compaction_of_other_writers(tmp_path, make_record):
+    filename = str(tmp_path / 'vacancies.jsonl')
+    first = JSONLinesStorage(filename, auto_compact=False)
+    second = JSONLinesStorage(filename, auto_compact=False)
+    first.write_data([make_record(1), make_record(2)])
+    second.write_data([make_record(2), make_record(3)])
+    assert len(first) == 3
+    first.delete_data(make_record(1))
+    first.compact()
+    assert [item['title'] for item in second.read_data()] == ['Developer 2', 'Developer 3']
+    assert second.read_many(['3']) == [make_record(3)]
+
+
+def test_file_lock_is_reentrant_but_not_upgradable(tmp_path):
+    lock = FileLock(str(tmp_path / 'store.lock'))
+    with lock.exclusive():
+        with lock.shared():
+            pass
+    with lock.shared():
+        with pytest.raises(RuntimeError):
+            with lock.exclusive():
+                pass
+
+
+def test_group_commit_merges_concurrent_submissions(tmp_path, make_record):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    writer = GroupCommitWriter(storage)
+    futures = [writer.submit([make_record(idx)]) for idx in range(50)]
+    futures.append(writer.submit([make_record(1, title='Changed')], upsert=True))
+    writer.close()
+    for future in futures:
+        future.result()
+    assert len(storage) == 50
+    assert storage.read_many(['1']) == [make_record(1, title='Changed')]
+    assert writer.commits < len(futures)
+    with pytest.raises(RuntimeError):
+        writer.submit([make_record(99)])
+
+
+def test_group_commit_resolves_every_submission_racing_close(tmp_path, make_record):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    writer = GroupCommitWriter(storage)
+    futures = []
+
+    def produce(offset):
+        for idx in range(offset, offset + 200):
+            try:
+                futures.append(writer.submit([make_record(idx)]))
+            except RuntimeError:
+                return
+
+    producers = [threading.Thread(target=produce, args=(offset,)) for offset in (0, 1000, 2000)]
+    for producer in producers:
+        producer.start()
+    writer.close()
+    for producer in producers:
+        producer.join()
+    for future in futures:
+        future.result(timeout=5)
+    assert len(storage) == len(futures)
+
+
+@pytest.mark.parametrize('storage_class, suffix', [
+    (JSONFileStorage, 'json'), (JSONLinesStorage, 'jsonl'), (SQLiteStorage, 'sqlite3')])
+def test_query_cache_follows_store_generation(tmp_path, storage_class, suffix, make_record, query_records):
+    filename = str(tmp_path / f'vacancies.{suffix}')
+    storage = storage_class(filename)
+    storage.write_data(query_records)
+    calls = []
+    run_query = storage._query
+    storage._query = lambda *args: calls.append(args) or run_query(*args)
+
+    expected = storage.query(['python'], top_n=2)
+    assert storage.query(['python'], top_n=2) == expected
+    assert len(calls) == 1
+
+    lead = make_record(99, title='Python Lead', salary_from=900000, salary_to=990000)
+    storage.write_data([lead])
+    assert storage.query(['python'], top_n=2)[0]['title'] == 'Python Lead'
+    generation = storage.generation()
+
+    other = storage_class(filename)
+    other.delete_data(lead)
+    assert storage.generation() != generation
+    assert storage.query(['python'], top_n=2) == expected
+    assert len(calls) == 3
+
+
+def test_iter_vacancies_streams_and_reuses_a_warm_snapshot(tmp_path, monkeypatch, make_record):
+    storage = JSONFileStorage(str(tmp_path / 'vacancies.json'))
+    storage.write_data([make_record(1), make_record(2)])
+    assert [vac.title for vac in storage.iter_vacancies()] == ['Developer 1', 'Developer 2']
+    assert storage._snapshot is None
+
+    assert storage.read_many(['2']) == [make_record(2)]
+
+    def fail():
+        raise AssertionError('the store was read again')
+
+    monkeypatch.setattr(storage, 'iter_data', fail)
+    assert [vac.title for vac in storage.iter_vacancies()] == ['Developer 1', 'Developer 2']
+    assert storage.read_many(['1']) == [make_record(1)]
+    monkeypatch.undo()
+    storage.delete_data(make_record(1))
+    assert [vac.title for vac in storage.iter_vacancies()] == ['Developer 2']
+
+
+@pytest.mark.parametrize('storage_class, suffix', [
+    (JSONFileStorage, 'json'), (JSONLinesStorage, 'jsonl'), (SQLiteStorage, 'sqlite3')])
+def test_delete_many_and_expire_older_than(tmp_path, storage_class, suffix, make_record):
+    storage = storage_class(str(tmp_path / f'vacancies.{suffix}'))
+    storage.write_data([make_record(idx, published_at=f'2024-03-{idx:02d}T10:00:00+0300') for idx in range(1, 11)]
+                       + [make_record(11)])
+    deleted = []
+    listener = StorageListener()
+    listener.on_records_deleted = deleted.append
+    storage.add_listener(listener)
+
+    assert storage.delete_many(['1', make_record(2), '404']) == 2
+    assert storage.delete_many(lambda item: item['title'].endswith('3')) == 1
+    assert storage.expire_older_than('2024-03-06T00:00:00+0300') == 2
+    assert storage.delete_many([]) == 0
+    assert sorted(sorted(keys) for keys in deleted) == [['1', '2'], ['3'], ['4', '5']]
+    assert sorted(int(vacancy_key(item)) for item in storage.read_data()) == [6, 7, 8, 9, 10, 11]
+
+
+def test_jsonl_delete_many_appends_once(tmp_path, make_record):
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'), auto_compact=False)
+    storage.write_data([make_record(idx) for idx in range(100)])
+    appends = []
+    append = storage._append
+    storage._append = lambda lines: appends.append(len(lines)) or append(lines)
+    assert storage.delete_many(str(idx) for idx in range(0, 100, 2)) == 50
+    assert appends == [50]
+    assert len(JSONLinesStorage(storage._filename)) == 50
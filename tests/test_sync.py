@@ -0,0 +1,97 @@
+import pytest
+import requests_mock
+from src.api import HeadHunterAPI
+from src.storage import JSONFileStorage, JSONLinesStorage
+from src.sync import IncrementalSync, SyncState
+
+
+@pytest.mark.parametrize('storage_class, filename', [
+    (JSONLinesStorage, 'vacancies.jsonl'),
+    (JSONFileStorage, 'vacancies.json'),
+])
+def test_sync_fetches_only_new_vacancies_and_upserts_by_id(tmp_path, storage_class, filename, make_record):
+    api = HeadHunterAPI()
+    storage = storage_class(str(tmp_path / filename))
+    state_file = str(tmp_path / 'state.json')
+    sync = IncrementalSync(api, storage, SyncState(state_file))
+
+    first = [make_record(idx, api_item=True, published_at=published_at)
+             for idx, published_at in [(1, '2024-03-01T10:00:00+0300'), (2, '2024-03-02T09:00:00+0300')]]
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json={'items': first, 'pages': 1})
+        result = sync.sync('Python')
+        assert 'date_from' not in m.last_request.qs
+    assert (result.fetched, result.changed) == (2, 2)
+    assert result.high_water_mark == '2024-03-02T09:00:00+0300'
+
+    resync = IncrementalSync(api, storage, SyncState(state_file))
+    delta = [make_record(2, api_item=True, published_at='2024-03-02T09:00:00+0300',
+                         snippet={'requirement': 'Python, Go'}),
+             make_record(3, api_item=True, published_at='2024-03-03T08:00:00+0300')]
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json={'items': delta, 'pages': 1})
+        result = resync.sync('python')
+        assert m.last_request.qs['date_from'] == ['2024-03-02t09:00:00+0300']
+    assert (result.fetched, result.changed) == (2, 2)
+    assert result.high_water_mark == '2024-03-03T08:00:00+0300'
+
+    records = {record['id']: record for record in storage.read_data()}
+    assert sorted(records) == ['1', '2', '3']
+    assert records['2']['description'] == 'Python, Go'
+
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json={'items': delta[1:], 'pages': 1})
+        assert resync.sync('Python').changed == 0
+
+
+def _windowed_response(items, per_page):
+    def callback(request, context):
+        date_from = request.qs.get('date_from', [''])[0]
+        date_to = request.qs.get('date_to', ['~'])[0]
+        matching = [item for item in items if date_from <= item['published_at'].lower() <= date_to]
+        page = int(request.qs['page'][0])
+        return {'items': matching[page * per_page:(page + 1) * per_page], 'found': len(matching),
+                'pages': -(-len(matching) // per_page)}
+    return callback
+
+
+def test_sync_splits_windows_deeper_than_the_api_allows(tmp_path, monkeypatch, make_record):
+    monkeypatch.setattr(HeadHunterAPI, 'MAX_DEPTH', 4)
+    api = HeadHunterAPI(per_page=2)
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    state = SyncState(str(tmp_path / 'state.json'))
+    items = [make_record(7, api_item=True, published_at='yesterday')]
+    items += [make_record(idx, api_item=True, published_at=f'2024-03-0{9 - idx}T10:00:00+0300') for idx in range(7)]
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json=_windowed_response(items, 2))
+        result = IncrementalSync(api, storage, state).sync('Python')
+    assert (result.changed, result.invalid_time, result.truncated) == (7, 1, False)
+    assert result.high_water_mark == state.get('python') == '2024-03-09T10:00:00+0300'
+    assert sorted(record['id'] for record in storage.read_data()) == [str(idx) for idx in range(7)]
+
+    same_second = [make_record(idx, api_item=True, published_at='2024-03-10T10:00:00+0300') for idx in range(10, 15)]
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json=_windowed_response(same_second, 2))
+        result = IncrementalSync(api, storage, state).sync('Python')
+    assert result.truncated
+    assert result.high_water_mark == state.get('python') == '2024-03-09T10:00:00+0300'
+
+
+def test_sync_validates_items_and_counts_skips_by_reason(tmp_path, make_record):
+    api = HeadHunterAPI()
+    storage = JSONLinesStorage(str(tmp_path / 'vacancies.jsonl'))
+    empty_name = make_record(2, api_item=True, published_at='2024-03-02T10:00:00+0300', name='')
+    bad_salary = make_record(3, api_item=True, published_at='2024-03-03T10:00:00+0300',
+                             salary={'from': 'abc', 'currency': 'RUR'})
+    missing_name = make_record(4, api_item=True, published_at='2024-03-04T10:00:00+0300')
+    del missing_name['name']
+    items = [make_record(1, api_item=True, published_at='2024-03-01T10:00:00+0300'), empty_name, bad_salary,
+             missing_name, make_record(5, api_item=True, published_at='yesterday'),
+             make_record(6, api_item=True, published_at='2024-03-06T10:00:00+0300')]
+    with requests_mock.Mocker() as m:
+        m.get(api._base_url, json={'items': items, 'pages': 1})
+        result = IncrementalSync(api, storage, SyncState(None)).sync('Python')
+    assert (result.fetched, result.changed) == (6, 2)
+    assert (result.malformed, result.invalid, result.invalid_time, result.skipped) == (1, 2, 1, 4)
+    assert result.high_water_mark == '2024-03-06T10:00:00+0300'
+    assert sorted(record['id'] for record in storage.read_data()) == ['1', '6']
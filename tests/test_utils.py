@@ -1,6 +1,6 @@
 import sys
 import pytest
-from src.utils import validate_url, parse_salary
+from src.utils import validate_url, parse_salary, parse_vacancy_item, vacancy_key
 
 
 def test_validate_url():
@@ -27,3 +27,26 @@ def test_parse_salary():
     assert salary_from == 100000
     assert salary_to is None
     assert currency == "RUR"
+
+
+def test_parse_vacancy_item():
+    item = {
+        'id': '93353083',
+        'name': 'Python Developer',
+        'alternate_url': 'https://hh.ru/vacancy/93353083',
+        'salary': {'from': 100000, 'to': None, 'currency': 'RUR'},
+        'snippet': {'requirement': None, 'responsibility': 'Code'},
+        'employer': {'id': '1740', 'name': 'Яндекс'},
+        'published_at': '2024-03-01T10:00:00+0300'
+    }
+    record = parse_vacancy_item(item)
+    assert record['id'] == '93353083'
+    assert record['employer'] == 'Яндекс'
+    assert parse_vacancy_item(dict(item, employer=None))['employer'] is None
+    assert record['salary_from'] == 100000
+    assert record['description'] == "No description available"
+    assert record['published_at'] == '2024-03-01T10:00:00+0300'
+    assert vacancy_key(record) == vacancy_key({'url': record['url']})
+
+    with pytest.raises(ValueError):
+        parse_vacancy_item(dict(item, alternate_url='hh.ru/vacancy/1'))